@@ -7,46 +7,199 @@ Comment Handler Module
 import tkinter as tk
 from tkinter import messagebox
 import datetime
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-
 class CommentHandler:
     """コメント処理と管理を担当するMixinクラス"""
     
+    # コメントキューの取り出し間隔（ミリ秒、約30fps）
+    COMMENT_DRAIN_INTERVAL_MS = 33
+    # 1回の取り出しで処理する最大件数
+    COMMENT_DRAIN_MAX_ITEMS = 300
+    # 1回の取り出しに使う時間の上限（ミリ秒）
+    COMMENT_DRAIN_BUDGET_MS = 15
+    # 1チャンクあたりの取り出し件数
+    COMMENT_DRAIN_CHUNK = 50
+    # コメントキューに溜めておく上限（取り出しが止まった場合の安全弁。約10秒分の最大処理量）
+    COMMENT_QUEUE_MAX_ITEMS = 100000
+    # コメントオーバーレイに1回で送る最大件数（表示行数より古いものは送っても消えるだけ）
+    COMMENT_OVERLAY_MAX_ROWS = 50
+    # コメントオーバーレイに送る本文の最大文字数
+    COMMENT_OVERLAY_MAX_LENGTH = 200
+    
+    @property
+    def common_requests(self):
+        """共通リクエストリスト（RequestEngineが保持するリスト）"""
+        return self.request_engine.requests
+    
+    def setup_request_engine(self):
+        """リクエストリストの変更通知を各出力先に接続"""
+        self.request_engine.subscribe(self.on_request_changed)  # GUI
+        self.request_engine.subscribe(lambda event: self.generate_todo_xml())  # Ajax用XML
+        self.request_engine.subscribe(lambda event: self.publish_todo_overlay())  # オーバーレイ配信サーバ
+        self.request_engine.subscribe(lambda event: self.generate_xml())  # OBS
+        self.request_engine.subscribe(self.on_request_saved)  # 自動保存
+    
+    def on_request_changed(self, event):
+        """リクエストリストの変更をGUIに反映"""
+        # コメントのコマンドによる変更なら配信タブのリクエスト処理数を更新
+        if event.stream_id:
+            settings = self.stream_manager.streams.get(event.stream_id)
+            if settings and hasattr(settings, 'request_count_label'):
+                settings.processed_requests += event.count
+                settings.request_count_label.config(text=str(settings.processed_requests))
+        
+        if hasattr(self, 'request_tree'):
+            self.update_request_display()
+    
+    def on_request_saved(self, event):
+        """リクエストリストの変更を操作ログに追記（読み込み直後は記録しない）"""
+        if event.record is None:
+            return
+        try:
+            if self.request_journal.append(event.record):
+                # ログが溜まったらスナップショットに圧縮
+                self.save_requests()
+        except Exception as e:
+            logger.error(f"Failed to append request journal: {e}")
+    
+    def rebuild_trigger_matcher(self):
+        """プッシュワード/プルワードの設定からマッチャを作り直す（設定保存時に呼ぶ）"""
+        self.request_engine.rebuild_trigger_matcher()
+    
+    def start_comment_drain(self):
+        """コメントキューの定期取り出しを開始"""
+        self._comment_drain_job = self.root.after(self.COMMENT_DRAIN_INTERVAL_MS, self.drain_comment_queue)
+    
+    def stop_comment_drain(self):
+        """コメントキューの定期取り出しを停止"""
+        job = getattr(self, '_comment_drain_job', None)
+        if job:
+            try:
+                self.root.after_cancel(job)
+            except Exception:
+                pass
+            self._comment_drain_job = None
+    
+    def drain_comment_queue(self):
+        """キューに溜まったコメントをフレーム予算内でまとめて処理（メインスレッドで実行）"""
+        start = time.perf_counter()
+        processed = 0
+        try:
+            while processed < self.COMMENT_DRAIN_MAX_ITEMS:
+                chunk = min(self.COMMENT_DRAIN_CHUNK, self.COMMENT_DRAIN_MAX_ITEMS - processed)
+                batch = self.comment_queue.pop_batch(chunk)
+                if not batch:
+                    break
+                self.process_comments(batch)
+                processed += len(batch)
+                if (time.perf_counter() - start) * 1000 >= self.COMMENT_DRAIN_BUDGET_MS:
+                    break
+        except Exception as e:
+            logger.error(f"Error while draining comment queue: {e}")
+        finally:
+            if processed:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.comment_queue.record_drain(processed, elapsed_ms)
+                backlog = self.comment_queue.qsize()
+                if backlog:
+                    logger.debug(f"Comment queue backlog: {backlog} (processed {processed} in {elapsed_ms:.1f}ms)")
+            self.start_comment_drain()
+    
     def process_comment(self, stream_id, comment_data):
         """コメントを処理"""
-        logger.debug(f"DEBUG: process_comment called for stream_id: {stream_id}")
-        logger.debug(f"DEBUG: comment_data: {comment_data}")
+        self.process_comments([(stream_id, comment_data)])
+    
+    def process_comments(self, batch):
+        """複数のコメントをまとめて処理
         
-        # NGユーザチェック
-        for ng_user in self.global_settings.ng_users:
-            if (ng_user['platform'] == comment_data['platform'] and 
-                ng_user['id'] == comment_data['author_id']):
-                logger.info(f"NG user detected: {comment_data['author']}, comment ignored")
-                return
+        スクロールや選択中配信の情報更新はバッチの最後に1回だけ行う。
         
-        # StreamSettingsを取得
-        settings = self.stream_manager.streams.get(stream_id)
-        if not settings:
-            return
+        Args:
+            batch (list[tuple]): (stream_id, comment_data) のリスト
+        """
+        displayed = False
+        updated_streams = set()
+        overlay_comments = []
         
-        # コメントをストリームに保存
-        settings.comments.append(comment_data)
+        for stream_id, comment_data in batch:
+            logger.debug(f"DEBUG: process_comment called for stream_id: {stream_id}")
+            logger.debug(f"DEBUG: comment_data: {comment_data}")
+            
+            # NGユーザチェック
+            if self.user_registry.is_ng_user(comment_data['platform'], comment_data['author_id']):
+                logger.info(f"NG user detected: {comment_data['author']}, comment ignored")
+                continue
+            
+            # StreamSettingsを取得
+            settings = self.stream_manager.streams.get(stream_id)
+            if not settings:
+                continue
+            
+            # コメントをストリームに保存
+            settings.comments.append(comment_data)
+            
+            # プッシュワード/プルワード判定（表示とリクエスト処理で共用）
+            triggers = self.request_engine.trigger_matcher.match(comment_data['message'])
+            
+            # GUI更新（共通コメント表示エリア、スクロールは最後にまとめて行う）
+            self.update_comment_display(comment_data, scroll=False, triggers=triggers)
+            displayed = True
+            updated_streams.add(stream_id)
+            overlay_comments.append((comment_data, triggers))
+            
+            # リクエスト処理
+            self.process_request_commands(stream_id, comment_data, triggers=triggers)
         
-        # GUI更新（共通コメント表示エリア）
-        self.update_comment_display(comment_data)
+        # 自動スクロール
+        if displayed and self.auto_scroll.get():
+            self.comment_tree.yview_moveto(1.0)
         
         # 選択中の配信情報を更新（コメント数）
-        if self.selected_stream_id == stream_id:
-            self.update_selected_stream_info(stream_id)
+        if self.selected_stream_id in updated_streams:
+            self.update_selected_stream_info(self.selected_stream_id)
+        
+        # コメントオーバーレイへはバッチごとに1回だけ送る
+        if overlay_comments:
+            self.publish_comment_overlay(overlay_comments)
+    
+    def publish_comment_overlay(self, comments):
+        """コメントをオーバーレイ配信サーバの購読者へまとめて送る
         
-        # リクエスト処理
-        self.process_request_commands(stream_id, comment_data)
+        Args:
+            comments (list[tuple]): (comment_data, triggers) のリスト（NGユーザ除外済み）
+        """
+        entries = []
+        for comment_data, (push, pull) in comments[-self.COMMENT_OVERLAY_MAX_ROWS:]:
+            tag = None
+            if push:
+                tag = push.kind
+            elif pull:
+                tag = pull.kind
+            entries.append({
+                'user': self.overlay_user_key(comment_data['platform'], comment_data.get('author_id', '')),
+                'author': comment_data['author'],
+                'message': comment_data['message'][:self.COMMENT_OVERLAY_MAX_LENGTH],
+                'platform': comment_data['platform'],
+                'tag': tag,
+            })
+        self.overlay_server.publish('comments', 'comments', {'comments': entries})
+    
+    def overlay_user_key(self, platform, author_id):
+        """コメントオーバーレイでユーザーを識別する文字列（NG追加時の行の削除に使う）"""
+        return ':'.join(self.user_registry.make_key(platform, author_id))
     
-    def update_comment_display(self, comment_data):
-        """共通コメント表示エリアにコメントを追加"""
+    def update_comment_display(self, comment_data, scroll=True, triggers=None):
+        """共通コメント表示エリアにコメントを追加
+        
+        Args:
+            comment_data (dict): コメントデータ
+            scroll (bool): 追加後に自動スクロールするか
+            triggers (tuple): trigger_matcher.match()の結果（Noneならここで判定）
+        """
         # タイムスタンプがあればフォーマット、なければ現在時刻
         if 'timestamp' in comment_data and comment_data['timestamp']:
             try:
@@ -62,20 +215,16 @@ class CommentHandler:
         # タグを判定（優先順位: request_add > request_delete > platform別）
         message = comment_data['message']
         platform = comment_data['platform']
+        if triggers is None:
+            triggers = self.request_engine.trigger_matcher.match(message)
+        push, pull = triggers
         tag = None
         
-        # リクエスト追加ワードチェック（最優先）
-        for pushword in self.global_settings.pushwords:
-            if message.startswith(pushword):
-                tag = 'request_add'
-                break
-        
-        # リクエスト削除ワードチェック（2番目の優先度）
-        if not tag:
-            for pullword in self.global_settings.pullwords:
-                if pullword in message:
-                    tag = 'request_delete'
-                    break
+        # リクエスト追加ワード（最優先）、リクエスト削除ワード（2番目の優先度）
+        if push:
+            tag = push.kind
+        elif pull:
+            tag = pull.kind
         
         # プラットフォーム別（最後の優先度）
         if not tag:
@@ -101,7 +250,7 @@ class CommentHandler:
         )
         
         # 自動スクロール
-        if self.auto_scroll.get():
+        if scroll and self.auto_scroll.get():
             self.comment_tree.yview_moveto(1.0)
     
     def add_manager_from_comment(self):
@@ -127,16 +276,16 @@ class CommentHandler:
             }
             
             # 重複チェック
-            for manager in self.global_settings.managers:
-                if manager['platform'] == platform and manager['id'] == author_id:
-                    messagebox.showinfo(
-                        self.strings["messages"]["info"], 
-                        self.strings["messages"]["manager_exists"].format(author=author)
-                    )
-                    return
+            if self.user_registry.is_manager(platform, author_id):
+                messagebox.showinfo(
+                    self.strings["messages"]["info"], 
+                    self.strings["messages"]["manager_exists"].format(author=author)
+                )
+                return
             
             self.global_settings.managers.append(manager_entry)
-            self.global_settings.save()
+            self.user_registry.add_manager(manager_entry)
+            self.save_global_settings()
             messagebox.showinfo(
                 self.strings["messages"]["info"], 
                 self.strings["messages"]["manager_added"].format(author=author)
@@ -164,256 +313,29 @@ class CommentHandler:
             }
 
             # 重複チェック
-            for ng in self.global_settings.ng_users:
-                if ng['platform'] == platform and ng['id'] == author_id:
-                    messagebox.showinfo(
-                        self.strings["messages"]["info"], 
-                        self.strings["messages"]["ng_user_exists"].format(author=author)
-                    )
-                    return
+            if self.user_registry.is_ng_user(platform, author_id):
+                messagebox.showinfo(
+                    self.strings["messages"]["info"], 
+                    self.strings["messages"]["ng_user_exists"].format(author=author)
+                )
+                return
 
             self.global_settings.ng_users.append(ng_entry)
-            self.global_settings.save()
+            self.user_registry.add_ng_user(ng_entry)
+            self.save_global_settings()
+            # 表示済みのコメントもオーバーレイから消す
+            self.overlay_server.publish('comments', 'ng_user', {'user': self.overlay_user_key(platform, author_id)})
             messagebox.showinfo(
                 self.strings["messages"]["info"], 
                 self.strings["messages"]["ng_user_added"].format(author=author)
             )
     
-    def parse_request_numbers(self, text):
-        """リクエスト番号のテキストをパースして番号リストを返す
-        
-        例:
-            "1-3" → [1, 2, 3]
-            "1 3-4" → [1, 3, 4]
-            "1,2,3" → [1, 2, 3]
-            "1, 3-5, 7" → [1, 3, 4, 5, 7]
+    def process_request_commands(self, stream_id, comment_data, triggers=None):
+        """コメントからリクエスト追加/削除コマンドを処理
         
         Args:
-            text (str): 番号を含むテキスト
-            
-        Returns:
-            list[int]: 番号のリスト（重複なし、ソート済み）
+            stream_id (str): 配信ID
+            comment_data (dict): コメントデータ
+            triggers (tuple): trigger_matcher.match()の結果（Noneならここで判定）
         """
-        import re
-        
-        numbers = []
-        
-        # カンマとスペースで分割
-        parts = re.split(r'[,\s]+', text.strip())
-        
-        for part in parts:
-            if not part:
-                continue
-            
-            # 範囲指定（例: "1-3"）
-            if '-' in part:
-                try:
-                    start, end = part.split('-', 1)
-                    start_num = int(start.strip())
-                    end_num = int(end.strip())
-                    
-                    # 範囲を展開
-                    for num in range(start_num, end_num + 1):
-                        if num not in numbers:
-                            numbers.append(num)
-                except ValueError:
-                    logger.warning(f"Invalid range format: {part}")
-                    continue
-            else:
-                # 単一の数字
-                try:
-                    num = int(part.strip())
-                    if num not in numbers:
-                        numbers.append(num)
-                except ValueError:
-                    logger.warning(f"Invalid number format: {part}")
-                    continue
-        
-        # ソートして返す
-        return sorted(numbers)
-    
-    def process_request_commands(self, stream_id, comment_data):
-        """コメントからリクエスト追加/削除コマンドを処理"""
-        message = comment_data['message']
-        author = comment_data['author']
-        platform = comment_data['platform']
-        author_id = comment_data.get('author_id', '')
-        
-        # 常に出力されるINFOレベルのログ
-        logger.info(f"Processing command: '{message}' from {author}")
-        
-        logger.debug(f"DEBUG: process_request_commands called")
-        logger.debug(f"DEBUG:   message: {message}")
-        logger.debug(f"DEBUG:   author: {author} (id: {author_id})")
-        logger.debug(f"DEBUG:   platform: {platform}")
-        
-        # 管理者チェック（新形式）
-        is_manager = False
-        for manager in self.global_settings.managers:
-            if manager['platform'] == platform and manager['id'] == author_id:
-                is_manager = True
-                break
-        
-        logger.debug(f"DEBUG:   is_manager: {is_manager}")
-        logger.debug(f"DEBUG:   pushwords: {self.global_settings.pushwords}")
-        logger.debug(f"DEBUG:   pullwords: {self.global_settings.pullwords}")
-        logger.debug(f"DEBUG:   push_manager_only: {self.global_settings.push_manager_only}")
-        logger.debug(f"DEBUG:   pull_manager_only: {self.global_settings.pull_manager_only}")
-        
-        # プッシュワードチェック
-        for pushword in self.global_settings.pushwords:
-            if message.startswith(pushword):
-                logger.debug(f"DEBUG: Pushword matched: '{pushword}'")
-                logger.info(f"Pushword matched: '{pushword}'")
-                # 権限チェック
-                if self.global_settings.push_manager_only and not is_manager:
-                    logger.info(f"Request add denied: {author} is not a manager")
-                    continue
-                
-                # リクエスト内容を抽出
-                request_content = message[len(pushword):].strip()
-                if request_content:
-                    # 辞書形式でリクエストを追加
-                    request_data = {
-                        'content': request_content,
-                        'author': author,
-                        'platform': platform,
-                        'stream_id': stream_id
-                    }
-                    self.common_requests.append(request_data)
-                    
-                    # 配信タブのリクエスト処理数を更新
-                    settings = self.stream_manager.streams.get(stream_id)
-                    if settings and hasattr(settings, 'request_count_label'):
-                        settings.processed_requests += 1
-                        settings.request_count_label.config(text=str(settings.processed_requests))
-                    
-                    self.update_request_display()
-                    self.generate_xml()
-                    logger.info(f"Request added: {request_content} by {author}")
-                    
-                    # 自動保存
-                    self.save_requests()
-                break
-        
-        # プルワードチェック
-        for pullword in self.global_settings.pullwords:
-            logger.debug(f"DEBUG: Checking pullword: '{pullword}' in '{message}'")
-            if pullword in message:
-                logger.debug(f"DEBUG: Pullword matched: '{pullword}'")
-                logger.info(f"Pullword matched: '{pullword}' in message: '{message}'")
-                
-                # 権限チェック
-                if self.global_settings.pull_manager_only and not is_manager:
-                    logger.info(f"Request remove denied: {author} is not a manager")
-                    logger.debug(f"DEBUG: Permission denied, continuing to next pullword")
-                    continue
-                
-                logger.debug(f"DEBUG: Permission OK, processing removal")
-                logger.info(f"Permission OK, processing removal for: '{message}'")
-                
-                # プルワード以降の部分を取得
-                remaining_text = message.split(pullword, 1)[1].strip()
-                logger.debug(f"DEBUG: Remaining text after pullword: '{remaining_text}'")
-                logger.info(f"Remaining text after pullword: '{remaining_text}'")
-                
-                # 番号指定パターンをチェック
-                import re
-                
-                # パターン判定
-                if not remaining_text:
-                    # 番号なし → デフォルトで1番を削除
-                    logger.info(f"No number specified, defaulting to #1")
-                    numbers = [1]
-                    is_number_deletion = True
-                elif re.match(r'^[\d\s,\-]+$', remaining_text):
-                    # 数字のみ → 番号指定削除
-                    logger.info(f"Number-based deletion detected for: '{remaining_text}'")
-                    numbers = self.parse_request_numbers(remaining_text)
-                    is_number_deletion = True
-                else:
-                    # 文字を含む → 内容一致削除
-                    logger.info(f"Content-based deletion for: '{remaining_text}'")
-                    numbers = None
-                    is_number_deletion = False
-                
-                # 番号指定削除の処理
-                if is_number_deletion and numbers:
-                    logger.debug(f"DEBUG: Pattern matched as number-based deletion")
-                    logger.debug(f"DEBUG: Parsed numbers: {numbers}")
-                    logger.info(f"Parsed numbers: {numbers}")
-                    
-                    removed_count = 0
-                    removed_items = []
-                    
-                    logger.info(f"Current request count: {len(self.common_requests)}")
-                    
-                    # リクエストリストは1始まり
-                    for num in numbers:
-                        index = num - 1  # 0ベースのインデックスに変換
-                        if 0 <= index < len(self.common_requests):
-                            removed_item = self.common_requests[index]
-                            removed_items.append((index, removed_item))
-                    
-                    logger.debug(f"DEBUG: Items to remove: {len(removed_items)}")
-                    logger.info(f"Items to remove: {len(removed_items)}")
-                    
-                    # 逆順で削除（インデックスのズレを防ぐ）
-                    for index, item in sorted(removed_items, reverse=True):
-                        self.common_requests.pop(index)
-                        removed_count += 1
-                        logger.info(f"Request #{index+1} removed: {item['content']} by {author}")
-                    
-                    if removed_count > 0:
-                        # 配信タブのリクエスト処理数を更新
-                        settings = self.stream_manager.streams.get(stream_id)
-                        if settings and hasattr(settings, 'request_count_label'):
-                            settings.processed_requests += removed_count
-                            settings.request_count_label.config(text=str(settings.processed_requests))
-                        
-                        self.update_request_display()
-                        self.generate_xml()
-                        logger.info(f"Removed {removed_count} requests by numbers: {numbers}")
-                        
-                        # 自動保存
-                        self.save_requests()
-                    else:
-                        logger.info(f"No requests removed - numbers may be out of range")
-                
-                # 内容一致削除の処理
-                elif not is_number_deletion:
-                    logger.debug(f"DEBUG: Pattern matched as content-based deletion")
-                    # 従来の内容一致での削除
-                    request_content = remaining_text
-                    logger.debug(f"DEBUG: Looking for request with content: '{request_content}'")
-                    
-                    if request_content:
-                        # マッチするリクエストを削除
-                        found = False
-                        logger.info(f"Searching in {len(self.common_requests)} requests")
-                        for req in self.common_requests[:]:
-                            logger.debug(f"DEBUG: Comparing '{req['content']}' with '{request_content}'")
-                            if req['content'] == request_content:
-                                logger.debug(f"DEBUG: Match found, removing request")
-                                logger.info(f"Match found! Removing request: '{request_content}'")
-                                self.common_requests.remove(req)
-                                found = True
-                                
-                                # 配信タブのリクエスト処理数を更新
-                                settings = self.stream_manager.streams.get(stream_id)
-                                if settings and hasattr(settings, 'request_count_label'):
-                                    settings.processed_requests += 1
-                                    settings.request_count_label.config(text=str(settings.processed_requests))
-                                
-                                self.update_request_display()
-                                self.generate_xml()
-                                logger.info(f"Request removed: {request_content} by {author}")
-                                
-                                # 自動保存
-                                self.save_requests()
-                                break
-                        
-                        if not found:
-                            logger.debug(f"DEBUG: No matching request found for content: '{request_content}'")
-                            logger.info(f"No matching request found for content: '{request_content}'")
-                break
+        self.request_engine.process_comment(stream_id, comment_data, triggers)
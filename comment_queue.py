@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Comment Queue Module
+受信スレッドからTkメインループへコメントを受け渡すスレッドセーフなキュー
+"""
+
+import threading
+from collections import deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CommentQueue:
+    """受信スレッド → メインループ間のコメント受け渡しキュー
+
+    受信スレッドはput()で積むだけにして、メインループ側が一定間隔で
+    pop_batch()によりまとめて取り出す。コメント1件ごとにroot.after()を
+    発行しないため、レイドや絵文字連投でもTkのイベントキューが溢れない。
+
+    メインループが止まっている間もメモリを使い続けないよう、max_items件を
+    超えたら古いものから捨てる（捨てた件数は stats() の total_dropped）。
+    """
+
+    def __init__(self, max_items=None):
+        """
+        Args:
+            max_items (int): 溜めておく最大件数（Noneなら無制限）
+        """
+        self._items = deque(maxlen=max_items)
+        self._lock = threading.Lock()
+
+        # 診断用の統計情報
+        self.total_enqueued = 0
+        self.total_dropped = 0
+        self.total_processed = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.last_drain_ms = 0.0
+        self.max_drain_ms = 0.0
+
+    def put(self, stream_id, comment_data):
+        """コメントを積む（受信スレッドから呼ばれる。上限に達していたら一番古いものを捨てる）
+
+        Args:
+            stream_id (str): 配信ID
+            comment_data (dict): コメントデータ
+        """
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.total_dropped += 1
+            self._items.append((stream_id, comment_data))
+            self.total_enqueued += 1
+            depth = len(self._items)
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def pop_batch(self, max_items):
+        """先頭から最大max_items件を取り出す
+
+        Args:
+            max_items (int): 取り出す最大件数
+
+        Returns:
+            list[tuple]: (stream_id, comment_data) のリスト
+        """
+        with self._lock:
+            count = min(max_items, len(self._items))
+            return [self._items.popleft() for _ in range(count)]
+
+    def record_drain(self, count, elapsed_ms):
+        """1回の取り出し処理の結果を記録
+
+        Args:
+            count (int): 処理したコメント数
+            elapsed_ms (float): 処理時間（ミリ秒）
+        """
+        with self._lock:
+            self.total_processed += count
+            self.last_batch_size = count
+            self.last_drain_ms = elapsed_ms
+            if elapsed_ms > self.max_drain_ms:
+                self.max_drain_ms = elapsed_ms
+
+    def qsize(self):
+        """現在キューに溜まっている件数"""
+        return len(self._items)
+
+    def stats(self):
+        """診断用の統計情報を返す
+
+        Returns:
+            dict: キュー深さ、処理件数、処理時間など
+        """
+        with self._lock:
+            return {
+                'depth': len(self._items),
+                'max_depth': self.max_depth,
+                'total_enqueued': self.total_enqueued,
+                'total_dropped': self.total_dropped,
+                'total_processed': self.total_processed,
+                'last_batch_size': self.last_batch_size,
+                'last_drain_ms': self.last_drain_ms,
+                'max_drain_ms': self.max_drain_ms,
+            }
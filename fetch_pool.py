@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Fetch Pool Module
+配信タイトルなどの取得を、決まった数のワーカースレッドで実行する
+"""
+
+import threading
+import urllib.parse
+from concurrent.futures import Future, CancelledError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    """実行待ち・実行中の取得処理"""
+
+    __slots__ = ('key', 'host', 'fn', 'callback', 'future', 'cancelled')
+
+    def __init__(self, key, host, fn, callback):
+        self.key = key
+        self.host = host
+        self.fn = fn
+        self.callback = callback
+        self.future = Future()
+        self.cancelled = False
+
+
+class FetchPool:
+    """取得処理の実行プール
+
+    同時に実行する取得は最大 workers 件、同じホストへは最大 per_host 件まで。
+    残りは投入順に待たせるため、配信を大量に復元したり更新ボタンを連打したりしても
+    同じサイトへ一度に接続が殺到しない。
+
+    同じキー（配信ID）の取得が実行待ち・実行中の場合は新しく投入せず、
+    実行中のものの完了を待つ。配信が削除された場合は cancel() で取り消す。
+    """
+
+    def __init__(self, workers=8, per_host=4):
+        """
+        Args:
+            workers (int): ワーカースレッド数（同時に実行する取得の上限）
+            per_host (int): 同じホストへ同時に実行する取得の上限
+        """
+        self.workers = workers
+        self.per_host = per_host
+        self._cond = threading.Condition()
+        self._queue = []       # 実行待ちの_Job（投入順）
+        self._jobs = {}        # key -> 実行待ち・実行中の_Job
+        self._running = {}     # host -> 実行中の件数
+        self._threads = []
+        self._stopping = False
+        self._stats = {'submitted': 0, 'deduplicated': 0, 'cancelled': 0, 'completed': 0, 'errors': 0}
+
+    @staticmethod
+    def host_of(url):
+        """URLからホスト名を取り出す（www.は除く）"""
+        url = url.strip()
+        host = urllib.parse.urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def start(self):
+        """ワーカースレッドを起動（起動済みなら何もしない）"""
+        with self._cond:
+            self._stopping = False
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'fetch-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, key, url, fn, callback=None):
+        """取得処理を投入（どのスレッドからでも呼べる）
+
+        Args:
+            key (str): 重複をまとめるキー（配信ID）
+            url (str): 取得先（ホストごとの同時実行数の判定に使う）
+            fn (callable): ワーカースレッドで実行する関数（引数なし）
+            callback (callable): 成功時にワーカースレッドで呼ぶ関数 callback(結果)。
+                取り消された場合は呼ばない
+
+        Returns:
+            Future: 結果。同じキーの取得が実行待ち・実行中ならそのFuture
+                （この場合 fn と callback は使われない）
+        """
+        self.start()
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled:
+                self._stats['deduplicated'] += 1
+                return job.future
+            job = _Job(key, self.host_of(url), fn, callback)
+            self._jobs[key] = job
+            self._queue.append(job)
+            self._stats['submitted'] += 1
+            self._cond.notify()
+            return job.future
+
+    def cancel(self, key):
+        """取得を取り消す（実行中の場合は完了後に結果を捨てる）
+
+        Args:
+            key (str): submit() で指定したキー
+
+        Returns:
+            bool: 取り消す対象があったか
+        """
+        with self._cond:
+            job = self._jobs.pop(key, None)
+            if job is None:
+                return False
+            job.cancelled = True
+            self._stats['cancelled'] += 1
+            if job in self._queue:
+                self._queue.remove(job)
+                job.future.cancel()
+            return True
+
+    def shutdown(self, timeout=1.0):
+        """実行待ちの取得を取り消してワーカースレッドを停止
+
+        実行中の取得（ネットワーク待ち）は待たない。ワーカーはデーモンスレッドのため
+        終了の妨げにはならない。
+        """
+        with self._cond:
+            self._stopping = True
+            for job in self._queue:
+                job.cancelled = True
+                job.future.cancel()
+            self._queue.clear()
+            self._jobs.clear()
+            self._cond.notify_all()
+            threads = list(self._threads)
+            self._threads = []
+        for thread in threads:
+            thread.join(timeout / max(len(threads), 1))
+        logger.info(f"Fetch pool stats: {self.stats()}")
+
+    def stats(self):
+        """統計情報を返す
+
+        Returns:
+            dict: submitted, deduplicated, cancelled, completed, errors, queued, running
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._queue)
+            stats['running'] = sum(self._running.values())
+            return stats
+
+    def _next_job(self):
+        """ホストの同時実行数に空きがある最初のジョブを取り出す（_condを保持して呼ぶ）"""
+        for index, job in enumerate(self._queue):
+            if self._running.get(job.host, 0) < self.per_host:
+                del self._queue[index]
+                return job
+        return None
+
+    def _run(self):
+        """ワーカースレッド本体"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                self._running[job.host] = self._running.get(job.host, 0) + 1
+                job.future.set_running_or_notify_cancel()
+
+            try:
+                result = job.fn()
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+
+            with self._cond:
+                self._running[job.host] -= 1
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+                cancelled = job.cancelled
+                if not cancelled:
+                    self._stats['errors' if error else 'completed'] += 1
+                # 同じホストの待ちジョブが実行できるようになった
+                self._cond.notify_all()
+
+            if cancelled:
+                job.future.set_exception(CancelledError())
+            elif error is not None:
+                logger.warning(f"Fetch failed for {job.key}: {error}")
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+                if job.callback is not None:
+                    try:
+                        job.callback(result)
+                    except Exception as e:
+                        logger.error(f"Fetch callback failed for {job.key}: {e}")
+
+
+if __name__ == '__main__':
+    # 配信復元・更新の連打にかかる時間の計測（動作確認は tests/test_fetch_pool.py）
+    import time
+
+    FETCH_SECONDS = 0.2  # 1件の取得にかかる時間（模擬）
+    pool = FetchPool(workers=8, per_host=4)
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def fake_fetch(host):
+        def fetch():
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(FETCH_SECONDS)
+            with lock:
+                active[host] -= 1
+            return host
+        return fetch
+
+    # 配信の復元: YouTube 4件 + Twitch 4件（1件ずつ）
+    urls = [f'https://www.youtube.com/watch?v=v{n}' for n in range(4)] + [f'https://www.twitch.tv/user{n}' for n in range(4)]
+    start = time.perf_counter()
+    futures = [pool.submit(f's{n}', url, fake_fetch(pool.host_of(url))) for n, url in enumerate(urls)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    print(f"restore {len(urls)} streams: {elapsed * 1000:.0f} ms (one fetch = {FETCH_SECONDS * 1000:.0f} ms)")
+
+    # 更新の連打: 同じホストに20件投入しても同時実行は per_host 件まで
+    start = time.perf_counter()
+    futures = [pool.submit(f'y{n}', f'https://www.youtube.com/watch?v=x{n}', fake_fetch('youtube.com')) for n in range(20)]
+    for future in futures:
+        future.result()
+    print(f"20 fetches to one host: {(time.perf_counter() - start) * 1000:.0f} ms, peak concurrency {peak['youtube.com']}")
+
+    pool.shutdown()
+    print(pool.stats())
@@ -367,6 +367,11 @@ class GUIComponents:
         ttk.Button(req_button_frame, text=self.strings["request"]["move_down"], command=self.move_request_down).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(req_button_frame, text=self.strings["request"]["clear"], command=self.clear_all_requests).pack(side=tk.LEFT, padx=(0, 5))
         
+        # OBS接続状態（update_obs_statusで更新）
+        self.obs_status_label = ttk.Label(req_button_frame, text="-", foreground="gray")
+        self.obs_status_label.pack(side=tk.RIGHT)
+        self._obs_status_shown = None
+        
         # 共通コメント表示エリア
         comment_frame = ttk.LabelFrame(main_frame, text=self.strings["comment"]["title"])
         comment_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
@@ -612,9 +617,6 @@ class GUIComponents:
                 req['author'],
                 req['platform']
             ))
-        
-        # Ajax用のXMLファイルを生成
-        self.generate_todo_xml()
     
     def edit_stream_url(self):
         """選択された配信のURLを編集"""
@@ -749,7 +751,8 @@ class GUIComponents:
             self.root.update_idletasks()
             debug_print(f"DEBUG: GUI update_idletasks() completed")
             
-            # バックグラウンドでタイトルを取得（既存のfetch_title_asyncメソッドを使用）
+            # バックグラウンドでタイトルを取得（変更前のURLの取得が残っていれば取り消す）
+            self.fetch_pool.cancel(stream_id)
             self.fetch_title_async(stream_id)
             
             # メッセージ表示
@@ -1009,11 +1012,10 @@ class GUIComponents:
                 print(f"  series: {series}")
                 print(f"  today_content: {today_content}")
 
-                self.setup_obs()
-                if self.obs:
-                    self.obs.change_text('ythSeriesNum', series)
-                    self.obs.change_text('ythMainTitle', base_title)
-                    self.obs.change_text('ythTodayContent', today_content)
+                # まとめて1回のRequestBatchで送られる（未接続なら接続時に送られる）
+                self.obs_supervisor.change_text('ythSeriesNum', series)
+                self.obs_supervisor.change_text('ythMainTitle', base_title)
+                self.obs_supervisor.change_text('ythTodayContent', today_content)
             
             print(f"\n【生成されたツイート本文】")
             print(tweet_text)
@@ -1021,7 +1023,7 @@ class GUIComponents:
             
             # 告知テンプレートを保存
             self.global_settings.announcement_template = announcement_text
-            self.global_settings.save()
+            self.save_global_settings()
             
             # Twitter投稿画面を開く
             import urllib.parse
@@ -1094,6 +1096,18 @@ class GUIComponents:
         ttk.Checkbutton(other_settings_frame, text=self.strings["settings"]["keep_on_top"], 
                        variable=keep_top_var).pack(anchor=tk.W, padx=10, pady=5)
         
+        # オーバーレイ配信サーバ設定
+        overlay_server_frame = ttk.Frame(other_settings_frame)
+        overlay_server_frame.pack(fill=tk.X, padx=10, pady=5)
+        overlay_server_enabled_var = tk.BooleanVar(value=self.global_settings.overlay_server_enabled)
+        ttk.Checkbutton(overlay_server_frame, text=self.strings["settings"]["overlay_server"], 
+                       variable=overlay_server_enabled_var).pack(side=tk.LEFT)
+        ttk.Label(overlay_server_frame, text=self.strings["settings"]["port"]).pack(side=tk.LEFT, padx=(10, 0))
+        overlay_server_port_var = tk.StringVar(value=str(self.global_settings.overlay_server_port))
+        ttk.Entry(overlay_server_frame, textvariable=overlay_server_port_var, width=8).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(other_settings_frame, text=self.strings["settings"]["overlay_server_note"], 
+                 foreground="gray").pack(anchor=tk.W, padx=10, pady=(0, 5))
+        
         # デバッグ設定
         debug_settings_frame = ttk.LabelFrame(obs_frame, text=self.strings["settings"]["debug_settings"])
         debug_settings_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -1344,7 +1358,8 @@ class GUIComponents:
             selection = manager_listbox.curselection()
             if selection:
                 index = selection[0]
-                self.global_settings.managers.pop(index)
+                removed = self.global_settings.managers.pop(index)
+                self.user_registry.remove_manager(removed)
                 manager_listbox.delete(index)
         
         ttk.Button(manager_button_frame, text=self.strings["settings"]["delete_button"], command=remove_manager).pack(side=tk.LEFT, padx=(0, 5))
@@ -1381,7 +1396,8 @@ class GUIComponents:
             selection = ng_listbox.curselection()
             if selection:
                 index = selection[0]
-                self.global_settings.ng_users.pop(index)
+                removed = self.global_settings.ng_users.pop(index)
+                self.user_registry.remove_ng_user(removed)
                 ng_listbox.delete(index)
         
         ttk.Button(ng_button_frame, text=self.strings["settings"]["delete_button"], command=remove_ng_user).pack(side=tk.LEFT, padx=(0, 5))
@@ -1404,8 +1420,20 @@ class GUIComponents:
                     self.strings["messages"]["invalid_port"]
                 )
                 return
+            try:
+                overlay_server_port = int(overlay_server_port_var.get())
+                if not 1 <= overlay_server_port <= 65535:
+                    raise ValueError(overlay_server_port)
+            except ValueError:
+                messagebox.showerror(
+                    self.strings["messages"]["error"], 
+                    self.strings["messages"]["invalid_port"]
+                )
+                return
             self.global_settings.obs_passwd = obs_passwd_var.get()
             self.global_settings.keep_on_top = keep_top_var.get()
+            self.global_settings.overlay_server_enabled = overlay_server_enabled_var.get()
+            self.global_settings.overlay_server_port = overlay_server_port
             
             # デバッグ設定を保存
             old_debug_enabled = self.global_settings.debug_enabled
@@ -1425,7 +1453,13 @@ class GUIComponents:
             self.global_settings.push_manager_only = push_manager_var.get()
             self.global_settings.pull_manager_only = pull_manager_var.get()
             
-            self.global_settings.save()
+            self.save_global_settings()
+            
+            # プッシュワード/プルワードの変更をマッチャに反映
+            self.rebuild_trigger_matcher()
+            
+            # オーバーレイ配信サーバの有効/無効・ポートの変更を反映
+            self.start_overlay_server()
             
             # デバッグ設定が変更された場合の警告
             if old_debug_enabled != self.global_settings.debug_enabled:
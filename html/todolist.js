@@ -0,0 +1,168 @@
+// お題箱オーバーレイの描画（todolist.html / todolist_noframe.html 共通）
+//
+// 内蔵サーバから開かれた場合はServer-Sent Eventsで、ファイルとして開かれた場合は
+// todo_version.txt のポーリングで変更を受け取る。描画は行ごとの差分更新で、
+// 変わっていない行・セルには触らない（ブラウザソースの再レイアウトを最小限にする）。
+// 外部のライブラリやフォントには依存しない（オフラインでも動作する）。
+(function() {
+    // 表示する最大件数（ページ側で TODO_MAX_ITEMS を定義して変更できる。0なら全件）
+    var maxItems = window.TODO_MAX_ITEMS || 0;
+
+    var tbody = null;
+    var rowsByKey = {};  // 行のキー -> tr要素
+    var lastVersion = null;
+
+    // 表示する文字列
+    function itemTitle(item) {
+        if (item.platform == "manual") {
+            return item.title;
+        }
+        return item.title + " (" + item.name + "さん)";
+    }
+
+    function createRow() {
+        var row = document.createElement('tr');
+        var colors = ['#aaffaa', '#ffffff'];
+        for (var i = 0; i < colors.length; i++) {
+            var font = document.createElement('font');
+            font.setAttribute('color', colors[i]);
+            var cell = document.createElement('td');
+            cell.appendChild(font);
+            row.appendChild(cell);
+        }
+        return row;
+    }
+
+    // 内容が変わったときだけ書き換える
+    function setText(row, column, text) {
+        var font = row.cells[column].firstChild;
+        if (font.textContent !== text) {
+            font.textContent = text;
+        }
+    }
+
+    // リクエストリスト（{idx, title, name, platform}の配列）を表に反映
+    // リクエストにはIDがないため、表示内容と同じ内容の出現順をキーにして行を対応付ける
+    function render(items) {
+        if (maxItems) {
+            items = items.slice(0, maxItems);
+        }
+        var titles = [];
+        var keys = [];
+        var wanted = {};
+        var seen = {};
+        for (var i = 0; i < items.length; i++) {
+            var title = itemTitle(items[i]);
+            var base = title + '\u0000' + items[i].platform;
+            seen[base] = (seen[base] || 0) + 1;
+            titles.push(title);
+            keys.push(base + '\u0000' + seen[base]);
+            wanted[keys[i]] = true;
+        }
+        // 消えた行を先に削除する（削除予定の行がカーソルの位置に残っていると、
+        // 後続の行が全て移動の対象になるため）
+        for (var oldKey in rowsByKey) {
+            if (!wanted[oldKey]) {
+                tbody.removeChild(rowsByKey[oldKey]);
+                delete rowsByKey[oldKey];
+            }
+        }
+
+        var nextRows = {};
+        var cursor = tbody.firstChild;
+        for (var i = 0; i < items.length; i++) {
+            var key = keys[i];
+            var row = rowsByKey[key];
+            if (!row) {
+                row = createRow();
+                setText(row, 1, titles[i]);
+            }
+            setText(row, 0, String(items[i].idx));
+
+            // 順番が変わった行だけ移動する
+            if (row === cursor) {
+                cursor = cursor.nextSibling;
+            } else {
+                tbody.insertBefore(row, cursor);
+            }
+            nextRows[key] = row;
+        }
+        rowsByKey = nextRows;
+    }
+
+    // ローカルファイルでも読めるようにXMLHttpRequestを使う（fetchはfile://を読めない）
+    function get(url, onload, onerror) {
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', url + '?_=' + Date.now());
+        xhr.onload = function() {
+            if ((xhr.status === 200 || xhr.status === 0) && xhr.responseText) {
+                onload(xhr.responseText);
+            } else {
+                onerror();
+            }
+        };
+        xhr.onerror = onerror;
+        xhr.send();
+    }
+
+    function loadXml() {
+        get('../todo.xml', function(text) {
+            var xml = new DOMParser().parseFromString(text, 'application/xml');
+            if (xml.getElementsByTagName('parsererror').length) {
+                return;  // 書き込み途中などで読めなかった場合は次の変更を待つ
+            }
+            var items = [];
+            var elements = xml.getElementsByTagName('item');
+            for (var i = 0; i < elements.length; i++) {
+                var field = function(name) {
+                    var element = elements[i].getElementsByTagName(name)[0];
+                    return element ? element.textContent : '';
+                };
+                items.push({
+                    idx: Number(field('idx')),
+                    title: field('title'),
+                    name: field('name'),
+                    platform: field('platform')
+                });
+            }
+            render(items);
+        }, function() {
+            console.log('failed to load todo.xml');
+        });
+    }
+
+    // 版番号が変わったときだけXMLを取得して再描画する
+    function checkVersion() {
+        get('../todo_version.txt', function(version) {
+            version = version.trim();
+            if (version !== lastVersion) {
+                lastVersion = version;
+                loadXml();
+            }
+        }, function() {
+            // 版番号ファイルがない場合は従来どおり毎回XMLを取得
+            loadXml();
+        });
+    }
+
+    // アプリのオーバーレイ配信サーバから開かれた場合は、変更をServer-Sent Eventsで受け取る
+    // （変更時だけ即座に届くのでポーリング不要。切断時はブラウザが自動で再接続する）
+    function connectEvents() {
+        if (!window.EventSource || location.protocol.indexOf('http') !== 0) {
+            return false;
+        }
+        var source = new EventSource('/events/todo');
+        source.addEventListener('todo', function(e) {
+            render(JSON.parse(e.data).items);
+        });
+        return true;
+    }
+
+    window.addEventListener('DOMContentLoaded', function() {
+        tbody = document.querySelector('#todo tbody');
+        if (!connectEvents()) {
+            // ファイルとして開かれた場合はtodo.xmlをポーリング
+            setInterval(checkVersion, 500);
+        }
+    });
+})();
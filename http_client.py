@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP Client Module
+タイトル取得・Twitch API・アップデート確認で共有するHTTPセッション
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 全リクエスト共通のタイムアウト（接続, 読み込み）（秒）
+DEFAULT_TIMEOUT = (3.05, 5)
+
+# スクレイピング時のUser-Agent（ブロック回避）
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# ホストごとに保持する接続数（同時に取得する配信数の目安）
+POOL_MAXSIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _create_session():
+    """接続プールとリトライを設定したセッションを作成"""
+    # 接続失敗・一時的なエラー（429/5xx）のみ、間隔を空けて数回やり直す
+    # POSTは冪等とは限らないため、接続前の失敗以外はやり直さない（urllib3の既定）
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=1,
+        status=2,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # requestsの既定でAccept-Encoding: gzip, deflate が付き、応答は自動で展開される
+    return session
+
+
+def get_session():
+    """プロセス共通のセッションを返す（初回呼び出し時に作成）
+
+    同じホストへの2回目以降のリクエストは、保持している接続を再利用するため
+    TCP/TLSのハンドシェイクが発生しない。
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def request(method, url, **kwargs):
+    """共通セッションでリクエストを送信（timeoutを省略した場合はDEFAULT_TIMEOUT）
+
+    Returns:
+        requests.Response: レスポンス
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """共通セッションでGETリクエストを送信"""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """共通セッションでPOSTリクエストを送信"""
+    return request('POST', url, **kwargs)
+
+
+def close():
+    """保持している接続を閉じる（終了時に呼ぶ）"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -55,6 +55,14 @@ STRINGS = {
         "clear": "Clear",
     },
     
+    # OBS connection state
+    "obs_status": {
+        "connecting": "OBS: connecting...",
+        "connected": "OBS: connected",
+        "degraded": "OBS: not connected (retrying)",
+        "disconnected": "OBS: not connected",
+    },
+    
     # Comment management
     "comment": {
         "title": "Comment List (All Streams)",
@@ -163,6 +171,8 @@ STRINGS = {
         "password": "Password:",
         "other_settings": "Other Settings",
         "keep_on_top": "Keep window on top",
+        "overlay_server": "Enable overlay server",
+        "overlay_server_note": "Use http://127.0.0.1:<port>/html/todolist.html as a browser source for instant updates",
         "debug_settings": "Debug Settings",
         "debug_mode": "Enable debug mode (restart required)",
         "push_word": "Request Add Words (Common)",
@@ -55,6 +55,14 @@ STRINGS = {
         "clear": "クリア",
     },
     
+    # OBS接続状態
+    "obs_status": {
+        "connecting": "OBS: 接続中...",
+        "connected": "OBS: 接続済み",
+        "degraded": "OBS: 未接続（再接続待ち）",
+        "disconnected": "OBS: 未接続",
+    },
+    
     # コメント管理
     "comment": {
         "title": "コメント一覧（全配信）",
@@ -163,6 +171,8 @@ STRINGS = {
         "password": "パスワード:",
         "other_settings": "その他の設定",
         "keep_on_top": "ウィンドウを最前面に表示",
+        "overlay_server": "オーバーレイ配信サーバを有効にする",
+        "overlay_server_note": "ブラウザソースに http://127.0.0.1:<ポート>/html/todolist.html を指定すると即時更新されます",
         "debug_settings": "デバッグ設定",
         "debug_mode": "デバッグモードを有効にする（再起動が必要）",
         "push_word": "リクエスト追加ワード（全配信共通）",
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Metadata Cache Module
+配信のタイトル・概要欄をファイルに保存し、次回以降はすぐに表示できるようにする
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.parse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache:
+    """配信メタデータのキャッシュクラス
+
+    配信ごと（YouTubeは動画ID、Twitchはチャンネル名）にタイトル・概要欄・
+    抽出したbase_title/series・取得時刻と、条件付きリクエスト用の
+    ETag/Last-Modifiedを保持する。取得から ttl 秒以内のものは新しいとみなし、
+    それより古いものも表示には使う（裏で取り直す）。
+
+    ファイルへの書き込みは行わない。snapshot() の内容を呼び出し側で保存する。
+    """
+
+    FIELDS = ('title', 'description', 'base_title', 'series', 'etag', 'last_modified')
+
+    def __init__(self, cache_file='stream_metadata.json', ttl=300, max_entries=200):
+        """
+        Args:
+            cache_file (str): 保存先
+            ttl (float): 取得後、取り直さずに使う時間（秒）
+            max_entries (int): 保持する配信数の上限（古いものから捨てる）
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> {title, description, base_title, series, etag, last_modified, fetched_at}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(platform, url):
+        """キャッシュのキーを作成（同じ配信の別表記のURLは同じキーになる）
+
+        Args:
+            platform (str): 'youtube' or 'twitch'
+            url (str): 配信URL
+
+        Returns:
+            str: 'youtube:<動画ID>' / 'twitch:<チャンネル名>'（解釈できなければURLそのもの）
+        """
+        url = url.strip()
+        # スキームなしで入力されたURL（twitch.tv/xxx など）も同じキーにする
+        parsed = urllib.parse.urlparse(url if '://' in url else f'https://{url}')
+        if platform == 'youtube':
+            video_id = urllib.parse.parse_qs(parsed.query).get('v', [None])[0]
+            if not video_id:
+                # youtu.be/ID, youtube.com/live/ID, studio.youtube.com/video/ID/...
+                parts = [part for part in parsed.path.split('/') if part]
+                if parts and parts[0] in ('live', 'video') and len(parts) > 1:
+                    video_id = parts[1]
+                elif parsed.netloc.endswith('youtu.be') and parts:
+                    video_id = parts[0]
+            if video_id:
+                return f'youtube:{video_id}'
+        elif platform == 'twitch':
+            parts = [part for part in parsed.path.split('/') if part]
+            if parts:
+                return f'twitch:{parts[0].lower()}'
+        return url
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = {key: entry for key, entry in data.items()
+                             if isinstance(entry, dict) and 'fetched_at' in entry}
+            logger.debug(f"Stream metadata cache loaded: {len(self._entries)} entries")
+        except Exception as e:
+            logger.warning(f"Failed to load stream metadata cache: {e}")
+
+    def get(self, key):
+        """保存済みのメタデータを返す
+
+        Returns:
+            dict: メタデータのコピー（ない場合はNone）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry):
+        """取り直さずに使えるか（取得から ttl 秒以内か）"""
+        return entry is not None and time.time() - entry['fetched_at'] < self.ttl
+
+    def put(self, key, **fields):
+        """取得したメタデータを保存（取得時刻は現在時刻になる）
+
+        指定しなかった項目は以前の値を引き継ぐ。
+
+        Args:
+            key (str): make_key() で作成したキー
+            **fields: FIELDS のいずれか
+        """
+        with self._lock:
+            entry = dict(self._entries.pop(key, None) or {})
+            entry.update({name: value for name, value in fields.items() if name in self.FIELDS})
+            entry['fetched_at'] = time.time()
+            self._entries[key] = entry  # 末尾に移動（新しいものほど後ろ）
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def touch(self, key):
+        """変更がなかったこと（304 Not Modified）を記録して取得時刻だけを更新"""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]['fetched_at'] = time.time()
+
+    def snapshot(self):
+        """保存用に全体のコピーを返す"""
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._entries.items()}
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+OBS Supervisor Module
+OBSへの接続を別スレッドで維持し、切断時は自動で再接続する
+"""
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ObsSupervisor:
+    """OBS接続の監視クラス
+
+    接続の確立は監視スレッドで行うため、OBSが起動していなくても
+    アプリの起動や操作は待たされない。接続に失敗した場合や接続が切れた
+    場合は、間隔を倍々に延ばしながら（最大max_delay秒）再接続を試みる。
+
+    テキストソースへの書き込みはchange_text()で行う。ソースごとの最新の
+    テキストを覚えておき、再接続時にまとめて送り直すため、OBSを再起動しても
+    表示が元に戻る。
+    """
+
+    STATE_DISCONNECTED = 'disconnected'  # 停止中
+    STATE_CONNECTING = 'connecting'      # 接続試行中
+    STATE_CONNECTED = 'connected'        # 接続済み
+    STATE_DEGRADED = 'degraded'          # 接続失敗・切断（再接続待ち）
+
+    def __init__(self, factory, initial_delay=1.0, max_delay=30.0, check_interval=2.0):
+        """
+        Args:
+            factory (callable): 接続済みのOBSSocketを返す関数（失敗時は例外を送出）
+            initial_delay (float): 最初の再接続までの待ち時間（秒）
+            max_delay (float): 再接続までの待ち時間の上限（秒）
+            check_interval (float): 接続中に切断を確認する間隔（秒）
+        """
+        self.factory = factory
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.check_interval = check_interval
+        self.state = self.STATE_DISCONNECTED
+        self._obs = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reconnect_requested = False
+        self._thread = None
+        self._last_texts = {}  # source -> 最後に書き込んだテキスト
+
+    @property
+    def obs(self):
+        """接続中のOBSSocket（未接続ならNone）"""
+        return self._obs
+
+    def start(self):
+        """監視スレッドを起動（起動済みなら何もしない）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='obs-supervisor', daemon=True)
+        self._thread.start()
+
+    def reconnect(self):
+        """現在の接続を閉じてすぐに接続し直す（接続設定の変更時に呼ぶ）"""
+        self._reconnect_requested = True
+        self._wake.set()
+
+    def stop(self, timeout=2.0):
+        """監視スレッドを停止して接続を閉じる"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._disconnect()
+        self._set_state(self.STATE_DISCONNECTED)
+
+    def change_text(self, source, text):
+        """テキストソースの内容を変更（未接続なら接続時に送る）
+
+        Returns:
+            Future: 送信した場合はその完了、未接続ならNone
+        """
+        with self._lock:
+            self._last_texts[source] = text
+            obs = self._obs
+        if obs is None:
+            return None
+        return obs.change_text_async(source, text)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.info(f"OBS connection state: {self.state} -> {state}")
+            self.state = state
+
+    def _disconnect(self):
+        with self._lock:
+            obs = self._obs
+            self._obs = None
+        if obs is not None:
+            try:
+                obs.close()
+            except Exception as e:
+                logger.debug(f"Failed to close OBS connection: {e}")
+
+    def _run(self):
+        """監視スレッド本体"""
+        delay = self.initial_delay
+        while not self._stopping:
+            obs = self._obs
+            if self._reconnect_requested:
+                self._reconnect_requested = False
+                self._disconnect()
+                delay = self.initial_delay
+            elif obs is not None:
+                if obs.is_connected():
+                    self._wake.wait(self.check_interval)
+                    self._wake.clear()
+                    continue
+                logger.warning("OBS connection lost")
+                self._disconnect()
+                self._set_state(self.STATE_DEGRADED)
+
+            self._set_state(self.STATE_CONNECTING)
+            try:
+                obs = self.factory()
+            except Exception as e:
+                logger.debug(f"OBS connection failed (retry in {delay:.0f}s): {e}")
+                self._set_state(self.STATE_DEGRADED)
+                self._wake.wait(delay)
+                self._wake.clear()
+                delay = min(delay * 2, self.max_delay)
+                continue
+
+            if self._stopping or self._reconnect_requested:
+                obs.close()
+                continue
+            with self._lock:
+                self._obs = obs
+                # 切断中の変更を含め、各ソースの最新のテキストを送り直す（1回のRequestBatchになる）
+                # change_text() より古い内容が後から積まれないよう、ロックを保持したまま積む
+                # （change_text_asyncは送信キューに積むだけで待たない）
+                for source, text in self._last_texts.items():
+                    obs.change_text_async(source, text)
+                replayed = len(self._last_texts)
+            delay = self.initial_delay
+            self._set_state(self.STATE_CONNECTED)
+            if replayed:
+                logger.info(f"Replayed {replayed} text sources to OBS")
@@ -1,11 +1,17 @@
 #!/usr/bin/python3
 import obsws_python as obsws
+from obsws_python.error import OBSSDKError, OBSSDKRequestError
 #import base64
 import numpy as np
 from PIL import Image
 import traceback, os, io
 import logging, logging.handlers
 import base64
+import json
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 
 os.makedirs('log', exist_ok=True)
 logger = logging.getLogger(__name__)
@@ -22,7 +28,18 @@ hdl.setFormatter(hdl_formatter)
 logger.addHandler(hdl)
 
 class OBSSocket():
-    def __init__(self,hostIP,portNum,passWord,inf_source=None,dst_screenshot=None):
+    """obs-websocketの操作をまとめたクラス
+
+    submit()/change_text_async()は要求をキューに積んですぐに戻り、専用の
+    ワーカースレッドが送信する（呼び出し元はOBSの応答を待たない）。
+    同じkeyの要求が送信前に重なった場合は最後のものだけを送り、
+    溜まった要求は1回のRequestBatchでまとめて送る。
+    同期版のメソッドとワーカーはロックで送受信を直列化する。
+    """
+    # 1回のRequestBatchで送る最大件数
+    BATCH_MAX_REQUESTS = 50
+
+    def __init__(self,hostIP,portNum,passWord,inf_source=None,dst_screenshot=None,timeout=None):
         self.host = hostIP
         self.port = portNum
         self.passwd = passWord
@@ -33,22 +50,64 @@ class OBSSocket():
         self.ws = None
         self.ev = None
         self.active = False
+        self._ws_lock = threading.Lock()  # ReqClientの送受信を直列化
+        self._queue_cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> [requestType, requestData, [Future, ...]]
+        self._request_ids = itertools.count(1)
+        self._stopping = False
+        self._worker = None
+        self.stats = {'submitted': 0, 'superseded': 0, 'sent': 0, 'batches': 0, 'errors': 0,
+                      'scene_cache_hits': 0, 'scene_cache_loads': 0}
+        # シーンごとのアイテム構成のキャッシュ（OBSのイベントで無効化する）
+        # scene -> {'sources': get_sources()の戻り値, 'index': {sourceName: (シーン/グループ名, sceneItemId)}, 'groups': set}
+        self._scene_cache = {}
+        self._scene_cache_lock = threading.Lock()
         
         try:
-            self.ws = obsws.ReqClient(host=self.host,port=self.port,password=self.passwd)
+            self.ws = obsws.ReqClient(host=self.host,port=self.port,password=self.passwd,timeout=timeout)
+            self.ev = obsws.EventClient(host=self.host,port=self.port,password=self.passwd,timeout=timeout)
+            self.ev.callback.register([
+                self.on_exit_started,
+                self.on_scene_item_created,
+                self.on_scene_item_removed,
+                self.on_input_name_changed,
+                self.on_scene_name_changed,
+                self.on_scene_removed,
+                self.on_current_scene_collection_changing,
+                self.on_current_scene_collection_changed,
+            ])
+            self._worker = threading.Thread(target=self._run_worker, name='obs-worker', daemon=True)
+            self._worker.start()
             self.active = True
-            self.ev = obsws.EventClient(host=self.host,port=self.port,password=self.passwd)
-            self.ev.callback.register([self.on_exit_started,])
             logger.debug(f'OBS connected - host:{self.host}, port:{self.port}')
         except ConnectionRefusedError as e:
             logger.warning(f'OBS connection refused - OBS may not be running or WebSocket not enabled: {e}')
+            self._disconnect_clients()
             raise  # 例外を再発生させて、呼び出し元でキャッチできるようにする
         except Exception as e:
             logger.error(f'OBS connection failed: {e}')
             logger.debug(traceback.format_exc())
+            self._disconnect_clients()
             raise  # 例外を再発生させて、呼び出し元でキャッチできるようにする
 
-    def close(self):
+    def _disconnect_clients(self):
+        """接続の途中で失敗した場合に、接続済みのクライアントを閉じる
+
+        再接続のたびに失敗した分の接続が残らないようにする。
+        """
+        self._stop_worker(0)
+        for client in (self.ev, self.ws):
+            if client is None:
+                continue
+            try:
+                client.disconnect()
+            except Exception:
+                logger.debug(traceback.format_exc())
+        self.ws = None
+        self.ev = None
+
+    def close(self, timeout=1.0):
+        self._stop_worker(timeout)
         try:
             if self.ws:
                 del self.ws
@@ -60,11 +119,146 @@ class OBSSocket():
             logger.debug(traceback.format_exc())
             return False
 
+    def is_connected(self):
+        """接続が生きているか（OBSの終了や送信失敗、イベント受信スレッドの終了で偽になる）"""
+        if not self.active or not self.ws:
+            return False
+        worker = getattr(self.ev, 'worker', None)
+        return worker is None or worker.is_alive()
+
+    def submit(self, request_type, request_data=None, key=None):
+        """要求をワーカースレッドに渡す（すぐに戻る）
+
+        Args:
+            request_type (str): obs-websocketのrequestType
+            request_data (dict): requestData
+            key: 同じkeyの未送信の要求は置き換える（Noneなら置き換えない）
+
+        Returns:
+            Future: 応答のresponseData（なければNone）。失敗時は例外が設定される
+        """
+        future = Future()
+        with self._queue_cond:
+            if self._stopping or not self.ws:
+                future.set_result(None)
+                return future
+            self.stats['submitted'] += 1
+            if key is None:
+                key = object()
+            pending = self._pending.get(key)
+            if pending:
+                # 送信前の要求を最新の内容で置き換える（置き換えられた側のFutureにも同じ結果を返す）
+                pending[0:2] = [request_type, request_data]
+                pending[2].append(future)
+                self.stats['superseded'] += 1
+            else:
+                self._pending[key] = [request_type, request_data, [future]]
+                self._queue_cond.notify()
+        return future
+
+    def change_text_async(self, source, text):
+        """テキストソースの内容を非同期で変更（同じソースへの未送信の変更は最後のものだけ送る）
+
+        Returns:
+            Future: 完了を待つ場合に使う
+        """
+        return self.submit('SetInputSettings', {'inputName': source, 'inputSettings': {'text': text}, 'overlay': True},
+                           key=('text', source))
+
+    def _run_worker(self):
+        """溜まった要求をRequestBatchでまとめて送るワーカースレッド"""
+        while True:
+            with self._queue_cond:
+                while not self._pending and not self._stopping:
+                    self._queue_cond.wait()
+                if self._stopping:
+                    return
+                jobs = []
+                while self._pending and len(jobs) < self.BATCH_MAX_REQUESTS:
+                    jobs.append(self._pending.popitem(last=False)[1])
+            try:
+                results = self._send_batch([(request_type, request_data) for request_type, request_data, _ in jobs])
+            except Exception as e:
+                # 送受信自体の失敗は接続が切れたものとみなす
+                logger.debug(traceback.format_exc())
+                self.active = False
+                results = [e] * len(jobs)
+            for (request_type, _, futures), result in zip(jobs, results):
+                for future in futures:
+                    if future.cancelled():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def _send_batch(self, requests):
+        """RequestBatch(op 8)を送信して応答を待つ
+
+        Args:
+            requests (list[tuple]): (requestType, requestData) のリスト
+
+        Returns:
+            list: 要求ごとのresponseData、または失敗時の例外（要求と同じ件数）
+        """
+        request_id = str(next(self._request_ids))
+        payload = {
+            'op': 8,
+            'd': {
+                'requestId': request_id,
+                'haltOnFailure': False,
+                'requests': [{'requestType': request_type, 'requestData': request_data or {}}
+                             for request_type, request_data in requests],
+            },
+        }
+        base_client = self.ws.base_client
+        with self._ws_lock:
+            base_client.ws.send(json.dumps(payload))
+            while True:
+                # タイムアウトした以前の要求への遅れた応答などは読み捨てる
+                # （応答が来なければrecv()がタイムアウトの例外を送出する）
+                response = json.loads(base_client.ws.recv())
+                if response.get('op') == 9 and response.get('d', {}).get('requestId') == request_id:
+                    break
+                logger.debug(f"Discarded unexpected OBS message while waiting for batch {request_id}: "
+                             f"op={response.get('op')} requestId={response.get('d', {}).get('requestId')}")
+        self.stats['sent'] += len(requests)
+        self.stats['batches'] += 1
+        results = []
+        for result in response['d'].get('results', [])[:len(requests)]:
+            status = result['requestStatus']
+            if status['result']:
+                results.append(result.get('responseData'))
+            else:
+                self.stats['errors'] += 1
+                logger.debug(f"OBS request failed: {result['requestType']} {status}")
+                results.append(OBSSDKRequestError(result['requestType'], status['code'], status.get('comment')))
+        # 応答に結果が含まれなかった要求は失敗として返す（Futureが完了しないままにしない）
+        for request_type, _ in requests[len(results):]:
+            self.stats['errors'] += 1
+            results.append(OBSSDKError(f"No result for {request_type} in batch {request_id}"))
+        return results
+
+    def _stop_worker(self, timeout):
+        """ワーカースレッドを停止（未送信の要求は破棄）"""
+        with self._queue_cond:
+            self._stopping = True
+            for _, _, futures in self._pending.values():
+                for future in futures:
+                    future.cancel()
+            self._pending.clear()
+            self._queue_cond.notify()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+            logger.debug(f'OBS request worker stopped: {self.stats}')
+
     def change_scene(self,name:str):
         if not self.ws:
             return False
         try:
-            self.ws.set_current_program_scene(name)
+            with self._ws_lock:
+                self.ws.set_current_program_scene(name)
             return True
         except Exception:
             logger.debug(traceback.format_exc())
@@ -74,36 +268,79 @@ class OBSSocket():
         if not self.ws:
             return []
         try:
-            res = self.ws.get_scene_list()
+            with self._ws_lock:
+                res = self.ws.get_scene_list()
             ret = res.scenes
             return res.scenes
         except Exception:
             logger.debug(traceback.format_exc())
             return []
 
+    def _get_scene_graph(self, scene):
+        """シーンのアイテム構成を返す（キャッシュになければOBSから取得）
+
+        グループ内のアイテムも含める。取得に失敗した場合はNone（キャッシュしない）。
+        """
+        with self._scene_cache_lock:
+            graph = self._scene_cache.get(scene)
+            if graph is not None:
+                self.stats['scene_cache_hits'] += 1
+                return graph
+            try:
+                sources = []
+                index = {}
+                groups = set()
+                with self._ws_lock:
+                    allitem = self.ws.get_scene_item_list(scene).scene_items
+                for x in allitem:
+                    index[x['sourceName']] = (scene, x['sceneItemId'])
+                    if x['isGroup']:
+                        groups.add(x['sourceName'])
+                        with self._ws_lock:
+                            grp = self.ws.get_group_scene_item_list(x['sourceName']).scene_items
+                        for y in grp:
+                            sources.append(y['sourceName'])
+                            index[y['sourceName']] = (x['sourceName'], y['sceneItemId'])
+                    sources.append(x['sourceName'])
+            except Exception:
+                logger.debug(traceback.format_exc())
+                return None
+            sources.reverse()
+            graph = {'sources': sources, 'index': index, 'groups': groups}
+            self._scene_cache[scene] = graph
+            self.stats['scene_cache_loads'] += 1
+            return graph
+
+    def invalidate_scene_cache(self, scene=None):
+        """シーン構成のキャッシュを破棄
+
+        Args:
+            scene (str): 破棄するシーン（またはグループ）名。Noneなら全て
+        """
+        with self._scene_cache_lock:
+            if scene is None:
+                self._scene_cache.clear()
+                return
+            # グループが変わった場合は、そのグループを含むシーンも破棄する
+            for name in [name for name, graph in self._scene_cache.items()
+                         if name == scene or scene in graph['groups']]:
+                del self._scene_cache[name]
+
     def get_sources(self, scene):
         if not self.ws:
             return []
-        ret = []
-        try:
-            allitem = self.ws.get_scene_item_list(scene).scene_items
-            for x in allitem:
-                if x['isGroup']:
-                    grp = self.ws.get_group_scene_item_list(x['sourceName']).scene_items
-                    for y in grp:
-                        ret.append(y['sourceName'])
-                ret.append(x['sourceName'])
-        except Exception:
-            logger.debug(traceback.format_exc())
-        ret.reverse()
-        return ret
+        graph = self._get_scene_graph(scene)
+        if graph is None:
+            return []
+        return list(graph['sources'])
 
     def change_text(self, source, text):
         if not self.ws:
             return False
         try:
-            logger.debug(source, text)
-            res = self.ws.set_input_settings(source, {'text':text}, True)
+            logger.debug(f'change_text: {source}, {text}')
+            with self._ws_lock:
+                res = self.ws.set_input_settings(source, {'text':text}, True)
             return True
         except Exception:
             logger.debug(traceback.format_exc())
@@ -118,7 +355,8 @@ class OBSSocket():
             return False
         #logger.debug(f'dst:{self.dst_screenshot}')
         try:
-            res = self.ws.save_source_screenshot(self.inf_source, 'png', self.dst_screenshot, self.picw, self.pich, 100)
+            with self._ws_lock:
+                res = self.ws.save_source_screenshot(self.inf_source, 'png', self.dst_screenshot, self.picw, self.pich, 100)
             return res
         except Exception:
             logger.debug(traceback.format_exc())
@@ -128,7 +366,8 @@ class OBSSocket():
         if not self.ws:
             return False
         try:
-            res = self.ws.save_source_screenshot(self.inf_source, 'png', dst, self.picw, self.pich, 100)
+            with self._ws_lock:
+                res = self.ws.save_source_screenshot(self.inf_source, 'png', dst, self.picw, self.pich, 100)
             return res
         except Exception:
             logger.debug(traceback.format_exc())
@@ -139,7 +378,8 @@ class OBSSocket():
         if not self.ws:
             return None
         try:
-            b = self.ws.get_source_screenshot(self.inf_source, 'jpeg', self.picw, self.pich, 100).image_data
+            with self._ws_lock:
+                b = self.ws.get_source_screenshot(self.inf_source, 'jpeg', self.picw, self.pich, 100).image_data
             b = b.split(',')[1]
             c = base64.b64decode(b) # バイナリ形式のはず？
             tmp = io.BytesIO(c)
@@ -153,7 +393,8 @@ class OBSSocket():
         if not self.ws:
             return False
         try:
-            res = self.ws.set_scene_item_enabled(scenename, sourceid, enabled=True)
+            with self._ws_lock:
+                res = self.ws.set_scene_item_enabled(scenename, sourceid, enabled=True)
             return True
         except Exception as e:
             logger.debug(traceback.format_exc())
@@ -163,7 +404,8 @@ class OBSSocket():
         if not self.ws:
             return False
         try:
-            res = self.ws.set_scene_item_enabled(scenename, sourceid, enabled=False)
+            with self._ws_lock:
+                res = self.ws.set_scene_item_enabled(scenename, sourceid, enabled=False)
             return True
         except Exception as e:
             logger.debug(traceback.format_exc())
@@ -173,7 +415,8 @@ class OBSSocket():
         if not self.ws:
             return False
         try:
-            self.ws.press_input_properties_button(sourcename, 'refreshnocache')
+            with self._ws_lock:
+                self.ws.press_input_properties_button(sourcename, 'refreshnocache')
             return True
         except Exception:
             logger.debug(traceback.format_exc())
@@ -182,28 +425,42 @@ class OBSSocket():
     def on_exit_started(self, _):
         print("OBS closing!")
         self.active = False
+        self.invalidate_scene_cache()
         if self.ev:
             self.ev.unsubscribe()
 
     def search_itemid(self, scene, target):
         if not self.ws:
             return scene, None
-        ret = scene, None # グループ名, ID
-        try:
-            allitem = self.ws.get_scene_item_list(scene).scene_items
-            for x in allitem:
-                if x['sourceName'] == target:
-                    ret = scene, x['sceneItemId']
-                if x['isGroup']:
-                    grp = self.ws.get_group_scene_item_list(x['sourceName']).scene_items
-                    for y in grp:
-                        if y['sourceName'] == target:
-                            ret = x['sourceName'], y['sceneItemId']
-
-        except:
-            pass
-        return ret
-    
+        graph = self._get_scene_graph(scene)
+        if graph is None:
+            return scene, None
+        return graph['index'].get(target, (scene, None)) # グループ名, ID
+
+    # シーン構成が変わるイベントでキャッシュを破棄する（EventClientのスレッドで呼ばれる）
+    def on_scene_item_created(self, data):
+        self.invalidate_scene_cache(data.scene_name)
+
+    def on_scene_item_removed(self, data):
+        self.invalidate_scene_cache(data.scene_name)
+
+    def on_input_name_changed(self, data):
+        self.invalidate_scene_cache()
+
+    def on_scene_name_changed(self, data):
+        self.invalidate_scene_cache()
+
+    def on_scene_removed(self, data):
+        self.invalidate_scene_cache()
+
+    # obsws_pythonはメソッド名からイベント名を決める（CurrentSceneCollectionChanging/Changed）
+    # 切り替え中の要求が古いsceneItemIdを使わないよう、切り替えの開始時にも破棄する
+    def on_current_scene_collection_changing(self, data):
+        self.invalidate_scene_cache()
+
+    def on_current_scene_collection_changed(self, data):
+        self.invalidate_scene_cache()
+
     def get_scene_collection_list(self):
         """OBSに設定されたシーンコレクションの一覧をListで返す
 
@@ -213,7 +470,8 @@ class OBSSocket():
         if not self.ws:
             return []
         try:
-            return self.ws.get_scene_collection_list().scene_collections
+            with self._ws_lock:
+                return self.ws.get_scene_collection_list().scene_collections
         except Exception:
             logger.debug(traceback.format_exc())
             return []
@@ -230,7 +488,8 @@ class OBSSocket():
         if not self.ws:
             return False
         try:
-            self.ws.set_current_scene_collection(scene_collection)
+            with self._ws_lock:
+                self.ws.set_current_scene_collection(scene_collection)
             return True
         except Exception:
             logger.debug(traceback.format_exc())
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Overlay Server Module
+オーバーレイ（ブラウザソース）をlocalhostで配信し、更新をServer-Sent Eventsで通知するサーバ
+"""
+
+import json
+import os
+import posixpath
+import socket
+import threading
+from collections import deque
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Subscriber:
+    """1接続ぶんの送信待ちキュー
+
+    キューが溢れた場合は古いものから捨てる（遅いクライアントが
+    メモリを食い潰したり、他のクライアントを待たせたりしないように）。
+    """
+
+    def __init__(self, max_queue):
+        self._cond = threading.Condition()
+        self._queue = deque(maxlen=max_queue)
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, chunk):
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(chunk)
+            self._cond.notify()
+
+    def get_all(self):
+        """送信待ちをすべて取り出す（届くまで待つ）
+
+        Returns:
+            list[bytes]: 送信するデータ。閉じられた場合はNone
+        """
+        with self._cond:
+            while not self._queue and not self.closed:
+                self._cond.wait()
+            if self.closed:
+                return None
+            chunks = list(self._queue)
+            self._queue.clear()
+            return chunks
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class _OverlayRequestHandler(SimpleHTTPRequestHandler):
+    """静的ファイル（html/ と Ajax用ファイル）と /events/<topic> を返すハンドラ"""
+
+    # アプリのフォルダには設定ファイル等もあるため、公開するのはこれだけ
+    PUBLIC_PREFIXES = ('/html/',)
+    PUBLIC_FILES = ('/todo.xml', '/todo_version.txt')
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path.startswith('/events/'):
+            self.send_events(path[len('/events/'):])
+        elif path == '/':
+            self.send_response(302)
+            self.send_header('Location', '/html/')
+            self.end_headers()
+        elif self.is_public(path):
+            super().do_GET()
+        else:
+            self.send_error(404)
+
+    def do_HEAD(self):
+        if self.is_public(urlsplit(self.path).path):
+            super().do_HEAD()
+        else:
+            self.send_error(404)
+
+    def is_public(self, path):
+        path = posixpath.normpath(unquote(path))
+        return path.startswith(self.PUBLIC_PREFIXES) or path in self.PUBLIC_FILES
+
+    def end_headers(self):
+        # ブラウザソースが古いファイルを表示し続けないように
+        self.send_header('Cache-Control', 'no-cache')
+        super().end_headers()
+
+    def send_events(self, topic):
+        """Server-Sent Eventsでトピックの更新を送り続ける（切断まで戻らない）"""
+        overlay = self.server.overlay
+        subscriber = overlay.subscribe(topic)
+        if subscriber is None:
+            self.send_error(404)
+            return
+        try:
+            # 小さな書き込みをNagleで遅らせない
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+            self.wfile.write(f'retry: {overlay.RETRY_MS}\n\n'.encode('ascii'))
+            while True:
+                chunks = subscriber.get_all()
+                if chunks is None:
+                    break
+                self.wfile.write(b''.join(chunks))
+        except (BrokenPipeError, ConnectionError, OSError) as e:
+            logger.debug(f"Overlay client disconnected ({topic}): {e}")
+        finally:
+            overlay.unsubscribe(topic, subscriber)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"Overlay server: {self.address_string()} {format % args}")
+
+
+class _OverlayHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # WindowsのSO_REUSEADDRは使用中のポートにも重ねてbindできてしまう
+    allow_reuse_address = os.name != 'nt'
+
+
+class OverlayServer:
+    """オーバーレイ配信用のlocalhost HTTPサーバ
+
+    html/ 以下のページを配信し、/events/<topic> に接続したブラウザソースへ
+    publish()された更新をServer-Sent Eventsで即座に送る。更新がなければ
+    何も送らないため、ポーリングと違い待機中の通信やファイル読み込みは発生しない。
+
+    トピックごとに直近retain件のイベントを保持し、新しく接続（再接続）した
+    クライアントには最初にそれを送る。publish()はどのスレッドからでも呼べ、
+    サーバが起動していなくてもエラーにならない（保持だけ行う）。
+    """
+
+    RETRY_MS = 1000  # 切断時にブラウザが再接続するまでの時間
+
+    def __init__(self, root_dir='.', host='127.0.0.1', port=8765):
+        """
+        Args:
+            root_dir (str): 配信するファイルのあるフォルダ（html/ の親）
+            host (str): 待ち受けアドレス
+            port (int): 待ち受けポート
+        """
+        self.root_dir = root_dir
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._topics = {}  # name -> {'retain': deque, 'max_queue': int, 'subscribers': set}
+        self._stats = {}
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """サーバのURL"""
+        return f'http://{self.host}:{self.port}'
+
+    def is_running(self):
+        """サーバスレッドが動作中か"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_topic(self, name, retain=1, max_queue=256):
+        """トピックを登録
+
+        Args:
+            name (str): トピック名（/events/<name> で購読できる）
+            retain (int): 新しいクライアントに最初に送る直近のイベント数
+            max_queue (int): 1クライアントあたりの送信待ちの上限（超えたら古いものを捨てる）
+        """
+        with self._lock:
+            self._topics[name] = {
+                'retain': deque(maxlen=retain) if retain else None,
+                'max_queue': max_queue,
+                'subscribers': set(),
+            }
+            self._stats[name] = {'published': 0, 'connections': 0, 'dropped': 0}
+
+    def start(self):
+        """サーバスレッドを起動
+
+        Returns:
+            bool: 起動できたか（ポート使用中などで失敗した場合はFalse）
+        """
+        if self.is_running():
+            return True
+        handler = partial(_OverlayRequestHandler, directory=self.root_dir)
+        try:
+            self._httpd = _OverlayHTTPServer((self.host, self.port), handler)
+        except (OSError, OverflowError) as e:
+            # OverflowError: 範囲外のポート番号（設定ファイルを直接編集した場合など）
+            logger.error(f"Failed to start overlay server on {self.url}: {e}")
+            self._httpd = None
+            return False
+        self._httpd.overlay = self
+        self.port = self._httpd.server_address[1]  # port=0の場合は割り当てられた番号
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='overlay-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Overlay server started: {self.url}/html/")
+        return True
+
+    def stop(self, timeout=2.0):
+        """サーバを停止し、接続中のクライアントを切断"""
+        if self._httpd is None:
+            return
+        with self._lock:
+            for topic in self._topics.values():
+                for subscriber in topic['subscribers']:
+                    subscriber.close()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._httpd = None
+        self._thread = None
+        logger.info(f"Overlay server stopped: {self.stats()}")
+
+    def publish(self, topic, event, data):
+        """トピックの購読者にイベントを送る（どのスレッドからでも呼べる）
+
+        Args:
+            topic (str): トピック名
+            event (str): イベント名（ブラウザ側のaddEventListenerで受け取る名前）
+            data: JSONにできるデータ
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        chunk = f'event: {event}\ndata: {payload}\n\n'.encode('utf-8')
+        with self._lock:
+            entry = self._topics.get(topic)
+            if entry is None:
+                logger.warning(f"Unknown overlay topic: {topic}")
+                return
+            if entry['retain'] is not None:
+                entry['retain'].append(chunk)
+            for subscriber in entry['subscribers']:
+                subscriber.put(chunk)
+            self._stats[topic]['published'] += 1
+
+    def subscribe(self, topic):
+        """購読を開始（ハンドラスレッドから呼ばれる）
+
+        Returns:
+            _Subscriber: 未登録のトピックならNone
+        """
+        with self._lock:
+            entry = self._topics.get(topic)
+            if entry is None:
+                return None
+            subscriber = _Subscriber(entry['max_queue'])
+            for chunk in entry['retain'] or ():
+                subscriber.put(chunk)
+            entry['subscribers'].add(subscriber)
+            self._stats[topic]['connections'] += 1
+        logger.debug(f"Overlay client connected: {topic}")
+        return subscriber
+
+    def unsubscribe(self, topic, subscriber):
+        """購読を終了（ハンドラスレッドから呼ばれる）"""
+        with self._lock:
+            entry = self._topics.get(topic)
+            if entry is not None:
+                entry['subscribers'].discard(subscriber)
+                self._stats[topic]['dropped'] += subscriber.dropped
+
+    def stats(self):
+        """トピックごとの統計情報を返す
+
+        Returns:
+            dict: name -> published, connections, subscribers, dropped
+        """
+        with self._lock:
+            return {name: dict(stats, subscribers=len(self._topics[name]['subscribers']))
+                    for name, stats in self._stats.items()}
+
+
+if __name__ == '__main__':
+    # 更新がブラウザに届くまでの遅延の計測（イベントの本文に送信時刻を入れる）
+    # 動作確認は tests/test_overlay_server.py
+    import time
+
+    server = OverlayServer(port=0)
+    server.add_topic('bench')
+    server.start()
+
+    sock = socket.create_connection((server.host, server.port))
+    sock.sendall(b'GET /events/bench HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    reader = sock.makefile('rb')
+    while reader.readline().strip():
+        pass  # レスポンスヘッダ
+    reader.readline()  # retry:
+    reader.readline()
+
+    latencies = []
+    for i in range(200):
+        server.publish('bench', 'bench', {'sent': time.perf_counter(), 'items': [f'曲{n}' for n in range(50)]})
+        reader.readline()  # event:
+        data = json.loads(reader.readline()[len(b'data: '):])
+        reader.readline()
+        latencies.append((time.perf_counter() - data['sent']) * 1000)
+        time.sleep(0.005)
+    sock.close()
+    latencies.sort()
+    print(f"publish -> client: median {latencies[len(latencies) // 2]:.2f} ms, max {latencies[-1]:.2f} ms")
+
+    # コメントが殺到し、クライアントが受信しない場合の1回あたりの送信時間
+    server.add_topic('flood', retain=10, max_queue=64)
+    subscriber = server.subscribe('flood')
+    comments = [{'author': f'user{n}', 'message': 'w' * 50, 'platform': 'twitch'} for n in range(50)]
+    start = time.perf_counter()
+    for i in range(3000):
+        server.publish('flood', 'comments', {'comments': comments})
+    flood_us = (time.perf_counter() - start) / 3000 * 1e6
+    queued = subscriber.get_all()
+    server.unsubscribe('flood', subscriber)
+    print(f"flood: {flood_us:.1f} us/publish (50 comments), {len(queued)} queued, {subscriber.dropped} dropped")
+    server.stop()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Persistence Module
+設定ファイル等の保存をまとめてバックグラウンドスレッドで行うサービス
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_text(path, text, fsync=True):
+    """テキストを一時ファイルに書いてから置き換える
+
+    読み手（ブラウザソース等）が書きかけのファイルを読むことがない。
+
+    Args:
+        path (str): 保存先
+        text (str): 書き込む内容
+        fsync (bool): 置き換え前にディスクへ書き出すか
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path, data, indent=2):
+    """JSONを一時ファイルに書いてfsyncしてから置き換える
+
+    書き込み途中で落ちても元のファイルは壊れない。
+
+    Args:
+        path (str): 保存先
+        data: JSONにできるデータ
+        indent (int): インデント
+    """
+    atomic_write_text(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+class PersistenceService:
+    """保存要求を短時間まとめてから、専用スレッドでアトミックに書き込むクラス
+
+    save()はデータを預けるだけですぐに戻る。同じ名前の保存要求が
+    delay秒以内に重なった場合は最後のデータだけを1回書き込む。
+    預けるデータは呼び出し側でコピーしておくこと（書き込みスレッドが
+    JSONに変換するまでの間に変更されないようにするため）。
+    """
+
+    def __init__(self, delay=0.5):
+        """
+        Args:
+            delay (float): 最初の保存要求から書き込みまでの待ち時間（秒）
+        """
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._pending = {}  # name -> [path, data, after_write, due]
+        self._writing = 0
+        self._stats = {}
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        """書き込みスレッドを起動（起動済みなら何もしない）"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='persistence', daemon=True)
+            self._thread.start()
+
+    def save(self, name, path, data, after_write=None):
+        """保存を要求（どのスレッドからでも呼べる）
+
+        Args:
+            name (str): 保存対象の名前（同じ名前の要求はまとめられる）
+            path (str): 保存先
+            data: JSONにできるデータ（コピー済みのもの）
+            after_write (callable): 書き込み完了後に書き込みスレッドで呼ぶ関数 after_write(data)
+        """
+        self.start()
+        with self._cond:
+            stats = self._stats_for(name)
+            stats['requested'] += 1
+            pending = self._pending.get(name)
+            if pending:
+                # 書き込み前の要求を最新のデータで置き換える（書き込み時刻は据え置き）
+                pending[0:3] = [path, data, after_write]
+                stats['coalesced'] += 1
+            else:
+                self._pending[name] = [path, data, after_write, time.monotonic() + self.delay]
+                self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """保留中の保存をすぐに書き込み、完了まで待つ
+
+        Args:
+            timeout (float): 最大待機時間（秒）
+
+        Returns:
+            bool: すべて書き込めたか
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            now = time.monotonic()
+            for pending in self._pending.values():
+                pending[3] = now
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None or not self._thread.is_alive():
+                    logger.warning(f"Persistence flush incomplete: {list(self._pending)}")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=5.0):
+        """保留中の保存を書き込んでからスレッドを停止"""
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info(f"Persistence stats: {self.stats()}")
+
+    def stats(self):
+        """保存対象ごとの統計情報を返す
+
+        Returns:
+            dict: name -> requested, writes, coalesced, errors, last_ms, max_ms
+        """
+        with self._cond:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _stats_for(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = {'requested': 0, 'writes': 0, 'coalesced': 0, 'errors': 0, 'last_ms': 0.0, 'max_ms': 0.0}
+            self._stats[name] = stats
+        return stats
+
+    def _run(self):
+        """書き込みスレッド本体"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping and not self._pending:
+                        return
+                    now = time.monotonic()
+                    due = [name for name, pending in self._pending.items() if pending[3] <= now]
+                    if due:
+                        break
+                    timeout = min((pending[3] for pending in self._pending.values()), default=now + 60) - now
+                    self._cond.wait(max(timeout, 0))
+                jobs = [(name, self._pending.pop(name)) for name in due]
+                self._writing += 1
+
+            try:
+                for name, (path, data, after_write, _) in jobs:
+                    start = time.perf_counter()
+                    try:
+                        atomic_write_json(path, data)
+                        if after_write:
+                            after_write(data)
+                        error = False
+                    except Exception as e:
+                        logger.error(f"Failed to save {name} to {path}: {e}")
+                        error = True
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    with self._cond:
+                        stats = self._stats_for(name)
+                        if error:
+                            stats['errors'] += 1
+                        else:
+                            stats['writes'] += 1
+                        stats['last_ms'] = elapsed_ms
+                        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+                    logger.debug(f"Saved {name} to {path} in {elapsed_ms:.1f} ms")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
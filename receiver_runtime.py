@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Receiver Runtime Module
+全配信のコメント受信を1つのasyncioイベントループ上で実行するランタイム
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiverRuntime:
+    """コメント受信用のasyncioイベントループを専用スレッドで動かすクラス
+
+    配信ごとにOSスレッドを立てる代わりに、各Receiverをこのループ上の
+    タスクとして実行する。ソケットの待ち受けはループが一括で行うため、
+    配信数が増えてもスレッド数は増えない。
+    pytchatのように同期APIしか持たない処理はrun_blocking()で
+    少数のワーカースレッドに逃がす。
+    """
+
+    def __init__(self, max_blocking_workers=4):
+        """
+        Args:
+            max_blocking_workers (int): 同期処理用ワーカースレッドの最大数
+        """
+        self.max_blocking_workers = max_blocking_workers
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """イベントループ（未起動ならNone）"""
+        return self._loop
+
+    def is_running(self):
+        """ループスレッドが動作中か"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ループスレッドを起動（起動済みなら何もしない）"""
+        with self._lock:
+            if self.is_running():
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_blocking_workers,
+                thread_name_prefix='receiver-blocking'
+            )
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(self._loop)
+                self._loop.call_soon(ready.set)
+                try:
+                    self._loop.run_forever()
+                finally:
+                    try:
+                        self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+                    except Exception:
+                        pass
+                    self._loop.close()
+                    logger.info("Receiver runtime loop closed")
+
+            self._thread = threading.Thread(target=run_loop, name='receiver-runtime', daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info("Receiver runtime started")
+
+    def spawn(self, coro):
+        """コルーチンをループ上のタスクとして実行（どのスレッドからでも呼べる）
+
+        Args:
+            coro: 実行するコルーチン
+
+        Returns:
+            concurrent.futures.Future: cancel()でタスクをキャンセルできる
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def call_soon(self, callback, *args):
+        """ループスレッド上でcallbackを実行（どのスレッドからでも呼べる）"""
+        if self._loop and self.is_running():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    async def run_blocking(self, func, *args):
+        """同期関数をワーカースレッドで実行して結果を待つ（ループ上から呼ぶ）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self, timeout=2.0):
+        """残っているタスクをキャンセルしてループを停止
+
+        Args:
+            timeout (float): タスク終了を待つ最大時間（秒）
+        """
+        with self._lock:
+            if not self.is_running():
+                return
+
+            async def cancel_all():
+                current = asyncio.current_task()
+                tasks = [t for t in asyncio.all_tasks() if t is not current]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_all(), self._loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Receiver runtime tasks did not finish cleanly: {e}")
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._thread = None
+            logger.info("Receiver runtime stopped")
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Request Engine Module
+リクエストリストとリクエスト追加/削除コマンドの処理（tkinterに依存しない）
+"""
+
+from collections import namedtuple
+import re
+import logging
+
+from trigger_matcher import TriggerMatcher
+
+logger = logging.getLogger(__name__)
+
+
+# リクエストリストの変更通知
+RequestEvent = namedtuple('RequestEvent', [
+    'kind',       # 'add', 'remove', 'move', 'clear', 'load'
+    'stream_id',  # コメントのコマンドによる変更なら配信ID（GUI操作ならNone）
+    'count',      # 追加・削除・移動したリクエスト数
+    'record',     # 操作内容（RequestJournalに記録する辞書、loadではNone）
+])
+
+# 番号指定のトークン（カンマ・空白区切り）
+_NUMBER_TOKEN = re.compile(r'[^,\s]+')
+# これより長いトークンは不正として扱う（巨大な数字列のint変換を避ける）
+_NUMBER_TOKEN_MAX_LENGTH = 32
+# 削除コマンドの残りテキストが番号指定かどうか
+_NUMBER_SPEC = re.compile(r'^[\d\s,\-]+$')
+# 番号指定で受け付ける最大トークン数の既定値（"1 3-5 7"なら3トークン）
+DEFAULT_REQUEST_NUMBER_MAX_TOKENS = 32
+
+
+def parse_request_numbers(text, limit, max_tokens=DEFAULT_REQUEST_NUMBER_MAX_TOKENS):
+    """番号指定のテキストを1〜limitの範囲の番号リストに変換
+
+    範囲指定は区間のまま扱い、limitで切り詰めてから併合・展開するため、
+    "1-100000000"のような指定でも処理量はlimitと受け付けるトークン数で抑えられる。
+
+    例:
+        "1-3" → [1, 2, 3]
+        "1 3-4" → [1, 3, 4]
+        "1,2,3" → [1, 2, 3]
+        "1, 3-5, 7" → [1, 3, 4, 5, 7]
+
+    Args:
+        text (str): 番号を含むテキスト（例: "1, 3-5, 7"）
+        limit (int): 番号の上限（現在のリクエスト数）
+        max_tokens (int): 受け付ける最大トークン数（超過分は無視）
+
+    Returns:
+        list[int]: 番号のリスト（重複なし、ソート済み）
+    """
+    intervals = []
+    for count, match in enumerate(_NUMBER_TOKEN.finditer(text)):
+        if count >= max_tokens:
+            logger.warning(f"Too many number tokens, ignoring after {max_tokens}")
+            break
+
+        part = match.group()
+        if len(part) > _NUMBER_TOKEN_MAX_LENGTH:
+            logger.warning(f"Invalid number format: {part[:_NUMBER_TOKEN_MAX_LENGTH]}...")
+            continue
+
+        try:
+            if '-' in part:
+                # 範囲指定（例: "1-3"）
+                start, end = part.split('-', 1)
+                start_num = int(start.strip())
+                end_num = int(end.strip())
+            else:
+                # 単一の数字
+                start_num = end_num = int(part)
+        except ValueError:
+            logger.warning(f"Invalid number format: {part}")
+            continue
+
+        # 1〜limitに切り詰める
+        start_num = max(start_num, 1)
+        end_num = min(end_num, limit)
+        if start_num <= end_num:
+            intervals.append((start_num, end_num))
+
+    # 区間を併合してから展開（展開後の件数は最大でlimit）
+    intervals.sort()
+    numbers = []
+    last = 0
+    for start_num, end_num in intervals:
+        if end_num <= last:
+            continue
+        numbers.extend(range(max(start_num, last + 1), end_num + 1))
+        last = end_num
+    return numbers
+
+
+class RequestEngine:
+    """リクエストリストを保持し、コメントのコマンドを処理するクラス
+
+    GUI・OBS・ファイル出力はsubscribe()で変更通知を受け取って更新する。
+    tkinterに依存しないため、ディスプレイのない環境でも実際の処理を
+    そのまま負荷試験できる。
+    """
+
+    def __init__(self, global_settings, user_registry):
+        """
+        Args:
+            global_settings: pushwords, pullwords, push_manager_only,
+                pull_manager_only, request_number_max_tokens を持つ設定オブジェクト
+            user_registry (UserRegistry): 管理者判定に使う索引
+        """
+        self.global_settings = global_settings
+        self.user_registry = user_registry
+        self.requests = []  # {'content', 'author', 'platform', 'stream_id'} のリスト
+        self._listeners = []
+        self.rebuild_trigger_matcher()
+
+    def rebuild_trigger_matcher(self):
+        """プッシュワード/プルワードの設定からマッチャを作り直す（設定保存時に呼ぶ）"""
+        self.trigger_matcher = TriggerMatcher(self.global_settings.pushwords, self.global_settings.pullwords)
+
+    def subscribe(self, listener):
+        """変更通知を受け取る関数を登録
+
+        Args:
+            listener (callable): listener(event) で呼ばれる。eventはRequestEvent
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, kind, stream_id=None, count=1, record=None):
+        event = RequestEvent(kind, stream_id, count, record)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Error in request listener for {kind}: {e}")
+
+    # --- リクエストリストの操作 ---
+
+    def load(self, requests):
+        """リクエストリストを丸ごと置き換える（ファイルからの読み込み時）"""
+        self.requests[:] = requests
+        self._emit('load', count=len(self.requests))
+
+    def add(self, content, author, platform, stream_id='', source_stream_id=None):
+        """リクエストを末尾に追加
+
+        Args:
+            content (str): リクエスト内容
+            author (str): リクエストしたユーザー名
+            platform (str): 'youtube' / 'twitch' / 'manual'
+            stream_id (str): リクエストに記録する配信ID
+            source_stream_id (str): コメントのコマンドによる追加なら配信ID
+        """
+        request_data = {
+            'content': content,
+            'author': author,
+            'platform': platform,
+            'stream_id': stream_id
+        }
+        self.requests.append(request_data)
+        self._emit('add', source_stream_id, record={'op': 'add', 'request': request_data})
+
+    def remove_at(self, index, source_stream_id=None):
+        """指定位置（0始まり）のリクエストを削除
+
+        Returns:
+            dict: 削除したリクエスト（範囲外ならNone）
+        """
+        if not 0 <= index < len(self.requests):
+            return None
+        removed = self.requests.pop(index)
+        self._emit('remove', source_stream_id, record={'op': 'remove', 'indexes': [index]})
+        return removed
+
+    def remove_numbers(self, numbers, source_stream_id=None):
+        """番号（1始まり）で指定したリクエストをまとめて削除
+
+        Args:
+            numbers (list[int]): 番号のリスト
+
+        Returns:
+            list[tuple]: 削除した (index, リクエスト) のリスト
+        """
+        indexes = sorted({num - 1 for num in numbers if 0 < num <= len(self.requests)}, reverse=True)
+        # 逆順で削除（インデックスのズレを防ぐ）
+        removed = [(index, self.requests.pop(index)) for index in indexes]
+        if removed:
+            self._emit('remove', source_stream_id, len(removed), {'op': 'remove', 'indexes': indexes})
+        return removed
+
+    def remove_content(self, content, source_stream_id=None):
+        """内容が一致する最初のリクエストを削除
+
+        Returns:
+            bool: 削除したかどうか
+        """
+        for index, req in enumerate(self.requests):
+            if req['content'] == content:
+                self.requests.pop(index)
+                self._emit('remove', source_stream_id, record={'op': 'remove', 'indexes': [index]})
+                return True
+        return False
+
+    def move(self, index, offset):
+        """リクエストを隣と入れ替えて移動
+
+        Args:
+            index (int): 移動するリクエストの位置（0始まり）
+            offset (int): -1で上へ、1で下へ
+
+        Returns:
+            bool: 移動したかどうか
+        """
+        new_index = index + offset
+        if not (0 <= index < len(self.requests) and 0 <= new_index < len(self.requests)):
+            return False
+        self.requests[index], self.requests[new_index] = self.requests[new_index], self.requests[index]
+        self._emit('move', record={'op': 'move', 'index': index, 'to': new_index})
+        return True
+
+    def clear(self):
+        """全リクエストを削除"""
+        count = len(self.requests)
+        self.requests.clear()
+        self._emit('clear', count=count, record={'op': 'clear'})
+
+    # --- コメントのコマンド処理 ---
+
+    def parse_request_numbers(self, text):
+        """番号指定のテキストを現在のリクエスト数で切り詰めた番号リストに変換"""
+        return parse_request_numbers(text, len(self.requests), self.global_settings.request_number_max_tokens)
+
+    def process_comment(self, stream_id, comment_data, triggers=None):
+        """コメントからリクエスト追加/削除コマンドを処理
+
+        Args:
+            stream_id (str): 配信ID
+            comment_data (dict): コメントデータ
+            triggers (tuple): trigger_matcher.match()の結果（Noneならここで判定）
+        """
+        message = comment_data['message']
+        if triggers is None:
+            triggers = self.trigger_matcher.match(message)
+        push, pull = triggers
+        if not push and not pull:
+            return
+
+        author = comment_data['author']
+        platform = comment_data['platform']
+        author_id = comment_data.get('author_id', '')
+
+        logger.info(f"Processing command: '{message}' from {author}")
+
+        # 管理者チェック
+        is_manager = self.user_registry.is_manager(platform, author_id)
+        logger.debug(f"DEBUG:   author: {author} (id: {author_id}), platform: {platform}, is_manager: {is_manager}")
+
+        # プッシュワードチェック
+        if push:
+            logger.info(f"Pushword matched: '{push.word}'")
+            # 権限チェック
+            if self.global_settings.push_manager_only and not is_manager:
+                logger.info(f"Request add denied: {author} is not a manager")
+            elif push.remaining:
+                self.add(push.remaining, author, platform, stream_id, source_stream_id=stream_id)
+                logger.info(f"Request added: {push.remaining} by {author}")
+
+        # プルワードチェック
+        if pull:
+            logger.info(f"Pullword matched: '{pull.word}' in message: '{message}'")
+            # 権限チェック
+            if self.global_settings.pull_manager_only and not is_manager:
+                logger.info(f"Request remove denied: {author} is not a manager")
+            else:
+                self._process_removal(stream_id, author, pull.remaining)
+
+    def _process_removal(self, stream_id, author, remaining_text):
+        """プルワード以降のテキストに従ってリクエストを削除"""
+        logger.info(f"Remaining text after pullword: '{remaining_text}'")
+
+        if not remaining_text:
+            # 番号なし → デフォルトで1番を削除
+            logger.info(f"No number specified, defaulting to #1")
+            numbers = [1]
+        elif _NUMBER_SPEC.match(remaining_text):
+            # 数字のみ → 番号指定削除
+            numbers = self.parse_request_numbers(remaining_text)
+            logger.info(f"Parsed numbers: {numbers}")
+        else:
+            # 文字を含む → 内容一致削除
+            logger.info(f"Content-based deletion for: '{remaining_text}'")
+            if self.remove_content(remaining_text, source_stream_id=stream_id):
+                logger.info(f"Request removed: {remaining_text} by {author}")
+            else:
+                logger.info(f"No matching request found for content: '{remaining_text}'")
+            return
+
+        removed = self.remove_numbers(numbers, source_stream_id=stream_id)
+        for index, item in reversed(removed):
+            logger.info(f"Request #{index+1} removed: {item['content']} by {author}")
+        if not removed:
+            logger.info(f"No requests removed - numbers may be out of range")
+
+
+def benchmark(num_comments=1000000, seed=0):
+    """実際のコマンド処理に合成コメントを流して1コメントあたりの処理時間を計測
+
+    Args:
+        num_comments (int): 流すコメント数
+        seed (int): 合成コメントの乱数シード（同じ値なら同じコメント列）
+
+    Returns:
+        dict: comments, events, requests_left, total_s, per_comment_us
+    """
+    import random
+    import time
+    from types import SimpleNamespace
+
+    from user_registry import UserRegistry
+
+    settings = SimpleNamespace(
+        pushwords=['お題 ', 'お題　', 'リク ', 'リク　'],
+        pullwords=['リクあり', '消化済'],
+        push_manager_only=False,
+        pull_manager_only=True,
+        request_number_max_tokens=DEFAULT_REQUEST_NUMBER_MAX_TOKENS,
+    )
+    registry = UserRegistry([{'platform': 'youtube', 'id': 'UCmanager', 'name': 'manager'}], [])
+    engine = RequestEngine(settings, registry)
+    events = []
+    engine.subscribe(events.append)
+
+    rng = random.Random(seed)
+    templates = [
+        ('UCviewer', 'こんにちは！今日も楽しみにしてました'),
+        ('UCviewer', '草'),
+        ('UCviewer', 'お題 {n}番の曲をお願いします'),
+        ('UCmanager', '消化済'),
+        ('UCmanager', '消化済 1-3'),
+        ('UCviewer', '消化済 1-100000000'),
+    ]
+    weights = [60, 25, 10, 3, 1, 1]
+    comments = []
+    for n in range(num_comments):
+        author_id, message = rng.choices(templates, weights)[0]
+        comments.append({
+            'platform': 'youtube',
+            'author': author_id,
+            'author_id': author_id,
+            'message': message.format(n=n),
+        })
+
+    start = time.perf_counter()
+    for comment in comments:
+        engine.process_comment('youtube_1', comment)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'comments': num_comments,
+        'events': len(events),
+        'requests_left': len(engine.requests),
+        'total_s': elapsed,
+        'per_comment_us': elapsed / num_comments * 1e6,
+    }
+
+
+def main(argv=None):
+    """コマンド処理のベンチマークを実行（CIから呼ぶ）
+
+    例:
+        python request_engine.py --comments 1000000 --output bench/request_engine.jsonl --max-us 20
+
+    Returns:
+        int: 終了コード（--max-us を超えた場合は1）
+    """
+    import argparse
+    import datetime
+    import json
+    import os
+    import platform
+
+    parser = argparse.ArgumentParser(description='RequestEngine のコマンド処理ベンチマーク')
+    parser.add_argument('--comments', type=int, default=1000000, help='流す合成コメント数')
+    parser.add_argument('--seed', type=int, default=0, help='合成コメントの乱数シード')
+    parser.add_argument('--output', help='結果を1行のJSONとして追記するファイル（推移の記録用）')
+    parser.add_argument('--max-us', type=float, help='1コメントあたりの処理時間の上限（マイクロ秒）。超えたら失敗')
+    parser.add_argument('--numbers', action='store_true', help='parse_request_numbers 単体の計測も表示')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.numbers:
+        import timeit
+        for text in ("1, 3-5, 7", "1-100000000", "1-100000000 " * 10000):
+            for limit in (10, 1000):
+                loops = 200
+                sec = timeit.timeit(lambda: parse_request_numbers(text, limit), number=loops) / loops
+                print(f"len(text)={len(text):7d} limit={limit:5d}: {sec * 1e6:9.1f} us")
+
+    result = benchmark(args.comments, args.seed)
+    print(f"comments: {result['comments']:,}, events: {result['events']:,}, requests left: {result['requests_left']:,}")
+    print(f"total: {result['total_s']:.2f} s, per comment: {result['per_comment_us']:.2f} us")
+
+    if args.output:
+        record = dict(result,
+                      timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                      python=platform.python_version(),
+                      commit=os.environ.get('GITHUB_SHA', ''))
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    if args.max_us is not None and result['per_comment_us'] > args.max_us:
+        print(f"FAIL: {result['per_comment_us']:.2f} us/comment exceeds the limit of {args.max_us:.2f} us")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Request Journal Module
+リクエストリストの変更を追記型のログに記録し、定期的にスナップショットへ圧縮する
+"""
+
+import glob
+import json
+import os
+import logging
+
+from persistence import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class RequestJournal:
+    """requests.json（スナップショット）と requests.log（操作ログ）による永続化
+
+    変更のたびにリスト全体を書き直す代わりに、操作（add/remove/move/clear）を
+    1行1レコードのJSONとしてログに追記する。ログがcompact_every件に達したら
+    スナップショットを書き直す。
+
+    圧縮時はまずrotate()でログを requests.log.<seq> に退避し、以降の追記は
+    新しいログに行う。スナップショットの書き込み（別スレッドでもよい）が
+    終わったらremove_segments()で取り込み済みの退避ログを消す。
+
+    各レコードには連番(seq)を付け、スナップショットにも取り込み済みの連番を
+    記録する。どの時点で落ちても、取り込み済みのレコードは読み込み時に
+    読み飛ばされる。書き込み途中で落ちた場合に失われるのは最後の1レコードのみ。
+
+    追記のたびにfsyncするため、アプリだけでなくOSが落ちた場合（電源断など）も
+    記録済みのレコードは残る。fsync=False にするとアプリの異常終了にしか耐えない。
+    """
+
+    def __init__(self, snapshot_file='requests.json', log_file='requests.log', compact_every=500, fsync=True):
+        """
+        Args:
+            snapshot_file (str): スナップショットのファイル名
+            log_file (str): 操作ログのファイル名
+            compact_every (int): この件数ごとにスナップショットへ圧縮する
+            fsync (bool): 追記のたびにディスクへ書き出すか
+        """
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.seq = 0  # 最後に記録したレコードの連番
+        self.pending = 0  # スナップショット以降にログへ追記した件数
+        self._log = None
+
+    def load(self):
+        """スナップショットを読み込み、操作ログを再生する
+
+        Returns:
+            list[dict]: リクエストリスト
+        """
+        requests = []
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                requests = data.get('requests', [])
+                snapshot_seq = data.get('seq', 0)
+            else:
+                requests = data  # 旧形式（リストのみ）
+
+        self.seq = snapshot_seq
+        self.pending = 0
+        replayed = 0
+        # 退避ログ（古い順）→現在のログの順に再生する
+        log_files = [path for _, path in self._segments()]
+        if os.path.exists(self.log_file):
+            log_files.append(self.log_file)
+        for log_file in log_files:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 書き込み途中で終了した最後のレコード
+                        logger.warning(f"Ignoring broken journal record at {log_file}:{line_no}")
+                        break
+                    seq = record.get('seq', 0)
+                    if seq <= self.seq:
+                        continue  # スナップショットに取り込み済み
+                    self.apply(requests, record)
+                    self.seq = seq
+                    self.pending += 1
+                    replayed += 1
+
+        logger.info(f"Request journal loaded: {len(requests)} items ({replayed} records replayed)")
+        return requests
+
+    @staticmethod
+    def apply(requests, record):
+        """1レコードをリクエストリストに適用（範囲外の指定は無視）"""
+        op = record.get('op')
+        if op == 'add':
+            requests.append(record['request'])
+        elif op == 'remove':
+            for index in record.get('indexes', []):
+                if 0 <= index < len(requests):
+                    requests.pop(index)
+        elif op == 'move':
+            index = record.get('index', -1)
+            to = record.get('to', -1)
+            if 0 <= index < len(requests) and 0 <= to < len(requests):
+                requests[index], requests[to] = requests[to], requests[index]
+        elif op == 'clear':
+            requests.clear()
+        else:
+            logger.warning(f"Unknown journal op: {op}")
+
+    def append(self, record):
+        """操作レコードをログに追記
+
+        Args:
+            record (dict): 'op'と操作内容を持つ辞書（seqはここで付与する）
+
+        Returns:
+            bool: compact_every件に達し、圧縮が必要になったか
+        """
+        self.seq += 1
+        record = dict(record, seq=self.seq)
+        if self._log is None:
+            self._log = open(self.log_file, 'a', encoding='utf-8')
+        self._log.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self.pending += 1
+        return self.pending >= self.compact_every
+
+    def _segments(self):
+        """退避ログの一覧を返す
+
+        Returns:
+            list[tuple]: (seq, パス) のリスト（seqの昇順）
+        """
+        segments = []
+        for path in glob.glob(glob.escape(self.log_file) + '.*'):
+            suffix = path[len(self.log_file) + 1:]
+            if suffix.isdigit():
+                segments.append((int(suffix), path))
+        return sorted(segments)
+
+    def rotate(self):
+        """現在のログを退避し、以降の追記を新しいログに切り替える
+
+        Returns:
+            int: 退避した時点の連番（スナップショットに記録する値）
+        """
+        self.close()
+        if os.path.exists(self.log_file) and os.path.getsize(self.log_file) > 0:
+            os.replace(self.log_file, f"{self.log_file}.{self.seq}")
+        self.pending = 0
+        return self.seq
+
+    def remove_segments(self, upto_seq):
+        """スナップショットに取り込み済みの退避ログを削除
+
+        Args:
+            upto_seq (int): スナップショットに記録した連番
+        """
+        for seq, path in self._segments():
+            if seq <= upto_seq:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove journal segment {path}: {e}")
+
+    def write_snapshot(self, data):
+        """スナップショットを書き込み、取り込み済みの退避ログを削除（別スレッドから呼んでもよい）
+
+        Args:
+            data (dict): {'seq': 連番, 'requests': リクエストリスト}
+        """
+        atomic_write_json(self.snapshot_file, data)
+        self.remove_segments(data['seq'])
+
+    def compact(self, requests):
+        """現在のリストをその場でスナップショットに書き出す
+
+        Args:
+            requests (list[dict]): 現在のリクエストリスト
+        """
+        seq = self.rotate()
+        self.write_snapshot({'seq': seq, 'requests': list(requests)})
+        logger.info(f"Request journal compacted: {len(requests)} items")
+
+    def close(self):
+        """操作ログのファイルを閉じる"""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+if __name__ == '__main__':
+    # 全体書き直しとの書き込み時間の比較（動作確認は tests/test_request_journal.py）
+    import shutil
+    import tempfile
+    import time
+
+    workdir = tempfile.mkdtemp()
+    try:
+        snapshot = os.path.join(workdir, 'requests.json')
+        log = os.path.join(workdir, 'requests.log')
+
+        # 1000件のリストに対する変更1回あたりの書き込み時間
+        requests = [{'content': f'曲{i}', 'author': 'user', 'platform': 'youtube', 'stream_id': 'youtube_1'} for i in range(1000)]
+        loops = 200
+        start = time.perf_counter()
+        for _ in range(loops):
+            with open(snapshot, 'w', encoding='utf-8') as f:
+                json.dump(requests, f, indent=2, ensure_ascii=False)
+        rewrite_ms = (time.perf_counter() - start) / loops * 1000
+
+        append_ms = {}
+        for fsync in (True, False):
+            journal = RequestJournal(snapshot, log, compact_every=10 ** 9, fsync=fsync)
+            journal.compact(requests)
+            start = time.perf_counter()
+            for i in range(loops):
+                journal.append({'op': 'add', 'request': requests[i]})
+            append_ms[fsync] = (time.perf_counter() - start) / loops * 1000
+            journal.close()
+        print(f"1000 requests: full rewrite {rewrite_ms:.3f} ms/change, "
+              f"journal append {append_ms[True]:.3f} ms/change (without fsync {append_ms[False]:.3f} ms)")
+    finally:
+        shutil.rmtree(workdir)
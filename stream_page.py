@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Stream Page Module
+配信ページ（YouTubeの視聴ページ・Twitchのチャンネルページ）からタイトルと概要欄を取り出す
+
+ページ全体をダウンロードしてDOMを組み立てる代わりに、レスポンスを少しずつ読み、
+必要な部分（YouTubeは ytInitialPlayerResponse のJSON、それ以外は<head>）が
+揃った時点で読み込みを打ち切る。
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# レスポンスを読み込む単位（バイト）
+CHUNK_SIZE = 64 * 1024
+
+# これ以上は読まない（目的の部分が見つからないページでの上限）（バイト）
+MAX_PAGE_BYTES = 4 * 1024 * 1024
+
+# YouTubeの視聴ページに埋め込まれている動画情報のJSONの開始位置
+# 例: var ytInitialPlayerResponse = {...};  /  window["ytInitialPlayerResponse"] = {...};
+_PLAYER_RESPONSE_RE = re.compile(rb'ytInitialPlayerResponse"?\]?\s*=\s*(?={)')
+
+# JSON内の "</" は "\u003c/" とエスケープされているため、スクリプトの終わりはここで判定できる
+_SCRIPT_END = b'</script>'
+_HEAD_END = b'</head>'
+
+
+class _MetaParser(HTMLParser):
+    """<meta>と<title>だけを集めるパーサ"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}  # property/name -> content（最初に出てきたもの）
+        self.title = None
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('property') or attrs.get('name')
+            if key and attrs.get('content') is not None:
+                self.meta.setdefault(key, attrs['content'])
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+            self.title = ''
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+
+def parse_meta(html):
+    """HTMLから<meta>タグと<title>を取り出す
+
+    Args:
+        html (str): HTML（先頭部分のみでもよい）
+
+    Returns:
+        tuple: ({property/name: content}, titleタグの文字列またはNone)
+    """
+    parser = _MetaParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"Failed to parse meta tags: {e}")
+    return parser.meta, parser.title
+
+
+def find_player_response(data):
+    """ytInitialPlayerResponse のJSONを取り出す
+
+    Args:
+        data (bytes): ページのHTML（先頭から読めた分）
+
+    Returns:
+        dict: 動画情報（見つからない・途中までしか読めていない場合はNone）
+    """
+    match = _PLAYER_RESPONSE_RE.search(data)
+    if not match:
+        return None
+    start = match.end()
+    end = data.find(_SCRIPT_END, start)
+    if end < 0:
+        return None
+    try:
+        text = data[start:end].decode('utf-8', errors='replace')
+        player_response, _ = json.JSONDecoder().raw_decode(text)
+        return player_response
+    except ValueError as e:
+        logger.debug(f"Failed to decode ytInitialPlayerResponse: {e}")
+        return None
+
+
+def player_response_loaded():
+    """read_page() 用: ytInitialPlayerResponse のスクリプトが最後まで読めたかを判定する関数を返す
+
+    前回までに調べた位置を覚えておき、新しく届いた部分だけを探す。
+    """
+    state = {'searched': 0, 'start': None}
+
+    def is_complete(buffer):
+        if state['start'] is None:
+            # 区切りをまたいだ一致も見つかるよう、少し手前から探す
+            match = _PLAYER_RESPONSE_RE.search(buffer, max(0, state['searched'] - 64))
+            state['searched'] = len(buffer)
+            if not match:
+                return False
+            state['start'] = match.end()
+            state['searched'] = state['start']
+        found = buffer.find(_SCRIPT_END, max(state['start'], state['searched'] - len(_SCRIPT_END)))
+        state['searched'] = len(buffer)
+        return found >= 0
+
+    return is_complete
+
+
+def read_page(response, is_complete):
+    """レスポンスを先頭から読み、is_complete(読めた分) が真になった時点で打ち切る
+
+    Args:
+        response (requests.Response): stream=True で取得したレスポンス
+        is_complete (callable): 読めたバイト列を受け取り、十分ならTrueを返す関数
+
+    Returns:
+        bytes: 読めた分のHTML
+    """
+    buffer = bytearray()
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if not chunk:
+            continue
+        buffer += chunk
+        if is_complete(buffer) or len(buffer) >= MAX_PAGE_BYTES:
+            break
+    return bytes(buffer)
+
+
+def parse_youtube_page(data):
+    """YouTubeの視聴ページからタイトルと概要欄を取り出す
+
+    Args:
+        data (bytes): ページのHTML（先頭から読めた分）
+
+    Returns:
+        dict: {'title': str, 'description': str}（取れなかった項目は空文字列）
+    """
+    info = {'title': '', 'description': ''}
+    player_response = find_player_response(data)
+    if player_response:
+        details = player_response.get('videoDetails') or {}
+        info['title'] = details.get('title') or ''
+        info['description'] = details.get('shortDescription') or ''
+        if not info['title']:
+            microformat = (player_response.get('microformat') or {}).get('playerMicroformatRenderer') or {}
+            info['title'] = (microformat.get('title') or {}).get('simpleText') or ''
+
+    if not info['title']:
+        # JSONが見つからない場合（仕様変更など）はメタタグ・titleタグから取得
+        meta, title = parse_meta(data.decode('utf-8', errors='replace'))
+        if meta.get('og:title'):
+            info['title'] = meta['og:title']
+        elif title:
+            # タイトルに " - YouTube" が付いているので削除
+            info['title'] = title.replace(' - YouTube', '').strip()
+        if not info['description']:
+            info['description'] = meta.get('og:description') or meta.get('description') or ''
+    return info
+
+
+def parse_head_page(data):
+    """<head>のメタタグからタイトルと説明を取り出す（Twitchなど）
+
+    Args:
+        data (bytes): ページのHTML（先頭から読めた分）
+
+    Returns:
+        dict: {'title': str, 'description': str}（取れなかった項目は空文字列）
+    """
+    head_end = data.find(_HEAD_END)
+    if head_end >= 0:
+        data = data[:head_end]
+    meta, title = parse_meta(data.decode('utf-8', errors='replace'))
+    return {
+        'title': meta.get('og:title') or meta.get('og:description') or (title or '').strip(),
+        'description': meta.get('og:description') or meta.get('description') or '',
+    }
+
+
+def fetch_page_info(platform, url, etag=None, last_modified=None):
+    """配信ページを取得してタイトルと概要欄を返す
+
+    必要な部分が読めた時点で接続を閉じるため、ページの残りはダウンロードしない。
+    前回の応答のETag/Last-Modifiedを渡すと条件付きリクエストになり、
+    サーバが対応していて内容が変わっていなければ本文を受け取らずに済む。
+
+    Args:
+        platform (str): 'youtube' or 'twitch'
+        url (str): 配信URL
+        etag (str): 前回の応答のETag
+        last_modified (str): 前回の応答のLast-Modified
+
+    Returns:
+        dict: {'title', 'description', 'etag', 'last_modified'}、
+              変更がなかった（304 Not Modified）場合はNone
+
+    Raises:
+        requests.RequestException: 取得に失敗した場合
+    """
+    # ページの解析だけならrequestsなしで使えるよう、取得時に読み込む
+    import http_client
+
+    headers = {'User-Agent': http_client.BROWSER_USER_AGENT}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    with http_client.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        if platform == 'youtube':
+            info = parse_youtube_page(read_page(response, player_response_loaded()))
+        else:
+            info = parse_head_page(read_page(response, lambda buffer: _HEAD_END in buffer))
+        info['etag'] = response.headers.get('ETag')
+        info['last_modified'] = response.headers.get('Last-Modified')
+        return info
+
+
+if __name__ == '__main__':
+    # 保存済みの視聴ページ（引数で指定）に対する、従来のBeautifulSoupによる抽出との比較
+    # 引数がなければテスト用のページと、実際のページと同程度の大きさに合成したページを使う
+    # （抽出結果の確認は tests/test_stream_page.py）
+    #   python stream_page.py saved_watch_page.html ...
+    import os
+    import sys
+    import time
+    import tracemalloc
+
+    def synthesize_page(size=1500 * 1024):
+        description = '配信の説明です\n■今日の内容\nお題箱消化 & 雑談\n\nhttps://example.com/'
+        player_response = {
+            'videoDetails': {'videoId': 'abcdefghijk', 'title': '【作業】テスト配信 </script> & "引用" #42',
+                             'shortDescription': description},
+            'streamingData': {'formats': [{'url': 'https://example.com/' + 'x' * 200} for _ in range(200)]},
+        }
+        # 実際のページ同様、JSON内の "<" はエスケープして埋め込む
+        player_json = json.dumps(player_response, ensure_ascii=False).replace('<', '\\u003c')
+        filler = ''.join(f'<div class="style-scope ytd-app" id="n{i}"><span>{"テキスト" * 5}</span></div>'
+                         for i in range(size // 200))
+        return (
+            '<!DOCTYPE html><html><head><title>テスト配信 - YouTube</title>'
+            '<script>var ytcfg = {"a": 1};</script>' + '<style>.a{color:red}</style>' * 200 +
+            '</head><body><div id="before">' + filler[:len(filler) // 3] + '</div>'
+            f'<script nonce="x">var ytInitialPlayerResponse = {player_json};var meta = 1;</script>'
+            '<meta property="og:title" content="【作業】テスト配信 &lt;/script&gt; &amp; &quot;引用&quot; #42">'
+            '<div id="after">' + filler + '</div>'
+            '<script>var ytInitialData = {"contents": {}};</script></body></html>'
+        ).encode('utf-8')
+
+    class SavedResponse:
+        """保存済みのページをネットワーク越しと同じ単位で返す"""
+
+        def __init__(self, data):
+            self.data = data
+
+        def iter_content(self, chunk_size):
+            for offset in range(0, len(self.data), chunk_size):
+                yield self.data[offset:offset + chunk_size]
+
+    def extract_new(data):
+        consumed = read_page(SavedResponse(data), player_response_loaded())
+        return parse_youtube_page(consumed), len(consumed)
+
+    def extract_old(data, marker):
+        # 変更前の get_stream_title / get_today_content と同じ処理
+        from bs4 import BeautifulSoup
+        text = data.decode('utf-8')
+        soup = BeautifulSoup(text, 'html.parser')
+        title = soup.find('meta', property='og:title')['content']
+        soup = BeautifulSoup(text, 'html.parser')
+        target = next(tag for tag in soup.find_all(True) if marker in tag.text)
+        return title, target
+
+    def measure(function, *args, repeat=5):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(*args)
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        function(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, min(times) * 1000, peak / 1024 / 1024
+
+    paths = sys.argv[1:] or [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'youtube_watch.html')]
+    pages = [(path, open(path, 'rb').read()) for path in paths]
+    if not sys.argv[1:]:
+        pages.append(('(synthesized)', synthesize_page()))
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+        print('bs4 is not installed; showing the new extractor only')
+
+    for name, data in pages:
+        (info, consumed), elapsed, peak = measure(extract_new, data)
+        print(f"{name}: {len(data) / 1024:.0f} KiB page")
+        print(f"  title: {info['title']!r}")
+        print(f"  description: {len(info['description'])} chars")
+        print(f"  stream_page:   {elapsed:8.1f} ms  peak {peak:6.1f} MiB  read {consumed / 1024:.0f} KiB")
+        if has_bs4:
+            _, old_elapsed, old_peak = measure(extract_old, data, '■今日の内容', repeat=1)
+            print(f"  BeautifulSoup: {old_elapsed:8.1f} ms  peak {old_peak:6.1f} MiB"
+                  f"  ({old_elapsed / elapsed:.0f}x slower)")
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""CommentQueue（受信スレッド→メインループのコメント受け渡し）のテスト"""
+
+import threading
+
+from comment_queue import CommentQueue
+
+
+def comment(i):
+    return {'message': f'comment {i}'}
+
+
+def test_batches_keep_arrival_order():
+    queue = CommentQueue()
+    for i in range(7):
+        queue.put(f'stream{i % 2}', comment(i))
+    assert queue.pop_batch(3) == [('stream0', comment(0)), ('stream1', comment(1)), ('stream0', comment(2))]
+    assert queue.pop_batch(10) == [(f'stream{i % 2}', comment(i)) for i in range(3, 7)]
+    assert queue.pop_batch(10) == []
+    assert queue.qsize() == 0
+
+
+def test_bounded_queue_drops_oldest():
+    queue = CommentQueue(max_items=3)
+    for i in range(5):
+        queue.put('stream', comment(i))
+    assert queue.qsize() == 3
+    assert [data for _, data in queue.pop_batch(10)] == [comment(2), comment(3), comment(4)]
+    stats = queue.stats()
+    assert (stats['total_enqueued'], stats['total_dropped'], stats['max_depth']) == (5, 2, 3)
+
+    # 空きがあれば捨てない
+    queue.put('stream', comment(5))
+    assert queue.stats()['total_dropped'] == 2
+
+
+def test_unbounded_queue_never_drops():
+    queue = CommentQueue()
+    for i in range(10000):
+        queue.put('stream', comment(i))
+    assert queue.qsize() == 10000
+    assert queue.stats()['total_dropped'] == 0
+
+
+def test_order_per_thread_is_kept_with_concurrent_producers():
+    queue = CommentQueue()
+    threads = [threading.Thread(target=lambda n=n: [queue.put(f'stream{n}', i) for i in range(2000)])
+               for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    items = queue.pop_batch(10 ** 6)
+    assert len(items) == 8000
+    for n in range(4):
+        assert [i for stream_id, i in items if stream_id == f'stream{n}'] == list(range(2000))
+
+
+def test_drain_stats():
+    queue = CommentQueue()
+    queue.put('stream', comment(0))
+    queue.record_drain(1, 4.0)
+    queue.record_drain(3, 2.5)
+    stats = queue.stats()
+    assert stats['total_processed'] == 4
+    assert (stats['last_batch_size'], stats['last_drain_ms'], stats['max_drain_ms']) == (3, 2.5, 4.0)
+    assert stats['depth'] == 1
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""FetchPool（取得処理の実行プール）のテスト"""
+
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from fetch_pool import FetchPool
+
+
+class BlockingFetch:
+    """release()されるまで戻らない取得処理（同時実行数を記録する）"""
+
+    def __init__(self):
+        self.release_event = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.started = threading.Semaphore(0)
+
+    def __call__(self, result):
+        def fetch():
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            self.started.release()
+            self.release_event.wait(5)
+            with self.lock:
+                self.active -= 1
+            return result
+        return fetch
+
+    def wait_started(self, count=1):
+        for _ in range(count):
+            assert self.started.acquire(timeout=5)
+
+    def release(self):
+        self.release_event.set()
+
+
+@pytest.fixture
+def pool():
+    pool = FetchPool(workers=8, per_host=4)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize('url, host', [
+    ('https://www.youtube.com/watch?v=abc', 'youtube.com'),
+    ('twitch.tv/someone', 'twitch.tv'),
+    (' https://YouTu.be/abc ', 'youtu.be'),
+])
+def test_host_of(url, host):
+    assert FetchPool.host_of(url) == host
+
+
+def test_result_and_callback(pool):
+    called = []
+    future = pool.submit('s1', 'https://www.twitch.tv/a', lambda: 'title', callback=called.append)
+    assert future.result(5) == 'title'
+    pool.shutdown()
+    assert called == ['title']
+    assert pool.stats()['completed'] == 1
+
+
+def test_error_is_set_on_future(pool):
+    def fail():
+        raise ValueError('boom')
+    future = pool.submit('s1', 'https://www.twitch.tv/a', fail)
+    with pytest.raises(ValueError):
+        future.result(5)
+    assert pool.stats()['errors'] == 1
+
+
+def test_same_key_is_deduplicated(pool):
+    fetch = BlockingFetch()
+    first = pool.submit('s0', 'https://www.youtube.com/watch?v=a', fetch('first'))
+    assert pool.submit('s0', 'https://www.youtube.com/watch?v=a', fetch('dup')) is first
+    fetch.release()
+    assert first.result(5) == 'first'
+    assert pool.stats()['deduplicated'] == 1
+
+
+def test_per_host_limit(pool):
+    youtube = BlockingFetch()
+    twitch = BlockingFetch()
+    youtube_futures = [pool.submit(f'y{n}', f'https://www.youtube.com/watch?v={n}', youtube(n)) for n in range(10)]
+    twitch_futures = [pool.submit(f't{n}', f'https://www.twitch.tv/user{n}', twitch(n)) for n in range(4)]
+    # YouTubeが上限に達していても、後から投入したTwitchの取得は待たされない
+    youtube.wait_started(pool.per_host)
+    twitch.wait_started(4)
+    assert pool.stats()['queued'] == 10 - pool.per_host
+    twitch.release()
+    youtube.release()
+    assert [future.result(5) for future in youtube_futures] == list(range(10))
+    assert [future.result(5) for future in twitch_futures] == list(range(4))
+    assert youtube.peak == pool.per_host
+
+
+def test_cancel_queued_job(pool):
+    fetch = BlockingFetch()
+    futures = [pool.submit(f'y{n}', f'https://www.youtube.com/watch?v={n}', fetch(n)) for n in range(5)]
+    fetch.wait_started(pool.per_host)
+    assert pool.cancel('y4')
+    assert futures[4].cancelled()
+    assert not pool.cancel('y4')
+    fetch.release()
+    assert [future.result(5) for future in futures[:4]] == [0, 1, 2, 3]
+
+
+def test_cancel_running_job_skips_callback(pool):
+    fetch = BlockingFetch()
+    called = []
+    future = pool.submit('c', 'https://www.twitch.tv/c', fetch('old'), callback=called.append)
+    fetch.wait_started()
+    assert pool.cancel('c')
+    # 取り消し後は同じキーで新しく投入できる
+    again = pool.submit('c', 'https://www.twitch.tv/c', lambda: 'new')
+    assert again is not future
+    assert again.result(5) == 'new'
+    fetch.release()
+    with pytest.raises(CancelledError):
+        future.result(5)
+    assert called == []
+
+
+def test_shutdown_cancels_queued_jobs():
+    pool = FetchPool(workers=1, per_host=1)
+    fetch = BlockingFetch()
+    running = pool.submit('a', 'https://www.twitch.tv/a', fetch('a'))
+    queued = pool.submit('b', 'https://www.twitch.tv/b', fetch('b'))
+    fetch.wait_started()
+    # 実行中の取得は待たない
+    pool.shutdown(timeout=0.1)
+    assert queued.cancelled()
+    assert not running.done()
+    fetch.release()
+    assert running.result(5) == 'a'
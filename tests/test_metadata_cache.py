@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""MetadataCache（配信タイトル・概要欄のキャッシュ）のテスト"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import http_client
+import metadata_cache
+import stream_page
+from metadata_cache import MetadataCache
+
+
+class Clock:
+    """time.timeの代わり（advance()で進める）"""
+
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metadata_cache, 'time', SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return MetadataCache(cache_file=str(tmp_path / 'stream_metadata.json'), ttl=300)
+
+
+@pytest.mark.parametrize('platform, url, key', [
+    ('youtube', 'https://www.youtube.com/watch?v=abc123&t=10', 'youtube:abc123'),
+    ('youtube', 'youtube.com/watch?v=abc123', 'youtube:abc123'),
+    ('youtube', 'https://youtu.be/abc123?si=x', 'youtube:abc123'),
+    ('youtube', 'https://www.youtube.com/live/abc123?feature=share', 'youtube:abc123'),
+    ('youtube', 'https://studio.youtube.com/video/abc123/livestreaming', 'youtube:abc123'),
+    ('youtube', ' https://www.youtube.com/@channel ', 'https://www.youtube.com/@channel'),
+    ('twitch', 'https://www.twitch.tv/SomeOne', 'twitch:someone'),
+    ('twitch', 'twitch.tv/someone/videos?filter=all', 'twitch:someone'),
+    ('twitch', 'https://www.twitch.tv/', 'https://www.twitch.tv/'),
+])
+def test_make_key(platform, url, key):
+    assert MetadataCache.make_key(platform, url) == key
+
+
+def test_entry_expires_after_ttl(cache, clock):
+    cache.put('youtube:a', title='A')
+    entry = cache.get('youtube:a')
+    assert entry == {'title': 'A', 'fetched_at': clock.now}
+    clock.advance(299)
+    assert cache.is_fresh(cache.get('youtube:a'))
+    clock.advance(1)
+    # 古くなっても表示には使えるよう、エントリは残る
+    assert not cache.is_fresh(cache.get('youtube:a'))
+    assert cache.get('youtube:a')['title'] == 'A'
+    assert not cache.is_fresh(cache.get('youtube:missing'))
+
+
+def test_put_keeps_unspecified_fields(cache, clock):
+    cache.put('youtube:a', title='A', description='about', etag='"1"', unknown='x')
+    clock.advance(10)
+    cache.put('youtube:a', title='B')
+    assert cache.get('youtube:a') == {'title': 'B', 'description': 'about', 'etag': '"1"',
+                                      'fetched_at': clock.now}
+
+
+def test_get_returns_copy(cache):
+    cache.put('youtube:a', title='A')
+    cache.get('youtube:a')['title'] = 'changed'
+    assert cache.get('youtube:a')['title'] == 'A'
+
+
+def test_oldest_entries_are_dropped(tmp_path, clock):
+    cache = MetadataCache(cache_file=str(tmp_path / 'stream_metadata.json'), max_entries=2)
+    cache.put('a', title='A')
+    cache.put('b', title='B')
+    cache.put('a', title='A2')  # 取り直したものは新しい扱いになる
+    cache.put('c', title='C')
+    assert list(cache.snapshot()) == ['a', 'c']
+
+
+def test_snapshot_round_trips_through_file(cache, tmp_path, clock):
+    cache.put('youtube:a', title='A', etag='"1"')
+    with open(cache.cache_file, 'w', encoding='utf-8') as f:
+        json.dump(cache.snapshot(), f)
+    loaded = MetadataCache(cache_file=cache.cache_file)
+    assert loaded.get('youtube:a') == cache.get('youtube:a')
+
+
+def test_broken_file_is_ignored(tmp_path):
+    path = tmp_path / 'stream_metadata.json'
+    path.write_text('{"youtube:a": {"title"', encoding='utf-8')
+    assert MetadataCache(cache_file=str(path)).snapshot() == {}
+
+
+class ConditionalResponse:
+    """条件付きリクエストに応答するレスポンス（ETagが一致すれば304）"""
+
+    def __init__(self, headers, etag, body=b''):
+        self.not_modified = headers.get('If-None-Match') == etag
+        self.status_code = 304 if self.not_modified else 200
+        self.headers = {'ETag': etag, 'Last-Modified': 'Sat, 17 Oct 2026 00:00:00 GMT'}
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+def test_not_modified_keeps_entry_and_refreshes_timestamp(cache, clock, monkeypatch):
+    # 配信アプリの fetch_stream_metadata と同じ流れ: 保存済みのETagで取り直し、304ならtouch()する
+    sent = []
+
+    def get(url, headers=None, **kwargs):
+        sent.append(headers)
+        return ConditionalResponse(headers, '"v1"', b'<html><head><title>A</title></head>')
+    monkeypatch.setattr(http_client, 'get', get)
+
+    key = MetadataCache.make_key('twitch', 'https://www.twitch.tv/someone')
+    info = stream_page.fetch_page_info('twitch', 'https://www.twitch.tv/someone')
+    cache.put(key, **info)
+    assert cache.get(key)['etag'] == '"v1"'
+
+    clock.advance(600)
+    entry = cache.get(key)
+    assert not cache.is_fresh(entry)
+    assert stream_page.fetch_page_info('twitch', 'https://www.twitch.tv/someone',
+                                       etag=entry['etag'], last_modified=entry['last_modified']) is None
+    assert sent[-1]['If-None-Match'] == '"v1"'
+    assert sent[-1]['If-Modified-Since'] == 'Sat, 17 Oct 2026 00:00:00 GMT'
+    cache.touch(key)
+    assert cache.get(key) == dict(entry, fetched_at=clock.now)
+    assert cache.is_fresh(cache.get(key))
+
+
+def test_touch_ignores_missing_entry(cache):
+    cache.touch('youtube:missing')
+    assert cache.get('youtube:missing') is None
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""ObsSupervisor（OBS接続の監視・再接続）のテスト"""
+
+import threading
+import time
+
+import pytest
+
+from obs_supervisor import ObsSupervisor
+
+
+INITIAL_DELAY = 0.001
+MAX_DELAY = 0.004
+CHECK_INTERVAL = 0.01
+
+
+class FakeObs:
+    """OBSSocketの代わり（送ったテキストを記録する）"""
+
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.texts = []
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    def change_text_async(self, source, text):
+        self.texts.append((source, text))
+
+    def close(self):
+        self.closed = True
+
+
+class FlakyFactory:
+    """failures回失敗した後、FakeObsを返す接続関数"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.created = []
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionRefusedError('OBS is not running')
+        obs = FakeObs()
+        self.created.append(obs)
+        return obs
+
+
+class RecordingEvent(threading.Event):
+    """待ち時間を記録し、実際にはほとんど待たないEvent"""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return super().wait(min(timeout, 0.001))
+
+    def backoff(self):
+        return [timeout for timeout in self.waits if timeout != CHECK_INTERVAL]
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def make_supervisor():
+    supervisors = []
+
+    def make(factory):
+        supervisor = ObsSupervisor(factory, initial_delay=INITIAL_DELAY, max_delay=MAX_DELAY,
+                                   check_interval=CHECK_INTERVAL)
+        supervisor._wake = RecordingEvent()
+        supervisors.append(supervisor)
+        return supervisor
+
+    yield make
+    for supervisor in supervisors:
+        supervisor.stop()
+
+
+def test_backoff_doubles_up_to_max_delay(make_supervisor):
+    factory = FlakyFactory(failures=4)
+    supervisor = make_supervisor(factory)
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    assert factory.calls == 5
+    assert supervisor._wake.backoff() == [0.001, 0.002, 0.004, 0.004]
+    assert supervisor.obs is factory.created[0]
+
+
+def test_texts_are_replayed_on_connect(make_supervisor):
+    factory = FlakyFactory(failures=2)
+    supervisor = make_supervisor(factory)
+    # 未接続の間の変更は送らずに覚えておく（ソースごとに最新のもの）
+    assert supervisor.change_text('title', '1') is None
+    supervisor.change_text('title', '2')
+    supervisor.change_text('todo', 'a')
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    obs = factory.created[0]
+    assert sorted(obs.texts) == [('title', '2'), ('todo', 'a')]
+
+    supervisor.change_text('title', '3')
+    assert obs.texts[-1] == ('title', '3')
+
+
+def test_reconnect_after_connection_lost(make_supervisor):
+    factory = FlakyFactory()
+    supervisor = make_supervisor(factory)
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    supervisor.change_text('title', 'x')
+
+    # OBSが終了した: 閉じて新しい接続を作り、最新のテキストを送り直す
+    factory.failures = factory.calls + 2
+    factory.created[0].connected = False
+    wait_until(lambda: len(factory.created) == 2 and supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    assert factory.created[0].closed
+    assert factory.created[1].texts == [('title', 'x')]
+    # 待ち時間は初期値からやり直す
+    assert supervisor._wake.backoff() == [0.001, 0.002]
+
+
+def test_reconnect_request_replaces_connection(make_supervisor):
+    factory = FlakyFactory()
+    supervisor = make_supervisor(factory)
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    supervisor.reconnect()
+    wait_until(lambda: len(factory.created) == 2 and supervisor.obs is factory.created[1])
+    assert factory.created[0].closed and not factory.created[1].closed
+
+
+def test_stop_ends_thread_and_closes_connection(make_supervisor):
+    factory = FlakyFactory()
+    supervisor = make_supervisor(factory)
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_CONNECTED)
+    thread = supervisor._thread
+    supervisor.stop()
+    assert not thread.is_alive()
+    assert factory.created[0].closed
+    assert supervisor.obs is None
+    assert supervisor.state == ObsSupervisor.STATE_DISCONNECTED
+
+
+def test_stop_while_retrying(make_supervisor):
+    supervisor = make_supervisor(FlakyFactory(failures=10 ** 9))
+    supervisor.start()
+    wait_until(lambda: supervisor.state == ObsSupervisor.STATE_DEGRADED)
+    thread = supervisor._thread
+    supervisor.stop()
+    assert not thread.is_alive()
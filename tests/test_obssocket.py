@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""OBSSocket のテスト（OBSの代わりに応答を返す模擬クライアントを使う）"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def obssocket(tmp_path_factory):
+    # obssocketは読み込み時にカレントフォルダへlog/を作るため、一時フォルダで読み込む
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('obs'))
+    try:
+        pytest.importorskip('obsws_python')
+        return pytest.importorskip('obssocket')
+    finally:
+        os.chdir(cwd)
+
+
+SCENES = {
+    'main': [
+        {'sourceName': 'title', 'sceneItemId': 1, 'isGroup': False},
+        {'sourceName': 'overlay', 'sceneItemId': 2, 'isGroup': True},
+    ],
+    'sub': [
+        {'sourceName': 'title', 'sceneItemId': 5, 'isGroup': False},
+    ],
+}
+GROUPS = {
+    'overlay': [
+        {'sourceName': 'todo', 'sceneItemId': 7, 'isGroup': False},
+    ],
+}
+
+
+def batch_response(payload):
+    """RequestBatch(op 8)への応答（requestTypeが'Fail'の要求は失敗させる）"""
+    results = []
+    for request in payload['d']['requests']:
+        request_type = request['requestType']
+        if request_type == 'Fail':
+            status = {'result': False, 'code': 600, 'comment': 'No source was found'}
+            results.append({'requestType': request_type, 'requestStatus': status})
+        else:
+            results.append({'requestType': request_type, 'requestStatus': {'result': True, 'code': 100},
+                            'responseData': {'echo': request['requestData']}})
+    return {'op': 9, 'd': {'requestId': payload['d']['requestId'], 'results': results}}
+
+
+class FakeWebSocket:
+    """送られたRequestBatchに応答する模擬WebSocket"""
+
+    def __init__(self):
+        self.sent = []
+        self.inbox = deque()
+        self.respond = lambda payload: [batch_response(payload)]
+        self.gate = threading.Event()  # clear()すると送信を止める
+        self.gate.set()
+
+    def send(self, text):
+        self.gate.wait(5)
+        payload = json.loads(text)
+        self.sent.append(payload)
+        self.inbox.extend(json.dumps(message) for message in self.respond(payload))
+
+    def recv(self):
+        if not self.inbox:
+            raise TimeoutError('no response')
+        return self.inbox.popleft()
+
+
+class FakeReqClient:
+    """シーン構成とRequestBatchに応答する模擬ReqClient"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        self.disconnected = False
+        self.base_client = SimpleNamespace(ws=FakeWebSocket())
+        FakeReqClient.instances.append(self)
+
+    def get_scene_item_list(self, scene):
+        self.calls.append(('scene', scene))
+        return SimpleNamespace(scene_items=SCENES[scene])
+
+    def get_group_scene_item_list(self, group):
+        self.calls.append(('group', group))
+        return SimpleNamespace(scene_items=GROUPS[group])
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class FakeEventClient:
+    """イベントを受信しない模擬EventClient（callbackはobsws_pythonのものをそのまま使う）"""
+
+    def __init__(self, **kwargs):
+        from obsws_python.callback import Callback
+        self.callback = Callback()
+        self.worker = None
+
+    def unsubscribe(self):
+        pass
+
+
+@pytest.fixture
+def obs(obssocket, monkeypatch):
+    monkeypatch.setattr(obssocket.obsws, 'ReqClient', FakeReqClient)
+    monkeypatch.setattr(obssocket.obsws, 'EventClient', FakeEventClient)
+    obs = obssocket.OBSSocket('localhost', 4455, '')
+    yield obs
+    obs.close()
+
+
+def load_scenes(obs):
+    assert obs.search_itemid('main', 'todo') == ('overlay', 7)
+    assert obs.search_itemid('sub', 'title') == ('sub', 5)
+    assert set(obs._scene_cache) == {'main', 'sub'}
+
+
+def test_scene_graph_is_cached(obs):
+    load_scenes(obs)
+    assert obs.get_sources('main') == ['overlay', 'todo', 'title']
+    assert obs.search_itemid('main', 'title') == ('main', 1)
+    assert obs.ws.calls == [('scene', 'main'), ('group', 'overlay'), ('scene', 'sub')]
+
+
+@pytest.mark.parametrize('event', ['CurrentSceneCollectionChanging', 'CurrentSceneCollectionChanged'])
+def test_scene_collection_switch_clears_cache(obs, event):
+    load_scenes(obs)
+    obs.ev.callback.trigger(event, {'sceneCollectionName': 'other'})
+    assert obs._scene_cache == {}
+
+
+@pytest.mark.parametrize('event, data', [
+    ('InputNameChanged', {'oldInputName': 'title', 'inputName': 'title2'}),
+    ('SceneNameChanged', {'oldSceneName': 'sub', 'sceneName': 'sub2'}),
+    ('SceneRemoved', {'sceneName': 'sub'}),
+    ('ExitStarted', {}),
+])
+def test_events_clear_whole_cache(obs, event, data):
+    load_scenes(obs)
+    obs.ev.callback.trigger(event, data)
+    assert obs._scene_cache == {}
+
+
+@pytest.mark.parametrize('event', ['SceneItemCreated', 'SceneItemRemoved'])
+def test_scene_item_events_clear_only_that_scene(obs, event):
+    load_scenes(obs)
+    obs.ev.callback.trigger(event, {'sceneName': 'sub', 'sourceName': 'x', 'sceneItemId': 9})
+    assert set(obs._scene_cache) == {'main'}
+
+
+def test_group_item_event_clears_scenes_containing_group(obs):
+    # グループ内のアイテムの追加はグループ名でイベントが届く
+    load_scenes(obs)
+    obs.ev.callback.trigger('SceneItemCreated', {'sceneName': 'overlay', 'sourceName': 'x', 'sceneItemId': 9})
+    assert set(obs._scene_cache) == {'sub'}
+    assert obs.search_itemid('main', 'todo') == ('overlay', 7)
+    assert obs.stats['scene_cache_loads'] == 3
+
+
+def test_registered_handlers_match_obs_events(obs):
+    # obs-websocket v5のイベント名（メソッド名から決まる）として登録されていること
+    assert set(obs.ev.callback.get()) == {
+        'ExitStarted', 'SceneItemCreated', 'SceneItemRemoved', 'InputNameChanged', 'SceneNameChanged',
+        'SceneRemoved', 'CurrentSceneCollectionChanging', 'CurrentSceneCollectionChanged',
+    }
+
+
+def test_event_client_failure_closes_request_client(obssocket, monkeypatch):
+    # EventClientの接続に失敗したら、接続済みのReqClientを閉じる（再接続のたびに漏れない）
+    def fail(**kwargs):
+        raise OSError('event connection failed')
+    FakeReqClient.instances.clear()
+    monkeypatch.setattr(obssocket.obsws, 'ReqClient', FakeReqClient)
+    monkeypatch.setattr(obssocket.obsws, 'EventClient', fail)
+    with pytest.raises(OSError):
+        obssocket.OBSSocket('localhost', 4455, '')
+    assert [client.disconnected for client in FakeReqClient.instances] == [True]
+
+
+def test_batch_results_are_matched_to_requests(obs, obssocket):
+    results = obs._send_batch([('SetInputSettings', {'inputName': 'a'}), ('Fail', {}), ('GetVersion', None)])
+    assert results[0] == {'echo': {'inputName': 'a'}}
+    assert isinstance(results[1], obssocket.OBSSDKRequestError) and results[1].code == 600
+    assert results[2] == {'echo': {}}
+    (payload,) = obs.ws.base_client.ws.sent
+    assert payload['op'] == 8 and payload['d']['haltOnFailure'] is False
+    assert obs.stats['errors'] == 1
+
+
+def test_unrelated_messages_are_discarded(obs):
+    ws = obs.ws.base_client.ws
+    # タイムアウトした以前の要求への遅れた応答・別のopの応答を読み捨てる
+    ws.respond = lambda payload: [
+        {'op': 9, 'd': {'requestId': 'old', 'results': [{'requestType': 'X', 'requestStatus': {'result': True}}]}},
+        {'op': 7, 'd': {'requestId': payload['d']['requestId']}},
+        batch_response(payload),
+    ]
+    assert obs._send_batch([('GetVersion', {'v': 1})]) == [{'echo': {'v': 1}}]
+
+
+def test_missing_results_fail(obs, obssocket):
+    ws = obs.ws.base_client.ws
+    def respond(payload):
+        response = batch_response(payload)
+        del response['d']['results'][1:]
+        return [response]
+    ws.respond = respond
+    results = obs._send_batch([('A', {}), ('B', {})])
+    assert results[0] == {'echo': {}}
+    assert isinstance(results[1], obssocket.OBSSDKError)
+
+
+def test_worker_batches_and_supersedes(obs, obssocket):
+    ws = obs.ws.base_client.ws
+    ws.gate.clear()
+    first = obs.change_text_async('title', '1')
+    # 1件目の送信中に積まれた要求は、次のRequestBatchにまとめて送る
+    deadline = time.monotonic() + 5
+    while obs._pending:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    old = obs.change_text_async('title', '2')
+    new = obs.change_text_async('title', '3')
+    failed = obs.submit('Fail', {})
+    ws.gate.set()
+    assert first.result(5)['echo']['inputSettings'] == {'text': '1'}
+    assert old.result(5) == new.result(5) == {'echo': {'inputName': 'title', 'inputSettings': {'text': '3'},
+                                                     'overlay': True}}
+    with pytest.raises(obssocket.OBSSDKRequestError):
+        failed.result(5)
+    assert [len(payload['d']['requests']) for payload in ws.sent] == [1, 2]
+    assert obs.stats['superseded'] == 1
+
+
+def test_send_failure_marks_connection_lost(obs):
+    ws = obs.ws.base_client.ws
+    ws.respond = lambda payload: []
+    future = obs.submit('GetVersion')
+    with pytest.raises(TimeoutError):
+        future.result(5)
+    assert obs.active is False
+    assert not obs.is_connected()
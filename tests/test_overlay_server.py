@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""OverlayServer（オーバーレイ配信用のHTTPサーバ）のテスト"""
+
+import http.client
+import json
+import socket
+
+import pytest
+
+from overlay_server import OverlayServer
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('overlay')
+    (tmp_path / 'html').mkdir()
+    (tmp_path / 'html' / 'todolist.html').write_text('<html>todo</html>', encoding='utf-8')
+    (tmp_path / 'todo.xml').write_text('<todo/>', encoding='utf-8')
+    (tmp_path / 'settings.json').write_text('{"secret": 1}', encoding='utf-8')
+    server = OverlayServer(root_dir=str(tmp_path), port=0)
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def get(server, path):
+    connection = http.client.HTTPConnection(server.host, server.port, timeout=5)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.getheader('Location'), response.read()
+    finally:
+        connection.close()
+
+
+class EventReader:
+    """/events/<topic> に接続してSSEのイベントを1件ずつ読む"""
+
+    def __init__(self, server, topic):
+        self.sock = socket.create_connection((server.host, server.port), timeout=5)
+        self.sock.sendall(f'GET /events/{topic} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode('ascii'))
+        self.reader = self.sock.makefile('rb')
+        self.status = int(self.reader.readline().split()[1])
+        while self.reader.readline().strip():
+            pass  # レスポンスヘッダ
+
+    def read_event(self):
+        lines = []
+        while True:
+            line = self.reader.readline().decode('utf-8').rstrip('\n')
+            if not line:
+                return lines
+            lines.append(line)
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/html/todolist.html', 200),
+    ('/todo.xml', 200),
+    ('/settings.json', 404),              # アプリのフォルダの他のファイルは公開しない
+    ('/html/../settings.json', 404),
+    ('/html/%2e%2e/settings.json', 404),
+    ('/events/unknown', 404),
+])
+def test_public_files(server, path, status):
+    assert get(server, path)[0] == status
+
+
+def test_root_redirects_to_html(server):
+    status, location, _ = get(server, '/')
+    assert (status, location) == (302, '/html/')
+
+
+def test_events_are_pushed_and_retained(server):
+    server.add_topic('todo')
+    server.publish('todo', 'todo', {'items': ['前']})
+    reader = EventReader(server, 'todo')
+    try:
+        assert reader.status == 200
+        assert reader.read_event() == [f'retry: {OverlayServer.RETRY_MS}']
+        # 接続前の直近のイベントが最初に届く
+        assert reader.read_event() == ['event: todo', 'data: {"items":["前"]}']
+
+        server.publish('todo', 'todo', {'items': ['曲A', '曲B']})
+        event, data = reader.read_event()
+        assert event == 'event: todo'
+        assert json.loads(data[len('data: '):]) == {'items': ['曲A', '曲B']}
+    finally:
+        reader.close()
+
+
+def test_no_traffic_without_updates(server):
+    server.add_topic('idle')
+    reader = EventReader(server, 'idle')
+    try:
+        reader.read_event()  # retry:
+        reader.sock.settimeout(0.2)
+        with pytest.raises(socket.timeout):
+            reader.sock.recv(1)
+    finally:
+        reader.close()
+
+
+def test_publish_without_server_or_topic():
+    server = OverlayServer(port=0)
+    server.add_topic('todo')
+    server.publish('todo', 'todo', {'items': []})   # 未起動でも保持だけ行う
+    server.publish('unknown', 'todo', {})           # 未登録のトピックは無視
+    assert server.stats()['todo']['published'] == 1
+
+
+@pytest.mark.parametrize('port', [70000, -1])
+def test_out_of_range_port_fails_to_start(port):
+    assert OverlayServer(port=port).start() is False
+
+
+def test_flood_is_bounded_by_max_queue():
+    # コメントが殺到し、クライアントが受信しない場合も送信待ちが上限を超えないこと
+    server = OverlayServer(port=0)
+    server.add_topic('comments', retain=10, max_queue=64)
+    subscriber = server.subscribe('comments')
+    for i in range(3000):
+        server.publish('comments', 'comments', {'comments': [{'message': f'w{i}'}]})
+    queued = subscriber.get_all()
+    assert len(queued) == 64 and subscriber.dropped == 3000 - 64
+    # 古いものから捨てる
+    assert b'"w2936"' in queued[0] and b'"w2999"' in queued[-1]
+    server.unsubscribe('comments', subscriber)
+    assert server.stats()['comments']['dropped'] == 3000 - 64
+
+    # 後から接続したクライアントには直近retain件だけが届く
+    late = server.subscribe('comments')
+    assert len(late.get_all()) == 10
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""PersistenceService（まとめて別スレッドで行う保存）のテスト"""
+
+import json
+import threading
+
+import pytest
+
+import persistence
+from persistence import PersistenceService, atomic_write_json, atomic_write_text
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def service():
+    service = PersistenceService(delay=60)  # flush()するまで書き込まない
+    yield service
+    service.shutdown(timeout=1.0)
+
+
+def test_atomic_write(tmp_path):
+    path = str(tmp_path / 'todo.xml')
+    atomic_write_text(path, '<todo/>')
+    atomic_write_json(str(tmp_path / 'a.json'), {'曲': 1})
+    assert open(path, encoding='utf-8').read() == '<todo/>'
+    assert read_json(str(tmp_path / 'a.json')) == {'曲': 1}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['a.json', 'todo.xml']
+
+
+def test_failed_write_keeps_old_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'settings.json')
+    atomic_write_json(path, {'version': 1})
+
+    def fail(fd):
+        raise OSError('disk full')
+    monkeypatch.setattr(persistence.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        atomic_write_json(path, {'version': 2})
+    assert read_json(path) == {'version': 1}
+
+
+def test_saves_for_one_name_are_coalesced(service, tmp_path):
+    path = str(tmp_path / 'settings.json')
+    for version in range(5):
+        service.save('settings', path, {'version': version})
+    assert service.flush(timeout=5)
+    assert read_json(path) == {'version': 4}
+    stats = service.stats()['settings']
+    assert (stats['requested'], stats['coalesced'], stats['writes']) == (5, 4, 1)
+
+
+def test_different_names_are_written_separately(service, tmp_path):
+    service.save('settings', str(tmp_path / 'settings.json'), {'a': 1})
+    service.save('requests', str(tmp_path / 'requests.json'), [1, 2])
+    assert service.flush(timeout=5)
+    assert read_json(str(tmp_path / 'settings.json')) == {'a': 1}
+    assert read_json(str(tmp_path / 'requests.json')) == [1, 2]
+
+
+def test_write_happens_after_delay(tmp_path):
+    service = PersistenceService(delay=0.05)
+    path = tmp_path / 'settings.json'
+    written = threading.Event()
+    try:
+        service.save('settings', str(path), {'a': 1}, after_write=lambda data: written.set())
+        assert not path.exists()
+        assert written.wait(5)
+        assert read_json(str(path)) == {'a': 1}
+    finally:
+        service.shutdown(timeout=1.0)
+
+
+def test_flush_waits_for_write_in_progress(service, tmp_path):
+    path = str(tmp_path / 'requests.json')
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_after_write(data):
+        started.set()
+        release.wait(5)
+
+    service.save('requests', path, [1], after_write=slow_after_write)
+    flushed = []
+    flusher = threading.Thread(target=lambda: flushed.append(service.flush(timeout=5)))
+    flusher.start()
+    assert started.wait(5)
+    # 書き込み中（after_writeの完了前）はflush()が戻らない
+    flusher.join(0.05)
+    assert flusher.is_alive()
+    release.set()
+    flusher.join(5)
+    assert flushed == [True]
+
+
+def test_flush_times_out(service, tmp_path):
+    release = threading.Event()
+    service.save('requests', str(tmp_path / 'requests.json'), [1], after_write=lambda data: release.wait(5))
+    assert service.flush(timeout=0.05) is False
+    release.set()
+
+
+def test_after_write_runs_after_file_is_replaced(service, tmp_path):
+    path = str(tmp_path / 'requests.json')
+    atomic_write_json(path, {'seq': 1})
+    seen = []
+    service.save('requests', path, {'seq': 2}, after_write=lambda data: seen.append((data, read_json(path))))
+    assert service.flush(timeout=5)
+    assert seen == [({'seq': 2}, {'seq': 2})]
+
+
+def test_failed_write_is_counted_and_skips_after_write(service, tmp_path, monkeypatch):
+    path = str(tmp_path / 'requests.json')
+    atomic_write_json(path, {'seq': 1})
+
+    def fail(src, dst):
+        raise OSError('locked')
+    monkeypatch.setattr(persistence.os, 'replace', fail)
+    called = []
+    service.save('requests', path, {'seq': 2}, after_write=called.append)
+    assert service.flush(timeout=5)
+    assert read_json(path) == {'seq': 1}
+    assert called == []
+    assert service.stats()['requests']['errors'] == 1
+
+
+def test_shutdown_writes_pending(tmp_path):
+    service = PersistenceService(delay=60)
+    path = str(tmp_path / 'settings.json')
+    service.save('settings', path, {'a': 1})
+    service.shutdown(timeout=5)
+    assert read_json(path) == {'a': 1}
+    assert service._thread is None
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""RequestEngine（リクエストリストとコマンド処理）のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from request_engine import RequestEngine, benchmark
+from request_journal import RequestJournal
+from user_registry import UserRegistry
+
+
+MANAGER = {'platform': 'youtube', 'id': 'UCmanager', 'name': 'manager'}
+
+
+def make_engine(push_manager_only=False, pull_manager_only=False):
+    settings = SimpleNamespace(
+        pushwords=['お題 ', 'リク '],
+        pullwords=['消化済'],
+        push_manager_only=push_manager_only,
+        pull_manager_only=pull_manager_only,
+        request_number_max_tokens=32,
+    )
+    engine = RequestEngine(settings, UserRegistry([MANAGER], []))
+    events = []
+    engine.subscribe(events.append)
+    return engine, events
+
+
+def comment(message, author_id='UCviewer', platform='youtube'):
+    return {'message': message, 'author': author_id, 'author_id': author_id, 'platform': platform}
+
+
+def contents(engine):
+    return [req['content'] for req in engine.requests]
+
+
+def test_add_emits_event_with_record():
+    engine, events = make_engine()
+    engine.add('曲A', 'viewer', 'manual')
+    assert contents(engine) == ['曲A']
+    assert len(events) == 1
+    event = events[0]
+    assert (event.kind, event.stream_id, event.count) == ('add', None, 1)
+    assert event.record == {'op': 'add', 'request': engine.requests[0]}
+
+
+def test_pushword_adds_request_from_comment():
+    engine, events = make_engine()
+    engine.process_comment('y0', comment('お題 曲A'))
+    assert engine.requests == [{'content': '曲A', 'author': 'UCviewer', 'platform': 'youtube', 'stream_id': 'y0'}]
+    assert [(e.kind, e.stream_id) for e in events] == [('add', 'y0')]
+
+
+def test_pushword_without_content_is_ignored():
+    engine, events = make_engine()
+    engine.process_comment('y0', comment('お題 '))
+    assert engine.requests == []
+    assert events == []
+
+
+def test_plain_comment_emits_nothing():
+    engine, events = make_engine()
+    engine.process_comment('y0', comment('こんにちは'))
+    assert events == []
+
+
+def test_remove_numbers_emits_one_event():
+    engine, events = make_engine()
+    for name in 'ABCDE':
+        engine.add(name, 'viewer', 'manual')
+    events.clear()
+    engine.process_comment('y0', comment('消化済 1, 3-4'))
+    assert contents(engine) == ['B', 'E']
+    assert len(events) == 1
+    assert (events[0].kind, events[0].stream_id, events[0].count) == ('remove', 'y0', 3)
+    assert events[0].record == {'op': 'remove', 'indexes': [3, 2, 0]}
+
+
+def test_pullword_without_number_removes_first():
+    engine, events = make_engine()
+    engine.add('A', 'viewer', 'manual')
+    engine.add('B', 'viewer', 'manual')
+    engine.process_comment('y0', comment('消化済'))
+    assert contents(engine) == ['B']
+
+
+def test_pullword_with_text_removes_matching_content():
+    engine, events = make_engine()
+    for name in ['曲A', '曲B', '曲A']:
+        engine.add(name, 'viewer', 'manual')
+    events.clear()
+    engine.process_comment('y0', comment('消化済 曲A'))
+    assert contents(engine) == ['曲B', '曲A']
+    assert events[0].record == {'op': 'remove', 'indexes': [0]}
+
+    # 一致しなければ何もしない
+    events.clear()
+    engine.process_comment('y0', comment('消化済 曲C'))
+    assert contents(engine) == ['曲B', '曲A']
+    assert events == []
+
+
+def test_out_of_range_removal_emits_nothing():
+    engine, events = make_engine()
+    engine.add('A', 'viewer', 'manual')
+    events.clear()
+    engine.process_comment('y0', comment('消化済 5'))
+    assert contents(engine) == ['A']
+    assert events == []
+
+
+def test_push_manager_only():
+    engine, events = make_engine(push_manager_only=True)
+    engine.process_comment('y0', comment('お題 曲A'))
+    assert engine.requests == []
+    engine.process_comment('y0', comment('お題 曲B', author_id='UCmanager'))
+    assert contents(engine) == ['曲B']
+    # 他のプラットフォームの同じIDは管理者ではない
+    engine.process_comment('t0', comment('お題 曲C', author_id='UCmanager', platform='twitch'))
+    assert contents(engine) == ['曲B']
+
+
+def test_pull_manager_only():
+    engine, events = make_engine(pull_manager_only=True)
+    engine.add('A', 'viewer', 'manual')
+    engine.add('B', 'viewer', 'manual')
+    events.clear()
+    engine.process_comment('y0', comment('消化済 1'))
+    assert contents(engine) == ['A', 'B']
+    assert events == []
+    engine.process_comment('y0', comment('消化済 1', author_id='UCmanager'))
+    assert contents(engine) == ['B']
+
+
+def test_move():
+    engine, events = make_engine()
+    for name in 'ABC':
+        engine.add(name, 'viewer', 'manual')
+    events.clear()
+    assert engine.move(2, -1)
+    assert contents(engine) == ['A', 'C', 'B']
+    assert events[-1].kind == 'move'
+    assert events[-1].record == {'op': 'move', 'index': 2, 'to': 1}
+    # 範囲外には動かさない
+    assert not engine.move(0, -1)
+    assert not engine.move(2, 1)
+    assert len(events) == 1
+
+
+def test_remove_at_and_clear_and_load():
+    engine, events = make_engine()
+    for name in 'ABC':
+        engine.add(name, 'viewer', 'manual')
+    events.clear()
+    assert engine.remove_at(1)['content'] == 'B'
+    assert engine.remove_at(5) is None
+    engine.clear()
+    assert engine.requests == []
+    engine.load([{'content': 'X', 'author': 'a', 'platform': 'manual', 'stream_id': ''}])
+    assert [(e.kind, e.count) for e in events] == [('remove', 1), ('clear', 2), ('load', 1)]
+    assert events[-1].record is None
+
+
+def test_records_replay_to_same_list():
+    # 変更通知の record を RequestJournal.apply で再生すると同じリストになる
+    engine, events = make_engine()
+    engine.process_comment('y0', comment('お題 A'))
+    engine.process_comment('y0', comment('お題 B'))
+    engine.process_comment('y0', comment('リク C'))
+    engine.move(0, 1)
+    engine.process_comment('y0', comment('消化済 2'))
+    engine.process_comment('y0', comment('消化済 C'))
+    replayed = []
+    for event in events:
+        RequestJournal.apply(replayed, event.record)
+    assert replayed == engine.requests
+
+
+def test_failing_listener_does_not_block_others():
+    engine, events = make_engine()
+
+    def broken(event):
+        raise RuntimeError('listener failure')
+
+    engine._listeners.insert(0, broken)
+    engine.add('A', 'viewer', 'manual')
+    assert len(events) == 1
+
+
+def test_rebuild_trigger_matcher_uses_new_words():
+    engine, events = make_engine()
+    engine.global_settings.pushwords = ['req ']
+    engine.rebuild_trigger_matcher()
+    engine.process_comment('y0', comment('お題 A'))
+    engine.process_comment('y0', comment('req B'))
+    assert contents(engine) == ['B']
+
+
+@pytest.mark.benchmark
+def test_benchmark_smoke():
+    # ベンチマークがCIで動くこと（本計測は python request_engine.py --max-us ...）
+    result = benchmark(num_comments=20000)
+    assert result['comments'] == 20000
+    assert result['events'] > 0
+    assert result['per_comment_us'] > 0
+    # 同じシードなら同じコメント列になる（計測結果を比較できる）
+    again = benchmark(num_comments=20000)
+    assert (again['events'], again['requests_left']) == (result['events'], result['requests_left'])
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""RequestJournal（追記型ログとスナップショットによる永続化）のテスト"""
+
+import json
+import random
+
+import pytest
+
+import request_journal
+from request_journal import RequestJournal
+
+
+def request(content):
+    return {'content': content, 'author': 'a', 'platform': 'youtube', 'stream_id': ''}
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'requests.json'), str(tmp_path / 'requests.log')
+
+
+@pytest.mark.parametrize('record, expected', [
+    ({'op': 'add', 'request': 'd'}, ['a', 'b', 'c', 'd']),
+    ({'op': 'remove', 'indexes': [2, 0]}, ['b']),
+    ({'op': 'remove', 'indexes': [5, -1]}, ['a', 'b', 'c']),   # 範囲外は無視
+    ({'op': 'move', 'index': 2, 'to': 1}, ['a', 'c', 'b']),
+    ({'op': 'move', 'index': 2, 'to': 3}, ['a', 'b', 'c']),
+    ({'op': 'clear'}, []),
+    ({'op': 'unknown'}, ['a', 'b', 'c']),
+])
+def test_apply(record, expected):
+    requests = ['a', 'b', 'c']
+    RequestJournal.apply(requests, record)
+    assert requests == expected
+
+
+def test_random_operations_replay_with_compaction(paths):
+    # ランダムな操作を記録→再読み込みして一致すること（途中で圧縮も挟む）
+    rng = random.Random(0)
+    journal = RequestJournal(*paths, compact_every=37)
+    expected = []
+    compactions = 0
+    for i in range(1000):
+        choice = rng.random()
+        if choice < 0.6 or not expected:
+            record = {'op': 'add', 'request': request(f'曲{i}')}
+        elif choice < 0.85:
+            record = {'op': 'remove', 'indexes': sorted(rng.sample(range(len(expected)), min(3, len(expected))), reverse=True)}
+        elif choice < 0.99:
+            index = rng.randrange(len(expected))
+            record = {'op': 'move', 'index': index, 'to': max(0, index - 1)}
+        else:
+            record = {'op': 'clear'}
+        RequestJournal.apply(expected, record)
+        if journal.append(record):
+            journal.compact(expected)
+            compactions += 1
+    journal.close()
+    assert compactions == 1000 // 37
+    assert RequestJournal(*paths).load() == expected
+
+
+def test_broken_last_record_is_ignored(paths):
+    journal = RequestJournal(*paths)
+    journal.append({'op': 'add', 'request': request('曲A')})
+    journal.close()
+    # 書き込み途中で落ちた最後のレコード
+    with open(paths[1], 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "request": {"content": "途中')
+    assert RequestJournal(*paths).load() == [request('曲A')]
+
+
+def test_legacy_list_snapshot(paths):
+    with open(paths[0], 'w', encoding='utf-8') as f:
+        json.dump([request('旧')], f, ensure_ascii=False)
+    journal = RequestJournal(*paths)
+    assert journal.load() == [request('旧')]
+    assert journal.seq == 0
+
+
+def test_records_already_in_snapshot_are_skipped(paths):
+    journal = RequestJournal(*paths)
+    requests = []
+    for content in ('曲A', '曲B'):
+        record = {'op': 'add', 'request': request(content)}
+        RequestJournal.apply(requests, record)
+        journal.append(record)
+    journal.close()
+    # スナップショットは書けたが、ログの削除前に落ちた場合
+    with open(paths[0], 'w', encoding='utf-8') as f:
+        json.dump({'seq': 2, 'requests': requests}, f, ensure_ascii=False)
+    journal = RequestJournal(*paths)
+    assert journal.load() == requests
+    assert journal.seq == 2 and journal.pending == 0
+
+
+def test_recovery_after_rotate_before_snapshot(paths):
+    # 退避後、スナップショットを書く前に追記・終了しても復元できること
+    journal = RequestJournal(*paths)
+    journal.append({'op': 'add', 'request': request('曲A')})
+    expected = journal.load()
+    journal.compact(expected)
+    journal.append({'op': 'clear'})
+    expected.clear()
+    seq = journal.rotate()
+    data = {'seq': seq, 'requests': list(expected)}
+    for i in range(5):
+        record = {'op': 'add', 'request': request(f'後{i}')}
+        RequestJournal.apply(expected, record)
+        journal.append(record)
+    journal.close()
+    assert RequestJournal(*paths).load() == expected
+
+    journal.write_snapshot(data)
+    assert journal._segments() == []
+    assert RequestJournal(*paths).load() == expected
+
+
+@pytest.mark.parametrize('fsync, expected', [(True, 3), (False, 0)])
+def test_append_fsyncs_each_record(paths, monkeypatch, fsync, expected):
+    synced = []
+    monkeypatch.setattr(request_journal.os, 'fsync', synced.append)
+    journal = RequestJournal(*paths, fsync=fsync)
+    for content in ('曲A', '曲B', '曲C'):
+        journal.append({'op': 'add', 'request': request(content)})
+    journal.close()
+    assert len(synced) == expected
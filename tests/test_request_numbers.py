@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""parse_request_numbers（削除コマンドの番号指定）のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import request_engine
+from request_engine import RequestEngine, parse_request_numbers
+from user_registry import UserRegistry
+
+
+@pytest.mark.parametrize('text, limit, expected', [
+    ("1-3", 10, [1, 2, 3]),
+    ("1 3-4", 10, [1, 3, 4]),
+    ("1,2,3", 10, [1, 2, 3]),
+    ("1, 3-5, 7", 10, [1, 3, 4, 5, 7]),
+    ("5-3 0 -1 11", 10, []),
+    ("2-4 3-6 1", 5, [1, 2, 3, 4, 5]),
+    ("3 3 3-3", 10, [3]),
+    ("abc 2 x-y", 10, [2]),
+    ("", 10, []),
+])
+def test_parse(text, limit, expected):
+    assert parse_request_numbers(text, limit) == expected
+
+
+# 悪意のある入力（巨大な範囲・大量のトークン・巨大な数字列）
+ADVERSARIAL = [
+    "1-100000000",
+    "1-100000000 " * 10000,
+    " ".join(str(i) for i in range(100000)),
+    "1-" + "9" * 4000,
+    "-".join(["1"] * 10000),
+    ",".join(["1-99999999999999999999"] * 5000),
+]
+
+
+@pytest.mark.parametrize('text', ADVERSARIAL)
+@pytest.mark.parametrize('limit', [0, 10, 1000])
+def test_adversarial_result_is_clipped_to_limit(text, limit):
+    numbers = parse_request_numbers(text, limit)
+    assert len(numbers) <= limit
+    assert all(1 <= num <= limit for num in numbers)
+    assert numbers == sorted(set(numbers))
+
+
+class _CountingPattern:
+    """取り出されたトークン数を数えるラッパー"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.tokens = 0
+
+    def finditer(self, text):
+        for match in self.pattern.finditer(text):
+            self.tokens += 1
+            yield match
+
+
+@pytest.mark.parametrize('text', ADVERSARIAL)
+def test_adversarial_work_is_bounded_by_token_cap(monkeypatch, text):
+    # 入力の長さによらず、調べるトークンは max_tokens 個（+打ち切り判定の1個）まで
+    counter = _CountingPattern(request_engine._NUMBER_TOKEN)
+    monkeypatch.setattr(request_engine, '_NUMBER_TOKEN', counter)
+    parse_request_numbers(text, 1000, max_tokens=8)
+    assert counter.tokens <= 9
+
+
+def test_tokens_after_cap_are_ignored():
+    assert parse_request_numbers("1 2 3 4 5", 10, max_tokens=3) == [1, 2, 3]
+
+
+def test_overlong_token_is_rejected():
+    assert parse_request_numbers("1" * 33 + " 2", 10) == [2]
+
+
+def _engine(max_tokens):
+    settings = SimpleNamespace(
+        pushwords=['お題 '],
+        pullwords=['消化済'],
+        push_manager_only=False,
+        pull_manager_only=False,
+        request_number_max_tokens=max_tokens,
+    )
+    engine = RequestEngine(settings, UserRegistry([], []))
+    for i in range(10):
+        engine.add(f'曲{i + 1}', 'viewer', 'youtube')
+    return engine
+
+
+def test_engine_uses_configured_token_cap():
+    engine = _engine(max_tokens=2)
+    engine.process_comment('y0', {'message': '消化済 1 2 3', 'author': 'a', 'platform': 'youtube'})
+    assert [req['content'] for req in engine.requests] == [f'曲{i}' for i in range(3, 11)]
+
+    # 設定の変更はすぐに反映される
+    engine.global_settings.request_number_max_tokens = 3
+    engine.process_comment('y0', {'message': '消化済 1 2 3', 'author': 'a', 'platform': 'youtube'})
+    assert [req['content'] for req in engine.requests] == [f'曲{i}' for i in range(6, 11)]
+
+
+def test_engine_huge_range_removes_only_existing_requests():
+    engine = _engine(max_tokens=32)
+    engine.process_comment('y0', {'message': '消化済 1-100000000', 'author': 'a', 'platform': 'youtube'})
+    assert engine.requests == []
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""stream_page（配信ページからのタイトル・概要欄の抽出）のテスト"""
+
+from pathlib import Path
+
+import pytest
+
+from stream_page import (find_player_response, parse_head_page, parse_youtube_page,
+                         player_response_loaded, read_page)
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+TITLE = '【作業】お題箱消化しながら雑談 </script> & "引用" #42'
+
+
+@pytest.fixture(scope='module')
+def watch_page():
+    # YouTubeの視聴ページ（構造はそのままに、巨大なスクリプト・JSONを削ったもの）
+    return (FIXTURES / 'youtube_watch.html').read_bytes()
+
+
+class SavedResponse:
+    """保存済みのページをネットワーク越しと同じ単位で返す"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def iter_content(self, chunk_size):
+        for offset in range(0, len(self.data), chunk_size):
+            yield self.data[offset:offset + chunk_size]
+
+
+def test_title_and_description_from_player_response(watch_page):
+    info = parse_youtube_page(watch_page)
+    assert info['title'] == TITLE
+    assert '■今日の内容\nお題箱消化 & 雑談\n' in info['description']
+    assert info['description'].endswith('#作業配信 #雑談')
+
+
+def test_player_response_is_decoded(watch_page):
+    player_response = find_player_response(watch_page)
+    assert player_response['videoDetails']['videoId'] == 'dQw4w9WgXcQ'
+    assert player_response['videoDetails']['isLive'] is True
+
+
+def test_microformat_title_when_video_details_has_none(watch_page):
+    data = watch_page.replace('"title":"【作業】'.encode('utf-8'), '"title":"","x":"【作業】'.encode('utf-8'), 1)
+    assert find_player_response(data)['videoDetails']['title'] == ''
+    assert parse_youtube_page(data)['title'] == TITLE
+
+
+def test_og_title_fallback_without_player_response(watch_page):
+    info = parse_youtube_page(watch_page.replace(b'ytInitialPlayerResponse', b'somethingElse'))
+    assert info['title'] == TITLE
+    # 概要欄はメタタグの要約（改行なし・途中まで）になる
+    assert info['description'].startswith('作業しながらまったり雑談します。')
+
+
+def test_title_tag_fallback_without_og_title(watch_page):
+    data = watch_page.replace(b'ytInitialPlayerResponse', b'somethingElse').replace(b'og:title', b'og:xxx')
+    assert parse_youtube_page(data)['title'] == TITLE
+
+
+def test_truncated_player_response_is_ignored(watch_page):
+    cut = watch_page.index(b'var meta')
+    assert find_player_response(watch_page[:cut]) is None
+
+
+@pytest.mark.parametrize('chunk_size', [1024, 4096, 64 * 1024])
+def test_read_page_stops_after_player_response(watch_page, monkeypatch, chunk_size):
+    import stream_page
+    monkeypatch.setattr(stream_page, 'CHUNK_SIZE', chunk_size)
+    consumed = read_page(SavedResponse(watch_page), player_response_loaded())
+    assert find_player_response(consumed) is not None
+    # ytInitialPlayerResponseのスクリプトの終わりを含む単位までで読むのをやめる
+    script_end = watch_page.index(b'</script>', watch_page.index(b'ytInitialPlayerResponse')) + len(b'</script>')
+    assert script_end <= len(consumed) < script_end + chunk_size
+    assert parse_youtube_page(consumed)['title'] == TITLE
+
+
+def test_parse_head_page():
+    data = ('<html><head><title> チャンネル - Twitch </title>'
+            '<meta property="og:title" content="配信者 - Twitch">'
+            '<meta property="og:description" content="お題箱消化 &amp; 雑談">'
+            '</head><body><meta property="og:title" content="body">').encode('utf-8')
+    assert parse_head_page(data) == {'title': '配信者 - Twitch', 'description': 'お題箱消化 & 雑談'}
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""TriggerMatcher（プッシュワード/プルワードの判定）のテスト"""
+
+import random
+
+import pytest
+
+from trigger_matcher import TriggerMatch, TriggerMatcher, _legacy_match
+
+
+PUSHWORDS = ['お題 ', 'お題　', 'リク ', 'リク　']
+PULLWORDS = ['リクあり', '消化済']
+
+
+@pytest.mark.parametrize('message, push, pull', [
+    ('お題 曲A', TriggerMatch('request_add', 'お題 ', '曲A'), None),
+    ('リク　曲B ', TriggerMatch('request_add', 'リク　', '曲B'), None),
+    ('今日のお題 曲A', None, None),                      # プッシュワードは先頭のみ
+    ('それ消化済 1 2', None, TriggerMatch('request_delete', '消化済', '1 2')),
+    ('リクあり 3-5', None, TriggerMatch('request_delete', 'リクあり', '3-5')),
+    ('お題 消化済', TriggerMatch('request_add', 'お題 ', '消化済'), TriggerMatch('request_delete', '消化済', '')),
+    ('', None, None),
+])
+def test_match(message, push, pull):
+    assert TriggerMatcher(PUSHWORDS, PULLWORDS).match(message) == (push, pull)
+
+
+def test_list_order_wins_over_length_and_position():
+    matcher = TriggerMatcher(['お', 'お題 '], ['済', '消化済'])
+    push, pull = matcher.match('お題 消化済 a 済 b')
+    assert push.word == 'お'
+    # 先のプルワードが優先され、その最初の出現位置以降が残りになる
+    assert (pull.word, pull.remaining) == ('済', 'a 済 b')
+
+
+def test_empty_words_are_ignored():
+    matcher = TriggerMatcher(['', 'お題 '], [''])
+    assert matcher.pushwords == ['お題 '] and matcher.pullwords == []
+    assert matcher.match('お題 x') == (TriggerMatch('request_add', 'お題 ', 'x'), None)
+
+
+@pytest.mark.parametrize('message, kind', [
+    ('お題 消化済', 'request_add'),
+    ('消化済', 'request_delete'),
+    ('こんにちは', None),
+])
+def test_classify(message, kind):
+    assert TriggerMatcher(PUSHWORDS, PULLWORDS).classify(message) == kind
+
+
+def test_matches_legacy_linear_scan():
+    # 重なり・包含関係のあるワードを含むランダムな組み合わせで従来実装と一致すること
+    rng = random.Random(0)
+    alphabet = 'あいリクお題消化済 　ab'
+    for _ in range(2000):
+        pushwords = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 5))]
+        pullwords = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 5))]
+        matcher = TriggerMatcher(pushwords, pullwords)
+        for _ in range(20):
+            message = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            assert matcher.match(message) == _legacy_match(message, pushwords, pullwords), (pushwords, pullwords, message)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""TwitchAPI.get_channels（users/streams/channelsの一括問い合わせ）のテスト"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from twitch_api import TwitchAPI
+
+
+class FakeHelix:
+    """TwitchAPI.helix_getの代わり（問い合わせを記録し、登録済みのチャンネルだけを返す）"""
+
+    def __init__(self, count=250, live=lambda i: i % 3 == 0):
+        self.requests = []
+        self.users = {f'user{i}': str(1000 + i) for i in range(count)}
+        self.live = {str(1000 + i) for i in range(count) if live(i)}
+        self.titles = {user_id: f'title {user_id}' for user_id in self.users.values()}
+        self.fail = set()
+
+    def __call__(self, endpoint, params):
+        self.requests.append((endpoint, params))
+        if endpoint in self.fail:
+            return None
+        values = [value for key, value in params if key != 'first']
+        if endpoint == 'users':
+            return {'data': [{'id': self.users[login], 'login': login.capitalize(),
+                              'description': f'about {login}'}
+                             for login in values if login in self.users]}
+        if endpoint == 'streams':
+            return {'data': [{'user_id': user_id, 'title': 'live ' + self.titles[user_id]}
+                             for user_id in values if user_id in self.live]}
+        if endpoint == 'channels':
+            return {'data': [{'broadcaster_id': user_id, 'title': self.titles[user_id]}
+                             for user_id in values]}
+        raise AssertionError(endpoint)
+
+    def sizes(self, endpoint):
+        """endpointへの各リクエストで指定したlogin/user_idの数"""
+        return [sum(1 for key, _ in params if key != 'first')
+                for name, params in self.requests if name == endpoint]
+
+
+@pytest.fixture
+def helix():
+    return FakeHelix()
+
+
+@pytest.fixture
+def api(helix, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    secret = SimpleNamespace(get_twitch_credentials=lambda: ('cid', 'secret'))
+    monkeypatch.setitem(sys.modules, 'config_secret', secret)
+    api = TwitchAPI()
+    api.helix_get = helix
+    return api
+
+
+def test_logins_are_sent_in_chunks_of_100(api, helix):
+    logins = [f'User{i}' for i in range(250)]
+    result = api.get_channels(logins)
+    assert len(result) == 250
+    assert helix.sizes('users') == [100, 100, 50]
+    assert helix.sizes('streams') == [100, 100, 50]
+    # streamsは配信中のものだけが返るため、件数の上限（first）も100にする
+    assert all(('first', 100) in params for name, params in helix.requests if name == 'streams')
+    # channelsは配信していない166件だけ
+    assert helix.sizes('channels') == [100, 66]
+
+
+def test_live_and_offline_titles(api, helix):
+    result = api.get_channels(['user0', 'user1', 'USER3'])
+    assert result == {
+        'user0': {'user_id': '1000', 'title': 'live title 1000', 'live': True},
+        'user1': {'user_id': '1001', 'title': 'title 1001', 'live': False},
+        'user3': {'user_id': '1003', 'title': 'live title 1003', 'live': True},
+    }
+    assert helix.sizes('channels') == [1]
+
+
+def test_offline_channel_without_title_is_none(api, helix):
+    helix.titles['1001'] = ''
+    assert api.get_channels(['user1'])['user1']['title'] is None
+
+
+def test_missing_login_is_left_out(api, helix):
+    result = api.get_channels(['user0', 'nobody', 'user1', ''])
+    assert set(result) == {'user0', 'user1'}
+    # 見つからなかったユーザーはstreams/channelsに問い合わせない
+    assert helix.sizes('streams') == [2]
+
+
+def test_user_ids_are_cached(api, helix):
+    api.get_channels(['user0', 'user1'])
+    helix.requests.clear()
+    api.get_channels(['user1', 'user2', 'user1'])
+    assert helix.sizes('users') == [1]
+    assert helix.sizes('streams') == [2]
+
+
+def test_description_without_titles(api, helix):
+    api.get_channels(['user0'])
+    helix.requests.clear()
+    result = api.get_channels(['user0'], with_description=True, with_titles=False)
+    assert result == {'user0': {'description': 'about user0', 'user_id': '1000', 'title': None, 'live': False}}
+    # 説明はusersにしかないため、ユーザーID取得済みでも問い合わせる
+    assert [name for name, _ in helix.requests] == ['users']
+
+
+def test_users_failure_returns_empty(api, helix):
+    helix.fail.add('users')
+    assert api.get_channels(['user0']) == {}
+
+
+def test_title_from_url_of_offline_channel(api):
+    # 配信していないチャンネルはチャンネル情報のタイトルを返す（スクレイピングにはまわさない）
+    assert api.get_title_from_url('https://www.twitch.tv/user1') == 'title 1001'
+    assert api.get_title_from_url('https://www.twitch.tv/user0?x=1') == 'live title 1000'
+    assert api.get_title_from_url('https://www.twitch.tv/nobody') is None
+    assert api.get_title_from_url('https://example.com/user0') is None
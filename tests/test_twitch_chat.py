@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""TwitchChatConnection（共有IRC接続）のテスト（ローカルの模擬IRCサーバを使う）"""
+
+import asyncio
+
+from twitch_chat import TwitchChatConnection
+
+
+class FakeIrcServer:
+    """受信した行を接続ごとに記録する模擬IRCサーバ"""
+
+    def __init__(self):
+        self.connections = []  # 接続ごとの受信行のリスト
+        self.writers = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        lines = []
+        self.connections.append(lines)
+        self.writers.append(writer)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            lines.append(line.decode('utf-8').rstrip('\r\n'))
+        writer.close()
+
+    async def close(self):
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def wait_until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, 'timed out'
+        await asyncio.sleep(0.01)
+
+
+def make_connection(server):
+    connection = TwitchChatConnection()
+    connection.SERVER = '127.0.0.1'
+    connection.PORT = server.port
+    connection.reconnect_delay = 0.05
+    return connection
+
+
+def test_join_dispatches_privmsg_to_subscribers():
+    async def scenario():
+        server = FakeIrcServer()
+        await server.start()
+        connection = make_connection(server)
+        received = []
+        connection.join('chan', 's1', received.append)
+        await wait_until(lambda: server.connections and 'JOIN #chan' in server.connections[0])
+
+        server.writers[0].write(b'@display-name=A :a!a@a PRIVMSG #chan :hello\r\n'
+                                b'@display-name=B :b!b@b PRIVMSG #other :ignored\r\n')
+        await wait_until(lambda: received)
+        assert [(m.display_name, m.text) for m in received] == [('A', 'hello')]
+
+        connection.part('chan', 's1')
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_join_right_after_last_part_reconnects():
+    # 最後の購読者が抜けた直後（取り消しが処理される前）に購読されても接続し直す
+    async def scenario():
+        server = FakeIrcServer()
+        await server.start()
+        connection = make_connection(server)
+        connection.join('a', 's1', lambda message: None)
+        await wait_until(lambda: server.connections and 'JOIN #a' in server.connections[0])
+
+        connection.part('a', 's1')
+        connection.join('b', 's2', lambda message: None)
+        await wait_until(lambda: len(server.connections) == 2 and 'JOIN #b' in server.connections[1])
+        assert connection._task is not None and not connection._task.done()
+        assert connection._transport is not None and not connection._transport.is_closing()
+
+        connection.part('b', 's2')
+        await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""TwitchIrcParser（バイト列のままのIRCパース）のテスト"""
+
+import pytest
+
+from twitch_irc_parser import TwitchIrcParser, parse_line, unescape_tag_value
+
+
+PRIVMSG = (
+    "@badge-info=subscriber/8;badges=moderator/1,subscriber/12;color=#1E90FF;"
+    "display-name=たぬき;emotes=;id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;"
+    "mod=1;room-id=12345678;tmi-sent-ts=1700000000000;user-id=87654321;user-type= "
+    ":tanuki!tanuki@tanuki.tmi.twitch.tv PRIVMSG #channel :お題 あいうえお\r\n"
+).encode('utf-8')
+
+
+def test_privmsg_fields():
+    (message,) = TwitchIrcParser().feed_bytes(PRIVMSG)
+    assert message.command == 'PRIVMSG'
+    assert message.channel == 'channel'
+    assert message.login == 'tanuki'
+    assert message.display_name == 'たぬき'
+    assert message.user_id == '87654321'
+    assert message.message_id == 'b34ccfc7-4977-403a-8a94-33c6bac34fb8'
+    assert message.sent_ts == 1700000000000
+    assert message.badges == 'moderator/1,subscriber/12'
+    assert message.text == 'お題 あいうえお'
+
+
+def test_privmsg_without_tags():
+    (message,) = TwitchIrcParser().feed_bytes(b':nick!nick@nick.tmi.twitch.tv PRIVMSG #chan :hello world\r\n')
+    assert (message.login, message.channel, message.text) == ('nick', 'chan', 'hello world')
+    assert message.display_name is None and message.sent_ts is None
+
+
+@pytest.mark.parametrize('line, command, text', [
+    (b'PING :tmi.twitch.tv\r\n', 'PING', 'tmi.twitch.tv'),
+    (b':tmi.twitch.tv RECONNECT\r\n', 'RECONNECT', None),
+    (b':tmi.twitch.tv 001 justinfan123 :Welcome, GLHF!\r\n', '001', 'Welcome, GLHF!'),
+])
+def test_other_commands(line, command, text):
+    (message,) = TwitchIrcParser().feed_bytes(line)
+    assert (message.command, message.text) == (command, text)
+
+
+def test_empty_lines_are_skipped():
+    assert TwitchIrcParser().feed_bytes(b'\r\n\r\nPING :x\r\n')[0].command == 'PING'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('plain', 'plain'),
+    (r'a\sb', 'a b'),
+    (r'a\:b', 'a;b'),
+    ('a\\\\b', 'a\\b'),
+    (r'a\r\nb', 'a\r\nb'),
+    (r'a\xb', 'axb'),    # 未知のエスケープはバックスラッシュだけ除く
+    ('ab\\', 'ab'),      # 末尾の単独バックスラッシュは捨てる
+])
+def test_unescape_tag_value(value, expected):
+    assert unescape_tag_value(value) == expected
+
+
+def test_tag_values_are_unescaped():
+    line = b'@display-name=a\\sb;badges= :n!n@n PRIVMSG #c :x'
+    message = parse_line(bytearray(line), 0, len(line))
+    assert message.display_name == 'a b'
+    assert message.badges == ''
+
+
+def test_invalid_sent_ts_is_ignored():
+    line = b'@tmi-sent-ts=abc :n!n@n PRIVMSG #c :x'
+    assert parse_line(bytearray(line), 0, len(line)).sent_ts is None
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 1000])
+def test_lines_split_across_chunks(chunk_size):
+    data = PRIVMSG * 5 + b'PING :tmi.twitch.tv\r\n'
+    parser = TwitchIrcParser(buffer_size=256, min_free=16)
+    messages = []
+    for offset in range(0, len(data), chunk_size):
+        messages += parser.feed_bytes(data[offset:offset + chunk_size])
+    assert [m.command for m in messages] == ['PRIVMSG'] * 5 + ['PING']
+    assert all(m.text == 'お題 あいうえお' for m in messages[:5])
+
+
+def test_multibyte_character_split_across_chunks():
+    parser = TwitchIrcParser()
+    split = PRIVMSG.index('あ'.encode('utf-8')) + 1
+    assert parser.feed_bytes(PRIVMSG[:split]) == []
+    (message,) = parser.feed_bytes(PRIVMSG[split:])
+    assert message.text == 'お題 あいうえお'
+
+
+def test_line_larger_than_empty_buffer():
+    # 空のバッファより長い1行を一度に受け取ってもバッファを広げて受ける
+    text = 'x' * 5000
+    parser = TwitchIrcParser(buffer_size=1024)
+    (message,) = parser.feed_bytes(f':n!n@n PRIVMSG #c :{text}\r\n'.encode())
+    assert message.text == text
+
+
+def test_line_larger_than_buffer_with_pending_data():
+    text = 'y' * 5000
+    data = f':n!n@n PRIVMSG #c :{text}\r\n'.encode()
+    parser = TwitchIrcParser(buffer_size=1024, min_free=64)
+    assert parser.feed_bytes(data[:500]) == []
+    (message,) = parser.feed_bytes(data[500:])
+    assert message.text == text
+
+
+def test_get_buffer_returns_requested_size():
+    parser = TwitchIrcParser(buffer_size=1024, min_free=64)
+    assert len(parser.get_buffer(8192)) >= 8192
+    view = parser.get_buffer()
+    view[:9] = b'PING :a\r\n'
+    assert parser.feed(9)[0].command == 'PING'
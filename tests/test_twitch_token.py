@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""TwitchTokenManager（アプリアクセストークンの保持・保存）と401時の取り直しのテスト"""
+
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import twitch_api
+import twitch_token
+from twitch_api import TwitchAPI
+from twitch_token import TwitchTokenManager
+
+
+class FakeResponse:
+    """requests.Responseの代わり（status_codeとJSONだけを持つ）"""
+
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error')
+
+
+class TokenEndpoint:
+    """http_client.postの代わり（呼ばれるたびに新しいトークンを発行する）"""
+
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, url, params=None, **kwargs):
+        self.calls.append(params)
+        if self.fail:
+            return FakeResponse(500)
+        return FakeResponse(data={'access_token': f'token{len(self.calls)}', 'expires_in': self.expires_in})
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    endpoint = TokenEndpoint()
+    monkeypatch.setattr(twitch_token.http_client, 'post', endpoint)
+    return endpoint
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / 'twitch_token.json')
+
+
+def make_manager(cache_file, client_id='cid'):
+    return TwitchTokenManager(client_id, 'secret', cache_file=cache_file, refresh_margin=600)
+
+
+def test_token_is_fetched_once_and_reused(endpoint, cache_file):
+    manager = make_manager(cache_file)
+    assert manager.get_token() == 'token1'
+    assert manager.get_token() == 'token1'
+    assert endpoint.calls == [{'client_id': 'cid', 'client_secret': 'secret', 'grant_type': 'client_credentials'}]
+
+
+@pytest.mark.parametrize('expires_in, refetched', [
+    (3600, False),
+    (700, False),
+    (599, True),    # 期限までrefresh_margin（600秒）を切っている
+    (0, True),
+])
+def test_token_is_refetched_within_refresh_margin(endpoint, cache_file, expires_in, refetched):
+    endpoint.expires_in = expires_in
+    manager = make_manager(cache_file)
+    manager.get_token()
+    assert manager.is_valid() is not refetched
+    assert manager.get_token() == ('token2' if refetched else 'token1')
+
+
+def test_token_round_trips_through_cache_file(endpoint, cache_file):
+    manager = make_manager(cache_file)
+    manager.get_token()
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['client_id'] == 'cid' and saved['access_token'] == 'token1'
+    assert saved['expires_at'] == pytest.approx(time.time() + 3600, abs=60)
+
+    # 再起動後も期限内なら取り直さない
+    restarted = make_manager(cache_file)
+    assert restarted.expires_at == manager.expires_at
+    assert restarted.get_token() == 'token1'
+    assert len(endpoint.calls) == 1
+
+
+def test_cached_token_of_other_client_is_ignored(endpoint, cache_file):
+    make_manager(cache_file).get_token()
+    other = make_manager(cache_file, client_id='other')
+    assert other.access_token is None
+    assert other.get_token() == 'token2'
+
+
+def test_expired_cached_token_is_refetched(endpoint, cache_file):
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({'client_id': 'cid', 'access_token': 'old', 'expires_at': time.time() + 60}, f)
+    manager = make_manager(cache_file)
+    assert manager.access_token == 'old' and not manager.is_valid()
+    assert manager.get_token() == 'token1'
+
+
+def test_broken_cache_file_is_ignored(endpoint, cache_file):
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        f.write('{"client_id": "cid", "access')
+    assert make_manager(cache_file).get_token() == 'token1'
+
+
+def test_invalidate_discards_only_rejected_token(endpoint, cache_file):
+    manager = make_manager(cache_file)
+    manager.get_token()
+    # 別のスレッドが取り直し済み（拒否されたのは古いトークン）なら何もしない
+    manager.invalidate('token0')
+    assert manager.get_token() == 'token1'
+    manager.invalidate('token1')
+    assert not manager.is_valid()
+    assert manager.get_token() == 'token2'
+
+
+def test_fetch_failure_returns_none(endpoint, cache_file):
+    endpoint.fail = True
+    manager = make_manager(cache_file)
+    assert manager.get_token() is None
+    assert manager.access_token is None
+
+
+class HelixEndpoint:
+    """http_client.getの代わり（statusesの順に応答し、送られたトークンを記録する）"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.tokens = []
+
+    def __call__(self, url, headers=None, params=None, **kwargs):
+        self.tokens.append(headers['Authorization'])
+        status = self.statuses.pop(0)
+        return FakeResponse(status, {'data': [{'url': url, 'params': params}]})
+
+
+@pytest.fixture
+def api(endpoint, tmp_path, monkeypatch):
+    # 認証情報はconfig_secret.pyから読み込む（トークンはカレントフォルダに保存される）
+    monkeypatch.chdir(tmp_path)
+    secret = SimpleNamespace(get_twitch_credentials=lambda: ('cid', 'secret'))
+    monkeypatch.setitem(sys.modules, 'config_secret', secret)
+    return TwitchAPI()
+
+
+def test_helix_get_retries_once_with_new_token_on_401(api, endpoint, monkeypatch):
+    helix = HelixEndpoint(401, 200)
+    monkeypatch.setattr(twitch_api.http_client, 'get', helix)
+    data = api.helix_get('users', {'login': 'foo'})
+    assert data['data'][0]['url'] == 'https://api.twitch.tv/helix/users'
+    assert helix.tokens == ['Bearer token1', 'Bearer token2']
+    assert api.access_token == 'token2'
+
+
+def test_helix_get_gives_up_after_second_401(api, endpoint, monkeypatch):
+    helix = HelixEndpoint(401, 401, 200)
+    monkeypatch.setattr(twitch_api.http_client, 'get', helix)
+    with pytest.raises(requests.HTTPError):
+        api.helix_get('users', {'login': 'foo'})
+    assert len(helix.tokens) == 2
+    assert len(endpoint.calls) == 2
+
+
+def test_helix_get_without_token_sends_nothing(api, endpoint, monkeypatch):
+    endpoint.fail = True
+    helix = HelixEndpoint()
+    monkeypatch.setattr(twitch_api.http_client, 'get', helix)
+    assert api.helix_get('users', {'login': 'foo'}) is None
+    assert helix.tokens == []
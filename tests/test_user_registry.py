@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""UserRegistry（管理者/NGユーザの索引）のテスト"""
+
+import pytest
+
+from user_registry import UserRegistry
+
+
+def user(platform, user_id, name='name'):
+    return {'platform': platform, 'id': user_id, 'name': name}
+
+
+@pytest.mark.parametrize('platform, user_id, key', [
+    ('twitch', 'SomeOne', ('twitch', 'someone')),
+    ('youtube', 'UCAbC', ('youtube', 'UCAbC')),   # YouTubeのチャンネルIDは大文字小文字を区別する
+    ('youtube', 123, ('youtube', '123')),
+])
+def test_make_key(platform, user_id, key):
+    assert UserRegistry.make_key(platform, user_id) == key
+
+
+def test_twitch_ids_ignore_case():
+    registry = UserRegistry(managers=[user('twitch', 'ModName')], ng_users=[user('twitch', 'troll')])
+    assert registry.is_manager('twitch', 'modname')
+    assert registry.is_manager('twitch', 'MODNAME')
+    assert registry.is_ng_user('twitch', 'Troll')
+    # 別の表記で登録したものも同じユーザーとして削除できる
+    registry.remove_manager(user('twitch', 'MODNAME'))
+    assert not registry.is_manager('twitch', 'ModName')
+
+
+def test_youtube_ids_are_case_sensitive():
+    registry = UserRegistry(managers=[user('youtube', 'UCAbC')])
+    assert registry.is_manager('youtube', 'UCAbC')
+    assert not registry.is_manager('youtube', 'ucabc')
+
+
+def test_platforms_are_separate():
+    registry = UserRegistry(ng_users=[user('twitch', 'same')])
+    assert registry.is_ng_user('twitch', 'same')
+    assert not registry.is_ng_user('youtube', 'same')
+    assert not registry.is_manager('twitch', 'same')
+
+
+def test_duplicates_are_reference_counted():
+    # リストに同じユーザーが複数回ある場合、全部削除されるまで登録されたまま
+    registry = UserRegistry(ng_users=[user('twitch', 'troll'), user('twitch', 'TROLL')])
+    registry.add_ng_user(user('twitch', 'Troll'))
+    for _ in range(2):
+        registry.remove_ng_user(user('twitch', 'troll'))
+        assert registry.is_ng_user('twitch', 'troll')
+    registry.remove_ng_user(user('twitch', 'troll'))
+    assert not registry.is_ng_user('twitch', 'troll')
+    # 登録されていないものの削除は何もしない（0未満にならない）
+    registry.remove_ng_user(user('twitch', 'troll'))
+    registry.add_ng_user(user('twitch', 'troll'))
+    assert registry.is_ng_user('twitch', 'troll')
+
+
+def test_rebuild_replaces_index():
+    registry = UserRegistry(managers=[user('youtube', 'UCold')], ng_users=[user('twitch', 'old')])
+    registry.rebuild([user('youtube', 'UCnew')], [])
+    assert not registry.is_manager('youtube', 'UCold')
+    assert registry.is_manager('youtube', 'UCnew')
+    assert not registry.is_ng_user('twitch', 'old')
+
+
+def test_large_ng_list():
+    ng_users = [user('youtube', f'UC{i:06d}') for i in range(20000)]
+    registry = UserRegistry(ng_users=ng_users)
+    assert registry.is_ng_user('youtube', 'UC019999')
+    assert not registry.is_ng_user('youtube', 'UC020000')
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Trigger Matcher Module
+プッシュワード/プルワードの判定をコメント1回の走査で行うマッチャ
+"""
+
+from collections import namedtuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 判定結果（kindは'request_add'または'request_delete'）
+TriggerMatch = namedtuple('TriggerMatch', ['kind', 'word', 'remaining'])
+
+_PUSH = 0
+_PULL = 1
+
+
+class TriggerMatcher:
+    """プッシュワード（前方一致）とプルワード（部分一致）のマッチャ
+
+    全ワードからAho-Corasickオートマトンを1度だけ構築し、コメントを
+    1文字ずつ1回走査するだけで両方の判定を行う。判定コストはワード数に
+    依存しない。複数のワードが一致した場合は従来どおりリスト順で先の
+    ワードを優先する。設定変更時は作り直すこと（インスタンスは不変）。
+    """
+
+    def __init__(self, pushwords, pullwords):
+        """
+        Args:
+            pushwords (list[str]): リクエスト追加ワード（コメント先頭で一致）
+            pullwords (list[str]): リクエスト削除ワード（コメント中のどこかで一致）
+        """
+        self.pushwords = [w for w in pushwords if w]
+        self.pullwords = [w for w in pullwords if w]
+
+        # goto[state] = {文字: 次の状態}, output[state] = [(種別, リスト順, ワード長), ...]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        # プッシュワードは前方一致なので、最長のプッシュワードより先は見なくてよい
+        self._max_push_len = max((len(w) for w in self.pushwords), default=0)
+
+        for order, word in enumerate(self.pushwords):
+            self._add_word(word, (_PUSH, order, len(word)))
+        for order, word in enumerate(self.pullwords):
+            self._add_word(word, (_PULL, order, len(word)))
+        self._build_failure_links()
+
+    def _add_word(self, word, entry):
+        state = 0
+        for ch in word:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(entry)
+
+    def _build_failure_links(self):
+        """幅優先で失敗遷移を張り、出力を失敗先から引き継ぐ"""
+        queue = list(self._goto[0].values())
+        index = 0
+        while index < len(queue):
+            state = queue[index]
+            index += 1
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def match(self, message):
+        """コメントを1回走査してプッシュワード/プルワードを判定
+
+        Args:
+            message (str): コメント本文
+
+        Returns:
+            tuple: (push, pull)。それぞれ一致しなければNone、一致すれば
+                TriggerMatch(kind, word, remaining)。remainingはワード以降の
+                テキスト（strip済み）。
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        max_push_len = self._max_push_len
+
+        push_order = None
+        push_len = 0
+        pull_order = None
+        pull_end = 0
+        state = 0
+        for pos, ch in enumerate(message):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = pos + 1
+            for kind, order, length in output[state]:
+                if kind == _PUSH:
+                    # 先頭から始まる一致のみ有効
+                    if end == length and (push_order is None or order < push_order):
+                        push_order = order
+                        push_len = length
+                elif pull_order is None or order < pull_order:
+                    # 同じワードは最初の出現位置を使う（orderが同じなら更新しない）
+                    pull_order = order
+                    pull_end = end
+            if pull_order == 0 and pos >= max_push_len:
+                break  # 最優先のプルワードが見つかり、プッシュワードの判定範囲も過ぎた
+
+        push = None
+        if push_order is not None:
+            push = TriggerMatch('request_add', self.pushwords[push_order], message[push_len:].strip())
+        pull = None
+        if pull_order is not None:
+            pull = TriggerMatch('request_delete', self.pullwords[pull_order], message[pull_end:].strip())
+        return push, pull
+
+    def classify(self, message):
+        """表示用のタグ種別を返す（プッシュワード優先）
+
+        Args:
+            message (str): コメント本文
+
+        Returns:
+            str: 'request_add' / 'request_delete' / None
+        """
+        push, pull = self.match(message)
+        if push:
+            return push.kind
+        if pull:
+            return pull.kind
+        return None
+
+
+def _legacy_match(message, pushwords, pullwords):
+    """従来の線形走査による判定（動作確認・ベンチマーク用）"""
+    push = None
+    for pushword in pushwords:
+        if message.startswith(pushword):
+            push = TriggerMatch('request_add', pushword, message[len(pushword):].strip())
+            break
+    pull = None
+    for pullword in pullwords:
+        if pullword in message:
+            pull = TriggerMatch('request_delete', pullword, message.split(pullword, 1)[1].strip())
+            break
+    return push, pull
+
+
+if __name__ == '__main__':
+    # 従来実装との一致確認は tests/test_trigger_matcher.py
+    import time
+
+    # ワード数を増やしたときの1コメントあたりの判定時間
+    messages = ['お題 ' + 'あいうえお' * 4, 'こんにちは、今日もよろしくお願いします！' * 2, 'リクあり 3-5']
+    for count in (4, 100, 1000):
+        pushwords = ['お題 ', 'お題　', 'リク ', 'リク　'] + [f'push{i} ' for i in range(count - 4)]
+        pullwords = ['リクあり', '消化済'] + [f'pull{i}' for i in range(count - 2)]
+        matcher = TriggerMatcher(pushwords, pullwords)
+        loops = 20000
+        start = time.perf_counter()
+        for i in range(loops):
+            _legacy_match(messages[i % 3], pushwords, pullwords)
+            _legacy_match(messages[i % 3], pushwords, pullwords)  # 表示とコマンド処理で2回
+        legacy_us = (time.perf_counter() - start) / loops * 1e6
+        start = time.perf_counter()
+        for i in range(loops):
+            matcher.match(messages[i % 3])
+        new_us = (time.perf_counter() - start) / loops * 1e6
+        print(f"words: {count:5d}  legacy x2: {legacy_us:7.2f} us/comment  matcher: {new_us:7.2f} us/comment")
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Twitch API Module
+Twitch Helix APIから配信タイトル・チャンネル説明を取得する
+"""
+
+import threading
+import logging
+
+import http_client
+from twitch_token import TwitchTokenManager
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchAPI:
+    """Twitch API クライアント（タイトル取得用）"""
+    
+    HELIX_URL = "https://api.twitch.tv/helix"
+    # Helixの1リクエストで指定できるlogin/user_idの上限
+    HELIX_BATCH_SIZE = 100
+    
+    def __init__(self):
+        """初期化"""
+        self.client_id = None
+        self.client_secret = None
+        self.token_manager = None
+        self.user_ids = {}  # login -> user_id（変わらないので起動中は保持する）
+        self._user_ids_lock = threading.Lock()
+        
+        # config_secret.py から認証情報を読み込む
+        try:
+            import config_secret
+            self.client_id, self.client_secret = config_secret.get_twitch_credentials()
+            logger.info("Twitch API credentials loaded from config_secret.py")
+        except ImportError:
+            logger.warning("config_secret.py not found - Twitch API title fetching disabled")
+        except Exception as e:
+            logger.warning(f"Failed to load Twitch API credentials: {e}")
+        
+        if self.client_id and self.client_secret:
+            # トークンは有効期限とともに保存し、再起動後も期限内なら再利用する
+            self.token_manager = TwitchTokenManager(self.client_id, self.client_secret)
+    
+    @property
+    def access_token(self):
+        """現在のアクセストークン（未取得ならNone）"""
+        return self.token_manager.access_token if self.token_manager else None
+    
+    def get_access_token(self):
+        """有効なアクセストークンを返す（期限切れ間近なら取り直す）"""
+        if not self.token_manager:
+            return None
+        return self.token_manager.get_token()
+    
+    def helix_get(self, endpoint, params):
+        """Helix APIにGETリクエストを送信
+        
+        トークンが拒否された場合（401）は取り直して1回だけやり直す。
+        
+        Args:
+            endpoint (str): 'users' や 'streams'
+            params (dict or list): クエリパラメータ
+            
+        Returns:
+            dict: レスポンスのJSON、トークンを取得できない場合はNone
+        """
+        for attempt in range(2):
+            token = self.get_access_token()
+            if not token:
+                return None
+            headers = {
+                "Client-ID": self.client_id,
+                "Authorization": f"Bearer {token}"
+            }
+            response = http_client.get(f"{self.HELIX_URL}/{endpoint}", headers=headers, params=params)
+            if response.status_code == 401 and attempt == 0:
+                logger.info("Twitch access token rejected, refreshing")
+                self.token_manager.invalidate(token)
+                continue
+            response.raise_for_status()
+            return response.json()
+    
+    def get_user_id(self, username):
+        """ユーザー名からユーザーIDを取得（取得済みならキャッシュから返す）"""
+        username = username.lower()
+        user_id = self.user_ids.get(username)
+        if user_id:
+            return user_id
+        try:
+            data = self.helix_get("users", {"login": username})
+            if data is None:
+                return None
+            
+            if data["data"]:
+                user_id = data["data"][0]["id"]
+                with self._user_ids_lock:
+                    self.user_ids[username] = user_id
+                logger.debug(f"Twitch user ID obtained: {username} -> {user_id}")
+                return user_id
+            else:
+                logger.warning(f"Twitch user not found: {username}")
+                return None
+                
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch user ID: {e}")
+            return None
+    
+    def get_stream_title(self, user_id):
+        """ユーザーIDから配信タイトルを取得"""
+        try:
+            data = self.helix_get("streams", {"user_id": user_id})
+            if data is None:
+                return None
+            
+            if data["data"]:
+                stream = data["data"][0]
+                title = stream["title"]
+                logger.info(f"Twitch stream title obtained: {title}")
+                return title
+            else:
+                logger.warning("Twitch stream is not live")
+                return None
+                
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch stream title: {e}")
+            return None
+    
+    def get_channels(self, usernames, with_description=False, with_titles=True):
+        """複数チャンネルのユーザーID・配信タイトル・説明をまとめて取得
+        
+        Helixは1リクエストで100件まで指定できるため、100チャンネル以下なら
+        users（ユーザーID未取得の場合か説明が必要な場合のみ）、streams（配信中のタイトル）、
+        channels（配信していないチャンネルのタイトル）の最大3リクエストで済む。
+        
+        Args:
+            usernames (list[str]): Twitchユーザー名（login）のリスト
+            with_description (bool): チャンネル説明も取得するか
+            with_titles (bool): タイトルを取得するか（Falseならstreams/channelsは問い合わせない）
+            
+        Returns:
+            dict: login -> {'user_id', 'title', 'live', 'description'}
+                （見つからなかったユーザーは含まない。descriptionはwith_description時のみ）
+        """
+        logins = list(dict.fromkeys(name.lower() for name in usernames if name))
+        result = {}
+        
+        # 1. ユーザーID（と説明）
+        lookup = logins if with_description else [login for login in logins if login not in self.user_ids]
+        for start in range(0, len(lookup), self.HELIX_BATCH_SIZE):
+            chunk = lookup[start:start + self.HELIX_BATCH_SIZE]
+            data = self.helix_get("users", [("login", login) for login in chunk])
+            if data is None:
+                return {}
+            with self._user_ids_lock:
+                for user in data["data"]:
+                    login = user["login"].lower()
+                    self.user_ids[login] = user["id"]
+                    if with_description:
+                        result[login] = {'description': user.get("description", "")}
+        
+        logins_by_id = {}
+        for login in logins:
+            user_id = self.user_ids.get(login)
+            if user_id:
+                logins_by_id[user_id] = login
+                result.setdefault(login, {}).update(user_id=user_id, title=None, live=False)
+            else:
+                logger.warning(f"Twitch user not found: {login}")
+                result.pop(login, None)
+        user_ids = list(logins_by_id) if with_titles else []
+        
+        # 2. 配信中のタイトル
+        for start in range(0, len(user_ids), self.HELIX_BATCH_SIZE):
+            chunk = user_ids[start:start + self.HELIX_BATCH_SIZE]
+            data = self.helix_get("streams", [("user_id", user_id) for user_id in chunk] + [("first", self.HELIX_BATCH_SIZE)])
+            for stream in (data or {}).get("data", []):
+                info = result[logins_by_id[stream["user_id"]]]
+                info.update(title=stream["title"], live=True)
+        
+        # 3. 配信していないチャンネルのタイトル（チャンネル情報に設定されたもの）
+        offline_ids = [user_id for user_id in user_ids if not result[logins_by_id[user_id]]['live']]
+        for start in range(0, len(offline_ids), self.HELIX_BATCH_SIZE):
+            chunk = offline_ids[start:start + self.HELIX_BATCH_SIZE]
+            data = self.helix_get("channels", [("broadcaster_id", user_id) for user_id in chunk])
+            for channel in (data or {}).get("data", []):
+                result[logins_by_id[channel["broadcaster_id"]]]['title'] = channel.get("title") or None
+        
+        logger.info(f"Twitch channels fetched: {len(result)} of {len(logins)} "
+                    f"({sum(1 for info in result.values() if info['live'])} live)")
+        return result
+    
+    def get_title_from_url(self, url):
+        """Twitch URLから配信タイトルを取得
+        
+        配信していないチャンネルは、チャンネル情報に設定されたタイトル
+        （次の配信で使われるもの）を返す。
+        
+        Args:
+            url (str): Twitch配信URL
+            
+        Returns:
+            str: 配信タイトル、取得失敗時・タイトル未設定時はNone
+        """
+        # URLからユーザー名を抽出
+        username = self.extract_username_from_url(url)
+        if not username:
+            logger.warning(f"Failed to extract username from URL: {url}")
+            return None
+        
+        try:
+            info = self.get_channels([username]).get(username.lower())
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch stream title: {e}")
+            return None
+        return info['title'] if info else None
+    
+    @staticmethod
+    def extract_username_from_url(url):
+        """Twitch URLからユーザー名を抽出"""
+        url = url.strip()
+        
+        # プロトコルを削除
+        if url.startswith('https://'):
+            url = url[8:]
+        elif url.startswith('http://'):
+            url = url[7:]
+        
+        # www. を削除
+        if url.startswith('www.'):
+            url = url[4:]
+        
+        # twitch.tv/ で始まるか確認
+        if url.startswith('twitch.tv/'):
+            username = url[10:].split('/')[0].split('?')[0]
+            return username
+        
+        return None
+    
+    def get_channel_description(self, username):
+        """チャンネルの説明（About）を取得
+        
+        Args:
+            username (str): Twitchユーザー名
+            
+        Returns:
+            str: チャンネル説明、取得失敗時は空文字列
+        """
+        try:
+            info = self.get_channels([username], with_description=True, with_titles=False).get(username.lower())
+            if info:
+                logger.info(f"Twitch channel description obtained for {username}")
+                return info.get('description', '')
+            else:
+                return ""
+                
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch channel description: {e}")
+            return ""
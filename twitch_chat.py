@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Twitch Chat Module
+全Twitch配信で1本のIRC接続を共有するための接続マネージャ
+"""
+
+import asyncio
+import socket
+import logging
+
+from twitch_irc_parser import TwitchIrcParser
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchIrcProtocol(asyncio.BufferedProtocol):
+    """受信データをTwitchIrcParserのバッファへ直接書き込むプロトコル
+
+    asyncioがget_buffer()で得た領域にrecv_into()するため、受信ごとの
+    bytes生成や文字列連結が発生しない。
+    """
+
+    def __init__(self, on_message):
+        """
+        Args:
+            on_message (callable): パース済みメッセージを受け取る関数
+        """
+        self.parser = TwitchIrcParser()
+        self.on_message = on_message
+        self.transport = None
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self.parser.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        for message in self.parser.feed(nbytes):
+            self.on_message(message)
+
+    def eof_received(self):
+        return False  # トランスポートを閉じる
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+class TwitchChatConnection:
+    """Twitch IRCへの共有接続
+
+    配信ごとにソケットを張る代わりに、1本の接続上でチャンネルを
+    JOIN/PARTし、受信したPRIVMSGをチャンネル名でstream_idごとの
+    ハンドラに振り分ける。メソッドはすべてReceiverRuntimeの
+    イベントループ上から呼ぶこと。
+    """
+
+    SERVER = 'irc.chat.twitch.tv'
+    PORT = 6667
+    NICKNAME = 'justinfan12345'  # 匿名接続用のニックネーム（justinfan + 数字）
+
+    def __init__(self):
+        self.channels = {}  # channel -> {stream_id: handler}
+        self.reconnect_delay = 2  # 再接続までの初期待機時間（秒）
+        self.max_reconnect_delay = 60  # 再接続待機時間の上限（秒）
+        self._transport = None
+        self._task = None
+        self._reconnect_requested = False  # サーバーからRECONNECTを受け取った
+
+    def join(self, channel, stream_id, handler):
+        """チャンネルの購読を開始（最初の購読者ならJOINを送信）
+
+        Args:
+            channel (str): チャンネル名（小文字）
+            stream_id (str): 配信ID
+            handler (callable): PRIVMSGを受け取る関数 handler(message)
+        """
+        subscribers = self.channels.setdefault(channel, {})
+        first = not subscribers
+        subscribers[stream_id] = handler
+
+        if self._task is None or self._task.done():
+            # 接続時に購読中の全チャンネルをJOINする
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        elif first:
+            self._send(f"JOIN #{channel}")
+        logger.info(f"Twitch channel subscribed: #{channel} -> {stream_id}")
+
+    def part(self, channel, stream_id):
+        """チャンネルの購読を終了（最後の購読者ならPARTを送信）
+
+        Args:
+            channel (str): チャンネル名（小文字）
+            stream_id (str): 配信ID
+        """
+        subscribers = self.channels.get(channel)
+        if subscribers is None:
+            return
+        subscribers.pop(stream_id, None)
+        if not subscribers:
+            del self.channels[channel]
+            self._send(f"PART #{channel}")
+        logger.info(f"Twitch channel unsubscribed: #{channel} -> {stream_id}")
+
+        # 購読がなくなったら接続を閉じる
+        # （取り消しが処理される前にjoin()が呼ばれても新しいタスクで接続し直せるよう、
+        #   取り消したタスクは手放す）
+        if not self.channels and self._task and not self._task.done():
+            self._task.cancel()
+            self._task = None
+
+    def _send(self, line):
+        """1行送信（未接続なら何もしない。再接続時にまとめてJOINする）"""
+        if self._transport is None or self._transport.is_closing():
+            return
+        try:
+            self._transport.write(f"{line}\r\n".encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Failed to send to Twitch IRC: {e}")
+
+    async def _run(self):
+        """接続を維持するタスク（切断時は指数バックオフで再接続）"""
+        loop = asyncio.get_running_loop()
+        delay = self.reconnect_delay
+        while self.channels:
+            transport = None
+            try:
+                logger.info(f"Connecting to Twitch IRC: {self.SERVER}:{self.PORT}")
+                transport, protocol = await loop.create_connection(
+                    lambda: TwitchIrcProtocol(self._on_message),
+                    self.SERVER, self.PORT, family=socket.AF_INET
+                )
+                self._transport = transport
+                self._send(f"NICK {self.NICKNAME}")
+                # タグを有効化（ユーザー情報を取得するため）
+                self._send("CAP REQ :twitch.tv/tags")
+                self._send("CAP REQ :twitch.tv/commands")
+                self._send("JOIN " + ",".join(f"#{channel}" for channel in self.channels))
+                logger.info(f"Twitch IRC connected, joined {len(self.channels)} channels")
+
+                delay = self.reconnect_delay
+                exc = await protocol.closed
+                if self._reconnect_requested:
+                    logger.info("Twitch IRC requested reconnect")
+                elif exc:
+                    logger.warning(f"Twitch IRC connection lost: {exc}")
+                else:
+                    logger.warning("Twitch IRC connection closed by server")
+            except Exception as e:
+                logger.error(f"Twitch IRC connection error: {e}")
+            finally:
+                if transport:
+                    transport.close()
+                # 取り消された後に新しいタスクが接続していれば、その接続は残す
+                if self._transport is transport:
+                    self._transport = None
+
+            if not self.channels:
+                break
+            if self._reconnect_requested:
+                # サーバー都合の切断なので待たずに再接続する
+                self._reconnect_requested = False
+                continue
+            logger.info(f"Reconnecting to Twitch IRC in {delay} seconds...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_message(self, message):
+        """受信した1メッセージを処理（PING/RECONNECTへの対応とPRIVMSGの振り分け）"""
+        command = message.command
+        if command == 'PRIVMSG':
+            if message.text is not None:
+                self._dispatch(message)
+        elif command == 'PING':
+            self._send("PONG :tmi.twitch.tv")
+        elif command == 'RECONNECT':
+            # サーバーのメンテナンス前通知。接続を閉じると_run()がすぐに張り直す
+            self._reconnect_requested = True
+            if self._transport:
+                self._transport.close()
+
+    def _dispatch(self, message):
+        """PRIVMSGをチャンネルの購読者に振り分け"""
+        subscribers = self.channels.get(message.channel)
+        if not subscribers:
+            return
+        for stream_id, handler in list(subscribers.items()):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Error in Twitch message handler for {stream_id}: {e}")
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Twitch Token Module
+Twitch APIのアプリアクセストークン（Client Credentials）を有効期限付きで保持・保存する
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+
+import http_client
+from persistence import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchTokenManager:
+    """アプリアクセストークンの管理クラス
+
+    取得したトークンを有効期限とともにファイルへ保存し、再起動後も
+    期限内であればそのまま使う。期限の refresh_margin 秒前になったら
+    次の呼び出しで取り直すため、使用中に期限切れになることはない。
+    期限内でもAPIが401を返した場合は invalidate() で破棄して取り直す。
+    """
+
+    TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+
+    def __init__(self, client_id, client_secret, cache_file='twitch_token.json', refresh_margin=600):
+        """
+        Args:
+            client_id (str): TwitchアプリのClient ID
+            client_secret (str): TwitchアプリのClient Secret
+            cache_file (str): トークンの保存先
+            refresh_margin (int): 有効期限の何秒前に取り直すか
+        """
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self.access_token = None
+        self.expires_at = 0.0  # UNIX時刻
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """保存済みのトークンを読み込み（別のClient IDのものは使わない）"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('client_id') == self.client_id:
+                self.access_token = data.get('access_token')
+                self.expires_at = float(data.get('expires_at', 0))
+                logger.debug(f"Twitch token loaded (expires in {self.expires_at - time.time():.0f}s)")
+        except Exception as e:
+            logger.warning(f"Failed to load Twitch token cache: {e}")
+
+    def _save(self):
+        try:
+            atomic_write_json(self.cache_file, {
+                'client_id': self.client_id,
+                'access_token': self.access_token,
+                'expires_at': self.expires_at,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to save Twitch token cache: {e}")
+
+    def is_valid(self):
+        """トークンがあり、有効期限まで refresh_margin 秒以上残っているか"""
+        return bool(self.access_token) and time.time() < self.expires_at - self.refresh_margin
+
+    def get_token(self):
+        """有効なアクセストークンを返す（必要なら取得する。どのスレッドからでも呼べる）
+
+        Returns:
+            str: アクセストークン、取得失敗時はNone
+        """
+        with self._lock:
+            if self.is_valid():
+                return self.access_token
+            return self._fetch()
+
+    def invalidate(self, token):
+        """APIに拒否されたトークンを破棄（他のスレッドが取り直し済みなら何もしない）
+
+        Args:
+            token (str): 拒否されたトークン
+        """
+        with self._lock:
+            if self.access_token == token:
+                self.access_token = None
+                self.expires_at = 0.0
+
+    def _fetch(self):
+        """OAuth 2.0 Client Credentials Flow でアクセストークンを取得して保存"""
+        if not self.client_id or not self.client_secret:
+            return None
+
+        params = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "grant_type": "client_credentials"
+        }
+
+        try:
+            response = http_client.post(self.TOKEN_URL, params=params)
+            response.raise_for_status()
+
+            data = response.json()
+            self.access_token = data["access_token"]
+            self.expires_at = time.time() + data.get("expires_in", 0)
+            self._save()
+
+            logger.info(f"Twitch API access token obtained (expires in {data.get('expires_in', 0)}s)")
+            return self.access_token
+
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch access token: {e}")
+            return None
@@ -3,7 +3,7 @@
 import os
 import sys
 import json
-import requests
+import http_client
 import zipfile
 import shutil
 import subprocess
@@ -72,7 +72,7 @@ class GitHubUpdater:
         # self.ico=self.ico_path('icon.ico')
         ret = None
         url = f'https://github.com/{self.github_author}/{self.github_repo}/tags'
-        r = requests.get(url)
+        r = http_client.get(url)
         soup = BeautifulSoup(r.text,features="html.parser")
         for tag in soup.find_all('a'):
             if 'releases/tag/' in tag['href']:
@@ -164,7 +164,8 @@ class GitHubUpdater:
         """
         self.update_status("最新版をダウンロード中...", 0)
         
-        response = requests.get(url, stream=True, timeout=30)
+        # ダウンロードは大きいので読み込みのタイムアウトを長めにする
+        response = http_client.get(url, stream=True, timeout=(3.05, 30))
         response.raise_for_status()
         
         total_size = int(response.headers.get('content-length', 0))
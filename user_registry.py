@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+User Registry Module
+管理者/NGユーザを(platform, id)で引ける索引
+"""
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UserRegistry:
+    """GlobalSettingsの管理者リスト・NGユーザリストの索引
+
+    リスト（設定ファイルに保存される本体）と並行して
+    (platform, id) -> 登録数 の辞書を持ち、コメントごとの判定を
+    リストの長さによらずO(1)で行う。Twitchのログイン名は大文字小文字を
+    区別しないため、IDを小文字にそろえて登録する。
+
+    更新はメインスレッドから、判定は受信スレッドからも行われる。
+    辞書の参照・更新は1操作ずつアトミックなので判定側はロック不要、
+    更新側のみロックで直列化する。
+    """
+
+    def __init__(self, managers=None, ng_users=None):
+        """
+        Args:
+            managers (list[dict]): 管理者リスト（platform, id, name）
+            ng_users (list[dict]): NGユーザリスト（platform, id, name）
+        """
+        self._lock = threading.Lock()
+        self._managers = {}
+        self._ng_users = {}
+        self.rebuild(managers or [], ng_users or [])
+
+    @staticmethod
+    def make_key(platform, user_id):
+        """索引のキーを作成
+
+        Args:
+            platform (str): 'youtube' または 'twitch'
+            user_id (str): ユーザーID
+
+        Returns:
+            tuple: (platform, 正規化したID)
+        """
+        user_id = str(user_id)
+        if platform == 'twitch':
+            user_id = user_id.lower()
+        return (platform, user_id)
+
+    def rebuild(self, managers, ng_users):
+        """リスト全体から索引を作り直す（設定ロード時など）"""
+        new_managers = {}
+        for entry in managers:
+            key = self.make_key(entry['platform'], entry['id'])
+            new_managers[key] = new_managers.get(key, 0) + 1
+        new_ng_users = {}
+        for entry in ng_users:
+            key = self.make_key(entry['platform'], entry['id'])
+            new_ng_users[key] = new_ng_users.get(key, 0) + 1
+        with self._lock:
+            self._managers = new_managers
+            self._ng_users = new_ng_users
+        logger.debug(f"User registry rebuilt: {len(new_managers)} managers, {len(new_ng_users)} NG users")
+
+    @staticmethod
+    def _add(index, key):
+        index[key] = index.get(key, 0) + 1
+
+    @staticmethod
+    def _remove(index, key):
+        count = index.get(key, 0)
+        if count > 1:
+            index[key] = count - 1
+        else:
+            index.pop(key, None)
+
+    def add_manager(self, entry):
+        """管理者エントリを索引に追加"""
+        with self._lock:
+            self._add(self._managers, self.make_key(entry['platform'], entry['id']))
+
+    def remove_manager(self, entry):
+        """管理者エントリを索引から削除"""
+        with self._lock:
+            self._remove(self._managers, self.make_key(entry['platform'], entry['id']))
+
+    def add_ng_user(self, entry):
+        """NGユーザエントリを索引に追加"""
+        with self._lock:
+            self._add(self._ng_users, self.make_key(entry['platform'], entry['id']))
+
+    def remove_ng_user(self, entry):
+        """NGユーザエントリを索引から削除"""
+        with self._lock:
+            self._remove(self._ng_users, self.make_key(entry['platform'], entry['id']))
+
+    def is_manager(self, platform, user_id):
+        """管理者かどうか（どのスレッドからでも呼べる）"""
+        return self.make_key(platform, user_id) in self._managers
+
+    def is_ng_user(self, platform, user_id):
+        """NGユーザかどうか（どのスレッドからでも呼べる）"""
+        return self.make_key(platform, user_id) in self._ng_users
@@ -9,12 +9,12 @@ import re
 import webbrowser
 import urllib.parse
 import requests
-from bs4 import BeautifulSoup
 import datetime
 from collections import deque
 import logging
 import traceback
 import socket
+import asyncio
 
 # IPv4を強制する設定
 from urllib3.util import connection
@@ -32,6 +32,20 @@ from obssocket import OBSSocket
 # 分割したモジュールをインポート
 from gui_components import GUIComponents
 from comment_handler import CommentHandler
+from comment_queue import CommentQueue
+from receiver_runtime import ReceiverRuntime
+from twitch_chat import TwitchChatConnection
+from user_registry import UserRegistry
+from request_engine import RequestEngine
+from request_journal import RequestJournal
+from persistence import PersistenceService, atomic_write_json, atomic_write_text
+from overlay_server import OverlayServer
+from obs_supervisor import ObsSupervisor
+import http_client
+import stream_page
+from metadata_cache import MetadataCache
+from fetch_pool import FetchPool
+from twitch_api import TwitchAPI
 from update import GitHubUpdater
 
 # グローバル設定を先に読み込んでログレベルを決定
@@ -233,6 +247,8 @@ class GlobalSettings:
         # 共通トリガーワード設定
         self.pushwords = ['お題 ', 'お題　', 'リク ', 'リク　']
         self.pullwords = ['リクあり', '消化済']
+        # 削除コマンドの番号指定で受け付ける最大トークン数（"1 3-5 7"なら3）
+        self.request_number_max_tokens = 32
         
         # 共通権限設定
         self.push_manager_only = False
@@ -251,15 +267,26 @@ class GlobalSettings:
         # 告知テンプレート設定
         self.announcement_template = '配信開始しました！'  # 基本の告知文のテンプレート
         
+        # オーバーレイ配信サーバ設定（http://127.0.0.1:<port>/html/ でブラウザソースを配信）
+        self.overlay_server_enabled = True
+        self.overlay_server_port = 8765
+        
         # 配信内容取得設定
         self.content_marker = '今日の内容:'  # 概要欄から配信内容を取得する際のマーカー文字列
         
+        # 配信タイトル・概要欄のキャッシュ設定
+        self.metadata_cache_ttl = 300  # 取得後、取り直さずに使う時間（秒）。古いものも表示には使い、裏で取り直す
+        
         # 告知設定
         self.announcement_template = '配信開始しました！'  # 基本の告知文テンプレート
         
+    def snapshot(self):
+        """保存用に設定のコピーを返す（リストはコピーする）"""
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in self.__dict__.items()}
+    
     def save(self, filename='global_settings.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.__dict__, f, indent=2, ensure_ascii=False)
+        atomic_write_json(filename, self.__dict__)
     
     def load(self, filename='global_settings.json'):
         if os.path.exists(filename):
@@ -305,233 +332,38 @@ class GlobalSettings:
         if not hasattr(self, 'ng_users'):
             self.ng_users = []
 
-class TwitchAPI:
-    """Twitch API クライアント（タイトル取得用）"""
-    
-    def __init__(self):
-        """初期化"""
-        self.access_token = None
-        self.client_id = None
-        self.client_secret = None
-        
-        # config_secret.py から認証情報を読み込む
-        try:
-            import config_secret
-            self.client_id, self.client_secret = config_secret.get_twitch_credentials()
-            logger.info("Twitch API credentials loaded from config_secret.py")
-        except ImportError:
-            logger.warning("config_secret.py not found - Twitch API title fetching disabled")
-        except Exception as e:
-            logger.warning(f"Failed to load Twitch API credentials: {e}")
-    
-    def get_access_token(self):
-        """OAuth 2.0 Client Credentials Flow でアクセストークンを取得"""
-        if not self.client_id or not self.client_secret:
-            return None
-        
-        url = "https://id.twitch.tv/oauth2/token"
-        
-        params = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": "client_credentials"
-        }
-        
-        try:
-            response = requests.post(url, params=params, timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            self.access_token = data["access_token"]
-            
-            logger.info("Twitch API access token obtained")
-            return self.access_token
-            
-        except Exception as e:
-            logger.warning(f"Failed to get Twitch access token: {e}")
-            return None
-    
-    def get_user_id(self, username):
-        """ユーザー名からユーザーIDを取得"""
-        if not self.access_token:
-            if not self.get_access_token():
-                return None
-        
-        url = "https://api.twitch.tv/helix/users"
-        
-        headers = {
-            "Client-ID": self.client_id,
-            "Authorization": f"Bearer {self.access_token}"
-        }
-        
-        params = {
-            "login": username
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data["data"]:
-                user_id = data["data"][0]["id"]
-                logger.debug(f"Twitch user ID obtained: {username} -> {user_id}")
-                return user_id
-            else:
-                logger.warning(f"Twitch user not found: {username}")
-                return None
-                
-        except Exception as e:
-            logger.warning(f"Failed to get Twitch user ID: {e}")
-            return None
-    
-    def get_stream_title(self, user_id):
-        """ユーザーIDから配信タイトルを取得"""
-        if not self.access_token:
-            if not self.get_access_token():
-                return None
-        
-        url = "https://api.twitch.tv/helix/streams"
-        
-        headers = {
-            "Client-ID": self.client_id,
-            "Authorization": f"Bearer {self.access_token}"
-        }
-        
-        params = {
-            "user_id": user_id
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data["data"]:
-                stream = data["data"][0]
-                title = stream["title"]
-                logger.info(f"Twitch stream title obtained: {title}")
-                return title
-            else:
-                logger.warning("Twitch stream is not live")
-                return None
-                
-        except Exception as e:
-            logger.warning(f"Failed to get Twitch stream title: {e}")
-            return None
-    
-    def get_title_from_url(self, url):
-        """Twitch URLから配信タイトルを取得
-        
-        Args:
-            url (str): Twitch配信URL
-            
-        Returns:
-            str: 配信タイトル、取得失敗時はNone
-        """
-        # URLからユーザー名を抽出
-        username = self.extract_username_from_url(url)
-        if not username:
-            logger.warning(f"Failed to extract username from URL: {url}")
-            return None
-        
-        # ユーザーIDを取得
-        user_id = self.get_user_id(username)
-        if not user_id:
-            return None
-        
-        # タイトルを取得
-        return self.get_stream_title(user_id)
-    
-    @staticmethod
-    def extract_username_from_url(url):
-        """Twitch URLからユーザー名を抽出"""
-        url = url.strip()
-        
-        # プロトコルを削除
-        if url.startswith('https://'):
-            url = url[8:]
-        elif url.startswith('http://'):
-            url = url[7:]
-        
-        # www. を削除
-        if url.startswith('www.'):
-            url = url[4:]
-        
-        # twitch.tv/ で始まるか確認
-        if url.startswith('twitch.tv/'):
-            username = url[10:].split('/')[0].split('?')[0]
-            return username
-        
-        return None
-    
-    def get_channel_description(self, username):
-        """チャンネルの説明（About）を取得
-        
-        Args:
-            username (str): Twitchユーザー名
-            
-        Returns:
-            str: チャンネル説明、取得失敗時は空文字列
-        """
-        if not self.access_token:
-            if not self.get_access_token():
-                return ""
-        
-        url = "https://api.twitch.tv/helix/users"
-        
-        headers = {
-            "Client-ID": self.client_id,
-            "Authorization": f"Bearer {self.access_token}"
-        }
-        
-        params = {
-            "login": username
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data["data"]:
-                user = data["data"][0]
-                description = user.get("description", "")
-                logger.info(f"Twitch channel description obtained for {username}")
-                return description
-            else:
-                logger.warning(f"Twitch user not found: {username}")
-                return ""
-                
-        except Exception as e:
-            logger.warning(f"Failed to get Twitch channel description: {e}")
-            return ""
-
 class CommentReceiver:
-    """コメント受信の基底クラス"""
-    def __init__(self, settings):
+    """コメント受信の基底クラス（ReceiverRuntimeのループ上でrun()を実行する）"""
+    def __init__(self, settings, runtime):
         self.settings = settings
+        self.runtime = runtime
         self.stop_event = threading.Event()
+        self.finished = threading.Event()  # run()の終了通知（StreamManagerが待機に使う）
         
-    def start(self):
+    async def run(self):
         raise NotImplementedError
         
     def stop(self):
         self.stop_event.set()
 
 class YouTubeCommentReceiver(CommentReceiver):
-    """YouTubeコメント受信クラス（pytchat使用）"""
-    def __init__(self, settings, callback, global_settings):
-        super().__init__(settings)
+    """YouTubeコメント受信クラス（pytchat使用）
+    
+    pytchatのAPIは同期のため、HTTP取得だけをruntime.run_blocking()で
+    ワーカースレッドに逃がし、待機はイベントループ上で行う。
+    """
+    def __init__(self, settings, callback, global_settings, runtime, user_registry):
+        super().__init__(settings, runtime)
         self.callback = callback
         self.global_settings = global_settings
+        self.user_registry = user_registry
         self.livechat = None
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 30  # 最大再接続試行回数
         self.reconnect_delay = 2  # 再接続までの待機時間（秒）
+        self.min_poll_interval = 0.5  # ポーリング間隔の下限（秒）
+        self.max_poll_interval = 5.0  # ポーリング間隔の上限（秒）
+        self.default_poll_interval = 1.0  # continuationから待機時間が得られない場合の間隔（秒）
         
     def extract_video_id(self, url):
         """URLからビデオIDを抽出"""
@@ -562,42 +394,34 @@ class YouTubeCommentReceiver(CommentReceiver):
         debug_print(f"DEBUG: Creating pytchat.create with video_id: {video_id}")
         
         # interruptable=Falseでシグナルハンドラを無効化（スレッドで動作可能に）
-        # 高速化のために内部ポーリング間隔を短縮（monkey patch）
-        try:
-            import pytchat.core.livechat as ptc_livechat
-            # pytchatのデフォルトポーリング間隔を短縮
-            if hasattr(ptc_livechat, '_POLLING_INTERVAL'):
-                original_interval = ptc_livechat._POLLING_INTERVAL
-                ptc_livechat._POLLING_INTERVAL = 1.0  # 1秒に短縮
-                debug_print(f"DEBUG: Changed pytchat polling interval from {original_interval} to 1.0")
-        except Exception as patch_error:
-            debug_print(f"DEBUG: Could not patch pytchat polling interval: {patch_error}")
-        
         livechat = pytchat.create(video_id=video_id, interruptable=False)
         
-        # livechatオブジェクト作成後にもポーリング間隔を設定
-        try:
-            if hasattr(livechat, 'processor'):
-                processor = livechat.processor
-                if hasattr(processor, 'continuation'):
-                    continuation = processor.continuation
-                    if hasattr(continuation, 'fetch_interval'):
-                        original = getattr(continuation, 'fetch_interval', None)
-                        continuation.fetch_interval = 1.0
-                        debug_print(f"DEBUG: Set livechat fetch_interval to 1.0 (was: {original})")
-        except Exception as patch_error:
-            debug_print(f"DEBUG: Could not patch livechat fetch_interval: {patch_error}")
-        
         debug_print(f"DEBUG: pytchat.create successful, livechat object created")
         return livechat
+    
+    def next_poll_delay(self, chatdata, elapsed):
+        """次回のget()までの待機時間を計算
+        
+        continuationが返すtimeoutMs（chatdata.interval）を次回取得までの目安とし、
+        受信後の処理にかかった時間を差し引いて下限・上限でクランプする。
+        
+        Args:
+            chatdata: livechat.get()の戻り値
+            elapsed (float): 受信後からここまでの経過時間（秒）
+            
+        Returns:
+            float: 待機時間（秒）
+        """
+        hint = getattr(chatdata, 'interval', 0) or self.default_poll_interval
+        delay = hint - elapsed
+        return max(self.min_poll_interval, min(self.max_poll_interval, delay))
         
-    def start(self):
+    async def run(self):
         """pytchatを使ったコメント受信（自動再接続対応）"""
         video_id = None
         
         try:
-            debug_print(f"DEBUG: YouTubeCommentReceiver.start() called")
-            debug_print(f"DEBUG: Thread ID: {threading.current_thread().ident}")
+            debug_print(f"DEBUG: YouTubeCommentReceiver.run() called")
             video_id = self.extract_video_id(self.settings.url)
             
             if not video_id:
@@ -616,7 +440,7 @@ class YouTubeCommentReceiver(CommentReceiver):
         while not self.stop_event.is_set() and self.reconnect_attempts < self.max_reconnect_attempts:
             try:
                 # livechatオブジェクトを作成
-                self.livechat = self.create_livechat(video_id)
+                self.livechat = await self.runtime.run_blocking(self.create_livechat, video_id)
                 
                 # 接続成功したら試行回数をリセット
                 if self.reconnect_attempts > 0:
@@ -627,18 +451,18 @@ class YouTubeCommentReceiver(CommentReceiver):
                 debug_print(f"DEBUG: Starting comment loop")
                 
                 message_count = 0
-                get_call_count = 0
                 
                 while not self.stop_event.is_set() and self.livechat.is_alive():
+                    # 取得失敗時は下限間隔で再試行
+                    delay = self.min_poll_interval
                     try:
-                        get_call_count += 1
-                        if get_call_count % 100 == 0:
-                            import datetime
-                            timestamp_str = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            debug_print(f"DEBUG: [{timestamp_str}] YouTube: get() called {get_call_count} times")
+                        # pytchatのget()を呼び出し（1回のHTTP取得）
+                        chatdata = await self.runtime.run_blocking(self.livechat.get)
+                        received_at = time.monotonic()
                         
-                        # pytchatのget()を呼び出し
-                        for comment in self.livechat.get().sync_items():
+                        # sync_items()は件数に応じてsleepを挟むため、itemsを直接走査して即座に渡す
+                        items = getattr(chatdata, 'items', None) or []
+                        for comment in items:
                             if self.stop_event.is_set():
                                 break
                             
@@ -655,12 +479,8 @@ class YouTubeCommentReceiver(CommentReceiver):
                                 comment_time_str = comment.datetime
                                 debug_print(f"DEBUG: YouTube comment - Posted: {comment_time_str}, Received: {now_str}")
                             
-                            # 管理者判定（新形式）
-                            is_moderator = False
-                            for manager in self.global_settings.managers:
-                                if manager['platform'] == 'youtube' and manager['id'] == comment.author.channelId:
-                                    is_moderator = True
-                                    break
+                            # 管理者判定
+                            is_moderator = self.user_registry.is_manager('youtube', comment.author.channelId)
                                 
                             comment_data = {
                                 'platform': 'youtube',
@@ -682,6 +502,8 @@ class YouTubeCommentReceiver(CommentReceiver):
                                     return  # 完全に終了
                                 else:
                                     logger.error(f"Error in callback: {callback_error}")
+                        
+                        delay = self.next_poll_delay(chatdata, time.monotonic() - received_at)
                             
                     except Exception as inner_e:
                         error_str = str(inner_e)
@@ -705,10 +527,8 @@ class YouTubeCommentReceiver(CommentReceiver):
                             debug_print(f"DEBUG: Error in YouTube chat loop: {inner_e}")
                             logger.error(f"Error in YouTube chat loop: {inner_e}")
                     
-                    # 最小限の待機（0.01秒）でget()を頻繁に呼び出す
-                    if self.stop_event.is_set():
-                        break
-                    time.sleep(0.01)
+                    # 次回の取得時刻まで待機（停止時はタスクのキャンセルで即座に抜ける）
+                    await asyncio.sleep(delay)
                 
                 # ループを抜けた理由を確認
                 if not self.livechat.is_alive():
@@ -753,10 +573,10 @@ class YouTubeCommentReceiver(CommentReceiver):
                             pass
                         self.livechat = None
                     
-                    # 再接続前に待機
+                    # 再接続前に待機（停止時はタスクのキャンセルで即座に抜ける）
                     if not self.stop_event.is_set():
                         debug_print(f"DEBUG: Waiting {self.reconnect_delay} seconds before reconnection...")
-                        time.sleep(self.reconnect_delay)
+                        await asyncio.sleep(self.reconnect_delay)
                     # 外側のループが再度試行
                 else:
                     # 再接続不要なエラー
@@ -781,13 +601,15 @@ class YouTubeCommentReceiver(CommentReceiver):
 
 
 class TwitchCommentReceiver(CommentReceiver):
-    """Twitchコメント受信クラス（標準ライブラリのsocketでIRC接続）"""
-    def __init__(self, settings, callback, global_settings):
-        super().__init__(settings)
+    """Twitchコメント受信クラス（共有IRC接続でチャンネルを購読）"""
+    def __init__(self, settings, callback, global_settings, runtime, connection, user_registry):
+        super().__init__(settings, runtime)
         self.callback = callback
         self.global_settings = global_settings
-        self.irc_socket = None
+        self.connection = connection  # TwitchChatConnection
+        self.user_registry = user_registry
         self.channel_name = None
+        self.message_count = 0
         
     def extract_channel_name(self, url):
         """TwitchのURLからチャンネル名を抽出"""
@@ -798,188 +620,94 @@ class TwitchCommentReceiver(CommentReceiver):
             return match.group(1).lower()  # チャンネル名は小文字
         return None
         
-    def start(self):
-        """socketを使ったTwitch IRC接続でコメント受信"""
+    async def run(self):
+        """共有IRC接続にチャンネルを登録し、停止されるまで待機"""
+        debug_print(f"DEBUG: TwitchCommentReceiver.run() called")
+        debug_print(f"DEBUG: URL: {self.settings.url}")
+        
+        # URLからチャンネル名を抽出
+        self.channel_name = self.extract_channel_name(self.settings.url)
+        if not self.channel_name:
+            logger.error(f"Failed to extract channel name from URL: {self.settings.url}")
+            return
+        
+        debug_print(f"DEBUG: Extracted channel name: {self.channel_name}")
+        
+        self.connection.join(self.channel_name, self.settings.stream_id, self.on_message)
         try:
-            debug_print(f"DEBUG: TwitchCommentReceiver.start() called")
-            debug_print(f"DEBUG: Thread ID: {threading.current_thread().ident}")
-            debug_print(f"DEBUG: URL: {self.settings.url}")
-            
-            # URLからチャンネル名を抽出
-            self.channel_name = self.extract_channel_name(self.settings.url)
-            if not self.channel_name:
-                logger.error(f"Failed to extract channel name from URL: {self.settings.url}")
-                return
-            
-            debug_print(f"DEBUG: Extracted channel name: {self.channel_name}")
-            
-            # Twitch IRC設定
-            server = 'irc.chat.twitch.tv'
-            port = 6667
-            nickname = 'justinfan12345'  # 匿名接続用のニックネーム（justinfan + 数字）
-            
-            # IRCソケット作成
-            self.irc_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.irc_socket.settimeout(1.0)  # 1秒のタイムアウト（頻繁にGILを解放）
-            
-            debug_print(f"DEBUG: Connecting to Twitch IRC: {server}:{port}")
-            self.irc_socket.connect((server, port))
-            
-            # IRC接続
-            self.irc_socket.send(f"NICK {nickname}\r\n".encode('utf-8'))
-            self.irc_socket.send(f"JOIN #{self.channel_name}\r\n".encode('utf-8'))
-            
-            # タグを有効化（ユーザー情報を取得するため）
-            self.irc_socket.send(b"CAP REQ :twitch.tv/tags\r\n")
-            self.irc_socket.send(b"CAP REQ :twitch.tv/commands\r\n")
-            
-            debug_print(f"DEBUG: Connected to Twitch IRC, joined channel: {self.channel_name}")
-            
-            message_count = 0
-            buffer = ""
-            
-            # メッセージ受信ループ
-            while not self.stop_event.is_set():
-                try:
-                    # データ受信（1秒でタイムアウト）
-                    response = self.irc_socket.recv(2048).decode('utf-8', errors='ignore')
-                    
-                    if not response:
-                        debug_print("DEBUG: Connection closed by server")
-                        break
-                    
-                    # 停止チェック
-                    if self.stop_event.is_set():
-                        debug_print("DEBUG: Stop event detected during receive")
-                        break
-                    
-                    buffer += response
-                    lines = buffer.split('\r\n')
-                    buffer = lines.pop()  # 最後の不完全な行は次回へ
-                    
-                    for line in lines:
-                        if not line:
-                            continue
-                        
-                        # PINGに応答
-                        if line.startswith('PING'):
-                            self.irc_socket.send(b"PONG :tmi.twitch.tv\r\n")
-                            continue
-                        
-                        # PRIVMSGメッセージを解析
-                        if 'PRIVMSG' in line:
-                            message_count += 1
-                            
-                            if message_count % 10 == 0:
-                                import datetime
-                                timestamp_str = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                                debug_print(f"DEBUG: [{timestamp_str}] Twitch thread: Received {message_count} messages")
-                            
-                            # 最初とN件ごとに受信時刻を記録
-                            if message_count % 10 == 1:
-                                import datetime
-                                now_str = datetime.datetime.now().strftime("%H:%M:%S")
-                                debug_print(f"DEBUG: Twitch message received at: {now_str}")
-                            
-                            # メッセージをパース
-                            author_name = None
-                            message_text = None
-                            is_moderator = False
-                            
-                            # タグからユーザー情報を抽出
-                            if line.startswith('@'):
-                                tags_part, rest = line.split(' :', 1)
-                                tags = {}
-                                for tag in tags_part[1:].split(';'):
-                                    if '=' in tag:
-                                        key, value = tag.split('=', 1)
-                                        tags[key] = value
-                                
-                                # display-nameまたはloginからユーザー名を取得
-                                author_name = tags.get('display-name') or tags.get('login')
-                                
-                                # モデレーター判定
-                                badges = tags.get('badges', '')
-                                if 'moderator/' in badges or 'broadcaster/' in badges:
-                                    is_moderator = True
-                            
-                            # ユーザー名が取得できなかった場合は通常のIRC形式から抽出
-                            if not author_name:
-                                if '!' in line:
-                                    author_name = line.split('!')[0].lstrip(':@')
-                            
-                            # メッセージテキストを抽出
-                            if f'PRIVMSG #{self.channel_name} :' in line:
-                                message_text = line.split(f'PRIVMSG #{self.channel_name} :', 1)[1]
-                            
-                            if not author_name or not message_text:
-                                continue
-                            
-                            # global_settingsの管理者リストでチェック
-                            for manager in self.global_settings.managers:
-                                if manager['platform'] == 'twitch' and manager['id'].lower() == author_name.lower():
-                                    is_moderator = True
-                                    break
-                            
-                            # 統一フォーマットでコールバック
-                            comment_data = {
-                                'platform': 'twitch',
-                                'author': author_name,
-                                'message': message_text,
-                                'timestamp': '',
-                                'author_id': author_name.lower(),
-                                'is_moderator': is_moderator
-                            }
-                            
-                            # GUIコールバック
-                            try:
-                                if not self.stop_event.is_set():
-                                    self.callback(comment_data)
-                            except Exception as callback_error:
-                                if "main thread is not in main loop" in str(callback_error):
-                                    logger.debug("Main loop already terminated, stopping receiver")
-                                    break
-                                else:
-                                    logger.error(f"Error in callback: {callback_error}")
-                    
-                except socket.timeout:
-                    # タイムアウトは正常（PING/PONGで接続維持）
-                    continue
-                except Exception as e:
-                    debug_print(f"DEBUG: Error receiving IRC message: {e}")
-                    logger.error(f"Error receiving message: {e}")
-                    break
-            
-            debug_print(f"DEBUG: Twitch IRC loop ended, total messages: {message_count}")
-                    
-        except KeyboardInterrupt:
-            debug_print(f"DEBUG: KeyboardInterrupt detected in Twitch receiver")
-            logger.info(f"Twitch receiver interrupted by KeyboardInterrupt")
-        except SystemExit as e:
-            debug_print(f"DEBUG: SystemExit detected in Twitch receiver: {e}")
-            logger.warning(f"Twitch receiver received SystemExit: {e}")
-        except Exception as e:
-            logger.error(f"Twitch comment receiver error: {e}")
-            debug_print(f"ERROR: Twitch receiver error: {e}")
-            import traceback
-            debug_print(f"ERROR: Traceback: {traceback.format_exc()}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            # 受信は共有接続が行うので、キャンセルされるまで待つだけ
+            await asyncio.get_running_loop().create_future()
         finally:
-            if self.irc_socket:
-                try:
-                    self.irc_socket.close()
-                except:
-                    pass
-            debug_print(f"DEBUG: Twitch receiver cleanup")
+            self.connection.part(self.channel_name, self.settings.stream_id)
+            debug_print(f"DEBUG: Twitch receiver cleanup, total messages: {self.message_count}")
+    
+    def on_message(self, message):
+        """共有接続から振り分けられたPRIVMSGを処理
+        
+        Args:
+            message (TwitchMessage): TwitchIrcParserのパース結果
+        """
+        if self.stop_event.is_set():
+            return
+        
+        self.message_count += 1
+        if self.message_count % 10 == 0:
+            timestamp_str = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            debug_print(f"DEBUG: [{timestamp_str}] Twitch #{self.channel_name}: Received {self.message_count} messages")
+        
+        # display-nameがなければログイン名を使う
+        author_name = message.display_name or message.login
+        
+        message_text = message.text
+        if not author_name or not message_text:
+            return
+        
+        # モデレーター判定
+        badges = message.badges or ''
+        is_moderator = 'moderator/' in badges or 'broadcaster/' in badges
+        
+        # 管理者リストでチェック
+        if not is_moderator:
+            is_moderator = self.user_registry.is_manager('twitch', author_name)
+        
+        # tmi-sent-ts（ミリ秒）をYouTubeと同じ形式の時刻文字列にする
+        timestamp = ''
+        if message.sent_ts:
+            timestamp = datetime.datetime.fromtimestamp(message.sent_ts / 1000).strftime('%Y-%m-%d %H:%M:%S')
+        
+        # 統一フォーマットでコールバック
+        comment_data = {
+            'platform': 'twitch',
+            'author': author_name,
+            'message': message_text,
+            'timestamp': timestamp,
+            'author_id': author_name.lower(),
+            'is_moderator': is_moderator,
+            'user_id': message.user_id,
+            'message_id': message.message_id,
+            'badges': badges
+        }
+        
+        try:
+            self.callback(comment_data)
+        except Exception as callback_error:
+            logger.error(f"Error in callback: {callback_error}")
 
 
 class StreamManager:
-    """複数配信を管理するクラス"""
-    def __init__(self, global_settings):
+    """複数配信を管理するクラス
+    
+    各配信のReceiverは共通のReceiverRuntime（asyncioイベントループ）上の
+    タスクとして実行する。
+    """
+    def __init__(self, global_settings, user_registry):
         self.streams = {}  # stream_id -> StreamSettings
         self.receivers = {}  # stream_id -> CommentReceiver
-        self.threads = {}  # stream_id -> Thread
+        self.tasks = {}  # stream_id -> concurrent.futures.Future
         self.global_settings = global_settings
+        self.user_registry = user_registry
+        self.runtime = ReceiverRuntime()
+        self.twitch_connection = TwitchChatConnection()  # 全Twitch配信で共有するIRC接続
         
     def add_stream(self, stream_settings):
         """配信を追加"""
@@ -1005,62 +733,102 @@ class StreamManager:
         # プラットフォームごとに適切なReceiverを選択
         if settings.platform == 'youtube':
             debug_print(f"DEBUG: Creating YouTubeCommentReceiver (pytchat)")
-            receiver = YouTubeCommentReceiver(settings, comment_callback, self.global_settings)
+            receiver = YouTubeCommentReceiver(settings, comment_callback, self.global_settings, self.runtime, self.user_registry)
         elif settings.platform == 'twitch':
-            debug_print(f"DEBUG: Creating TwitchCommentReceiver (socket IRC)")
-            receiver = TwitchCommentReceiver(settings, comment_callback, self.global_settings)
+            debug_print(f"DEBUG: Creating TwitchCommentReceiver (shared IRC)")
+            receiver = TwitchCommentReceiver(settings, comment_callback, self.global_settings, self.runtime, self.twitch_connection, self.user_registry)
         else:
             logger.error(f"Unknown platform: {settings.platform}")
             debug_print(f"ERROR: Unknown platform: {settings.platform}")
             return False
             
-        debug_print(f"DEBUG: Created receiver, starting thread")
+        debug_print(f"DEBUG: Created receiver, scheduling task")
         self.receivers[stream_id] = receiver
         
-        # スレッドラッパー関数で例外をキャッチ
-        def thread_wrapper():
+        # タスクラッパーで例外をキャッチ
+        async def receiver_task():
             try:
-                logger.info(f"Comment receiver thread started for {stream_id}")
-                receiver.start()
-                logger.info(f"Comment receiver thread ended normally for {stream_id}")
+                logger.info(f"Comment receiver task started for {stream_id}")
+                await receiver.run()
+                logger.info(f"Comment receiver task ended normally for {stream_id}")
+            except asyncio.CancelledError:
+                logger.info(f"Comment receiver task cancelled for {stream_id}")
             except Exception as e:
-                logger.error(f"Comment receiver thread crashed for {stream_id}: {e}")
+                logger.error(f"Comment receiver task crashed for {stream_id}: {e}")
                 import traceback
                 logger.error(f"Traceback: {traceback.format_exc()}")
-                # スレッドが異常終了してもメインアプリケーションは継続
+                # タスクが異常終了してもメインアプリケーションは継続
+            finally:
+                receiver.finished.set()
         
-        thread = threading.Thread(target=thread_wrapper, daemon=True)
-        self.threads[stream_id] = thread
-        thread.start()
+        self.tasks[stream_id] = self.runtime.spawn(receiver_task())
         settings.is_active = True
-        debug_print(f"DEBUG: Thread started for {stream_id}")
+        debug_print(f"DEBUG: Task scheduled for {stream_id}")
         return True
         
     def stop_stream(self, stream_id):
-        """配信のコメント受信を停止"""
-        if stream_id in self.receivers:
+        """配信のコメント受信を停止
+        
+        Returns:
+            float: 停止までにかかった時間（ミリ秒）
+        """
+        start = time.perf_counter()
+        receiver = self._request_stop(stream_id)
+        self._wait_stopped(stream_id, receiver, 3)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Stream {stream_id} stopped in {elapsed_ms:.1f} ms")
+        return elapsed_ms
+    
+    def _request_stop(self, stream_id):
+        """受信タスクに停止を要求（終了は待たない）"""
+        receiver = self.receivers.get(stream_id)
+        if receiver:
             debug_print(f"DEBUG: Stopping receiver for {stream_id}")
-            self.receivers[stream_id].stop()
+            receiver.stop()
             
-        if stream_id in self.threads:
-            thread = self.threads[stream_id]
-            # スレッドが終了するまで最大3秒待機
-            debug_print(f"DEBUG: Waiting for thread to stop for {stream_id}")
-            thread.join(timeout=3)
-            if thread.is_alive():
-                debug_print(f"WARNING: Thread for {stream_id} did not stop cleanly")
+        if stream_id in self.tasks:
+            # キャンセルはループのセルフパイプ経由で即座に受信タスクへ届く
+            debug_print(f"DEBUG: Cancelling task for {stream_id}")
+            self.tasks[stream_id].cancel()
+        return receiver
+    
+    def _wait_stopped(self, stream_id, receiver, timeout):
+        """受信タスクの終了を待って後始末"""
+        if stream_id in self.tasks:
+            if receiver and not receiver.finished.wait(timeout=timeout):
+                debug_print(f"WARNING: Task for {stream_id} did not stop cleanly")
             else:
-                debug_print(f"DEBUG: Thread stopped successfully for {stream_id}")
-            del self.threads[stream_id]
+                debug_print(f"DEBUG: Task stopped successfully for {stream_id}")
+            del self.tasks[stream_id]
             
         if stream_id in self.receivers:
             del self.receivers[stream_id]
             
         if stream_id in self.streams:
             self.streams[stream_id].is_active = False
+    
+    def shutdown(self, timeout=3):
+        """全配信を停止してイベントループを終了
+        
+        先に全タスクへ停止を要求してからまとめて待つため、
+        待機時間は配信数によらず最大timeout秒。
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        receivers = {stream_id: self._request_stop(stream_id) for stream_id in list(self.streams.keys())}
+        for stream_id, receiver in receivers.items():
+            self._wait_stopped(stream_id, receiver, max(0, deadline - time.monotonic()))
+        logger.info(f"All streams stopped in {(time.perf_counter() - start) * 1000:.1f} ms")
+        self.runtime.shutdown()
 
 class MultiStreamCommentHelper(GUIComponents, CommentHandler):
     """メインアプリケーションクラス（多重継承でGUIとコメント処理機能を統合）"""
+    
+    # OBSとの接続・送受信のタイムアウト（秒）
+    OBS_TIMEOUT = 5
+    # OBS接続状態の表示を更新する間隔（ミリ秒）
+    OBS_STATUS_INTERVAL_MS = 500
+    
     def __init__(self):
         self.global_settings = GlobalSettings()
         self.global_settings.load()
@@ -1068,10 +836,29 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         # 言語設定をロード
         self.strings = load_language(self.global_settings.language)
         
-        self.stream_manager = StreamManager(self.global_settings)
-        self.obs = None
+        # 管理者/NGユーザの索引（受信スレッドからも参照する）
+        self.user_registry = UserRegistry(self.global_settings.managers, self.global_settings.ng_users)
+        
+        self.stream_manager = StreamManager(self.global_settings, self.user_registry)
+        # OBSへの接続は監視スレッドが行う（OBSが起動していなくても起動を待たせない）
+        self.obs_supervisor = ObsSupervisor(self.create_obs_socket)
         self.auto_scroll = None  # setup_guiで初期化される
-        self.common_requests = []  # 共通リクエストリスト
+        self.comment_queue = CommentQueue(self.COMMENT_QUEUE_MAX_ITEMS)  # 受信スレッド→メインループのコメントキュー
+        
+        # 共通リクエストリストとコマンド処理（変更通知でGUI/XML/OBS/保存を更新）
+        self.request_engine = RequestEngine(self.global_settings, self.user_registry)
+        self.request_journal = RequestJournal('requests.json', 'requests.log')
+        self._twitch_api_lock = threading.Lock()  # TwitchAPIの遅延作成用
+        self.persistence = PersistenceService()  # 設定・リクエストの保存をまとめて別スレッドで行う
+        # 配信タイトル・概要欄のキャッシュ（起動時や配信追加時に前回の値をすぐ表示する）
+        self.metadata_cache = MetadataCache(ttl=self.global_settings.metadata_cache_ttl)
+        # タイトル取得の実行プール（同時接続数を制限し、同じ配信の取得はまとめる）
+        self.fetch_pool = FetchPool()
+        # オーバーレイ配信サーバ（リクエストリストの変更をブラウザソースへ即時通知）
+        self.overlay_server = OverlayServer(port=self.global_settings.overlay_server_port)
+        self.overlay_server.add_topic('todo', retain=1, max_queue=1)  # 常に最新の状態だけ送ればよい
+        self.overlay_server.add_topic('comments', retain=10, max_queue=64)  # 接続直後は直近のコメントから表示
+        self.setup_request_engine()
         
         # プラットフォームごとのIDカウンター
         self.stream_id_counters = {
@@ -1094,10 +881,15 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         
         # GUIセットアップ後にリクエストリストをロード
         self.load_requests()
+        self.start_overlay_server()
         
-        self.setup_obs()
+        self.obs_supervisor.start()
+        self.update_obs_status()
         self.restore_last_streams()
         
+        # コメントキューの定期処理を開始
+        self.start_comment_drain()
+        
         # 終了処理の登録
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
@@ -1132,9 +924,14 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         
         self.update_stream_list()
         
-        # バックグラウンドで全てのタイトルを取得
+        # バックグラウンドで全てのタイトルを取得（Twitchはまとめて問い合わせる）
+        twitch_ids = [stream_id for stream_id in stream_ids
+                      if self.stream_manager.streams[stream_id].platform == 'twitch']
+        if twitch_ids:
+            self.fetch_twitch_titles_async(twitch_ids)
         for stream_id in stream_ids:
-            self.fetch_title_async(stream_id)
+            if stream_id not in twitch_ids:
+                self.fetch_title_async(stream_id)
     
     def detect_platform(self, url):
         """URLからプラットフォームを自動判定"""
@@ -1179,11 +976,18 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         # 既に通常形式（youtube.com/watch?v=）の場合はそのまま返す
         return url
     
+    def get_twitch_api(self):
+        """TwitchAPIインスタンスを返す（初回のみ作成。ユーザーIDのキャッシュを共有するため使い回す）"""
+        with self._twitch_api_lock:
+            if not hasattr(self, 'twitch_api'):
+                self.twitch_api = TwitchAPI()
+            return self.twitch_api
+    
     def get_stream_title(self, platform, url):
         """配信タイトルを取得
         
-        Twitchの場合: Twitch API -> BeautifulSoupフォールバック
-        YouTubeの場合: BeautifulSoupでスクレイピング
+        Twitchの場合: Twitch API -> ページのメタタグ（フォールバック）
+        YouTubeの場合: 視聴ページに埋め込まれた動画情報（ytInitialPlayerResponse）
         
         Args:
             platform (str): 'youtube' or 'twitch'
@@ -1195,11 +999,12 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         # Twitchの場合、まずAPIを試す
         if platform == 'twitch':
             try:
-                # TwitchAPIインスタンスを作成（キャッシュ）
-                if not hasattr(self, 'twitch_api'):
-                    self.twitch_api = TwitchAPI()
+                # TwitchAPIインスタンスを用意（初回のみ作成）
+                self.get_twitch_api()
                 
                 # APIでタイトルを取得
+                # 配信していない場合もチャンネル情報のタイトルが返るため、スクレイピングにまわるのは
+                # タイトル未設定・ユーザーが見つからない・APIが失敗した場合のみ
                 if self.twitch_api.client_id and self.twitch_api.client_secret:
                     title = self.twitch_api.get_title_from_url(url)
                     if title:
@@ -1212,51 +1017,12 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             except Exception as e:
                 logger.warning(f"Twitch API failed: {e}, falling back to scraping")
         
-        # BeautifulSoupでスクレイピング（YouTubeまたはTwitch APIのフォールバック）
+        # ページから取得（YouTubeまたはTwitch APIのフォールバック）
         try:
-            # User-Agentヘッダーを設定（ブロック回避）
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            # タイムアウト設定でページを取得（短縮: 3秒）
-            response = requests.get(url, headers=headers, timeout=3)
-            response.raise_for_status()
-            
-            # HTMLをパース
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            if platform == 'youtube':
-                # YouTubeのタイトル取得
-                # 方法1: og:titleメタタグから取得（最も確実）
-                og_title = soup.find('meta', property='og:title')
-                if og_title and og_title.get('content'):
-                    return og_title['content']
-                
-                # 方法2: titleタグから取得（フォールバック）
-                title_tag = soup.find('title')
-                if title_tag:
-                    title = title_tag.string
-                    # YouTubeの場合、タイトルに " - YouTube" が付いているので削除
-                    if title:
-                        return title.replace(' - YouTube', '').strip()
-                
-            elif platform == 'twitch':
-                # Twitchのタイトル取得（スクレイピング）
-                # 方法1: og:titleメタタグから取得
-                og_title = soup.find('meta', property='og:title')
-                if og_title and og_title.get('content'):
-                    return og_title['content']
-                
-                # 方法2: og:descriptionメタタグから取得（配信タイトルが入っている場合がある）
-                og_description = soup.find('meta', property='og:description')
-                if og_description and og_description.get('content'):
-                    return og_description['content']
-                
-                # 方法3: titleタグから取得（フォールバック）
-                title_tag = soup.find('title')
-                if title_tag and title_tag.string:
-                    return title_tag.string.strip()
+            # 必要な部分（YouTubeは動画情報のJSON、Twitchは<head>）だけを読んで取り出す
+            title = stream_page.fetch_page_info(platform, url)['title']
+            if title:
+                return title
             
             logger.warning(f"Could not extract title from {platform} URL: {url}")
             return ""
@@ -1274,8 +1040,8 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
     def get_today_content(self, platform, url, content_marker):
         """配信の今日の内容を概要欄から取得
         
-        BeautifulSoupでページ全体からマーカー文字列を検索し、
-        その次の行を取得する
+        概要欄（YouTubeは視聴ページの動画情報、TwitchはAPIのチャンネル説明）から
+        マーカー文字列を検索し、その次の行を取得する
         
         Args:
             platform (str): 'youtube' or 'twitch'
@@ -1290,31 +1056,17 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         
         try:
             if platform == 'youtube':
-                # User-Agentヘッダーを設定
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                
-                # タイムアウト設定でページを取得
-                response = requests.get(url, headers=headers, timeout=5)
-                response.raise_for_status()
-                
-                # HTMLをパース
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # マーカー文字列を含むタグを検索
-                target = None
-                for tag in soup.find_all(True):
-                    if content_marker in tag.text:
-                        target = tag
-                        break
-                
-                if not target:
+                # 視聴ページに埋め込まれた動画情報から概要欄を取得（取得直後ならキャッシュを使う）
+                entry = self.metadata_cache.get(MetadataCache.make_key(platform, url))
+                if not self.metadata_cache.is_fresh(entry) or entry.get('description') is None:
+                    entry = self.fetch_stream_metadata(platform, url)
+                description = (entry or {}).get('description') or ''
+                if content_marker not in description:
                     logger.info(f"Marker '{content_marker}' not found in YouTube page")
                     return ""
                 
-                # タグのテキストを改行で分割してマーカーの次の行を取得
-                lines = target.text.split('\\n')
+                # 概要欄を改行で分割してマーカーの次の行を取得
+                lines = description.split('\n')
                 for i, line in enumerate(lines):
                     if content_marker in line:
                         # 次の行が存在するかチェック
@@ -1328,9 +1080,8 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
                 return ""
             
             elif platform == 'twitch':
-                # TwitchAPIインスタンスを作成（キャッシュ）
-                if not hasattr(self, 'twitch_api'):
-                    self.twitch_api = TwitchAPI()
+                # TwitchAPIインスタンスを用意（初回のみ作成）
+                self.get_twitch_api()
                 
                 # APIでチャンネル説明を取得
                 if self.twitch_api.client_id and self.twitch_api.client_secret:
@@ -1340,8 +1091,11 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
                         logger.warning(f"Could not extract username from Twitch URL: {url}")
                         return ""
                     
-                    # チャンネル説明を取得
-                    description = self.twitch_api.get_channel_description(username)
+                    # チャンネル説明を取得（取得直後ならキャッシュを使う）
+                    entry = self.metadata_cache.get(MetadataCache.make_key(platform, url))
+                    if not self.metadata_cache.is_fresh(entry) or entry.get('description') is None:
+                        entry = self.fetch_stream_metadata(platform, url, with_description=True)
+                    description = (entry or {}).get('description') or ''
                     if not description:
                         logger.info("Twitch channel description is empty")
                         return ""
@@ -1376,7 +1130,7 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             return ""
     
     def update_stream_title(self, stream_id):
-        """指定された配信のタイトルを更新
+        """指定された配信のタイトルを更新（キャッシュが新しくても取り直す）
         
         Args:
             stream_id (str): 配信ID
@@ -1384,44 +1138,195 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         if stream_id not in self.stream_manager.streams:
             return
         
-        settings = self.stream_manager.streams[stream_id]
-        new_title = self.get_stream_title(settings.platform, settings.url)
+        self.fetch_title_async(stream_id, force=True)
+    
+    def fetch_stream_metadata(self, platform, url, with_description=False):
+        """配信のタイトル・概要欄を取得してキャッシュに保存（バックグラウンドスレッドで呼ぶ）
         
-        if new_title:
-            settings.title = new_title
-            
-            # タイトルラベルが存在すれば更新
-            if hasattr(settings, 'title_label'):
-                settings.title_label.config(text=new_title)
+        YouTubeは前回の応答のETag/Last-Modifiedで条件付きリクエストを送り、
+        変更がなければ保存済みの内容をそのまま使う。
+        
+        Args:
+            platform (str): 'youtube' or 'twitch'
+            url (str): 配信URL
+            with_description (bool): Twitchのチャンネル説明も取得するか（YouTubeは常に取得する）
             
-            # リストを更新
-            self.update_stream_list()
+        Returns:
+            dict: キャッシュに保存したメタデータ（取得できない場合はNone）
+        """
+        key = MetadataCache.make_key(platform, url)
+        if platform == 'youtube':
+            cached = self.metadata_cache.get(key) or {}
+            try:
+                info = stream_page.fetch_page_info(platform, url,
+                                                   etag=cached.get('etag'),
+                                                   last_modified=cached.get('last_modified'))
+            except requests.RequestException as e:
+                logger.warning(f"Error fetching metadata from {url}: {e}")
+                return None
+            except Exception as e:
+                logger.error(f"Unexpected error getting stream metadata: {e}")
+                return None
             
-            logger.info(f"Title updated for {stream_id}: {new_title}")
+            if info is None:
+                # 変更なし（304 Not Modified）
+                self.metadata_cache.touch(key)
+                self.save_metadata_cache()
+                return self.metadata_cache.get(key)
+            if not info['title']:
+                logger.warning(f"Could not extract title from {platform} URL: {url}")
+                return None
+            fields = info
         else:
-            logger.warning(f"Failed to update title for {stream_id}")
+            # Twitch APIには条件付きリクエストがないため、取得し直した内容で置き換える
+            # 説明を取得しなかった場合は、保存済みの説明が新しいものとして扱われないよう破棄する
+            fields = {'title': None, 'description': None}
+            if with_description:
+                fields.update(self.fetch_twitch_channel(url))
+            if not fields['title']:
+                fields['title'] = self.get_stream_title(platform, url)
+            if not fields['title']:
+                return None
+        
+        self.store_stream_metadata(key, **fields)
+        self.save_metadata_cache()
+        return self.metadata_cache.get(key)
+    
+    def fetch_twitch_channel(self, url):
+        """Twitchのタイトルとチャンネル説明をAPIでまとめて取得（バックグラウンドスレッドで呼ぶ）
+        
+        Args:
+            url (str): Twitch配信URL
+            
+        Returns:
+            dict: {'title', 'description'}（取得できない場合は空。タイトル未設定ならtitleはNone）
+        """
+        twitch_api = self.get_twitch_api()
+        username = TwitchAPI.extract_username_from_url(url)
+        if not username or not (twitch_api.client_id and twitch_api.client_secret):
+            return {}
+        try:
+            info = twitch_api.get_channels([username], with_description=True).get(username.lower())
+        except Exception as e:
+            logger.warning(f"Failed to get Twitch channel: {e}")
+            return {}
+        if not info:
+            return {}
+        return {'title': info['title'], 'description': info.get('description', '')}
     
-    def fetch_title_async(self, stream_id):
+    def store_stream_metadata(self, key, **fields):
+        """取得したメタデータを、タイトルから抽出したbase_title/seriesとともにキャッシュに格納
+        
+        Args:
+            key (str): MetadataCache.make_key() で作成したキー
+            **fields: title, description, etag, last_modified
+        """
+        base_title, series = extract_title_info(
+            fields['title'],
+            self.global_settings.pattern_series,
+            self.global_settings.pattern_base_title_list
+        )
+        self.metadata_cache.put(key, base_title=base_title, series=series, **fields)
+    
+    def save_metadata_cache(self):
+        """メタデータキャッシュの保存を要求（別スレッドでまとめて書き込む）"""
+        self.persistence.save('metadata', self.metadata_cache.cache_file, self.metadata_cache.snapshot())
+    
+    def show_cached_title(self, stream_id, force=False):
+        """キャッシュ済みのタイトルをすぐに表示（メインスレッドで呼ぶ）
+        
+        Args:
+            stream_id (str): 配信ID
+            force (bool): キャッシュが新しくても取り直すか
+            
+        Returns:
+            bool: 取り直しが必要か（キャッシュがない・古い・forceの場合True）
+        """
+        settings = self.stream_manager.streams.get(stream_id)
+        if not settings:
+            return False
+        
+        entry = self.metadata_cache.get(MetadataCache.make_key(settings.platform, settings.url))
+        if entry and entry.get('title'):
+            if settings.title != entry['title']:
+                self._update_title_callback(stream_id, entry['title'])
+            if not force and self.metadata_cache.is_fresh(entry):
+                return False
+        return True
+    
+    def fetch_title_async(self, stream_id, force=False):
         """バックグラウンドでタイトルを取得（非ブロッキング）
         
+        キャッシュ済みのタイトルがあればすぐに表示し、古い場合だけ裏で取り直す。
+        
         Args:
             stream_id (str): 配信ID
+            force (bool): キャッシュが新しくても取り直すか
         """
-        def fetch_thread():
-            """タイトル取得スレッド"""
-            if stream_id not in self.stream_manager.streams:
-                return
-            
-            settings = self.stream_manager.streams[stream_id]
-            new_title = self.get_stream_title(settings.platform, settings.url)
-            
-            if new_title:
+        if not self.show_cached_title(stream_id, force):
+            return
+        
+        settings = self.stream_manager.streams[stream_id]
+        platform, url = settings.platform, settings.url
+        
+        def on_fetched(entry):
+            """取得完了時の処理（ワーカースレッドで実行）"""
+            if entry and entry.get('title'):
+                new_title = entry['title']
                 # メインスレッドでGUI更新
                 self.root.after(0, lambda: self._update_title_callback(stream_id, new_title))
+            else:
+                logger.warning(f"Failed to update title for {stream_id}")
+        
+        # 実行プールで取得（同じ配信の取得が実行中ならその結果を待つ）
+        self.fetch_pool.submit(stream_id, url, lambda: self.fetch_stream_metadata(platform, url), on_fetched)
+    
+    def fetch_twitch_titles_async(self, stream_ids, force=False):
+        """複数のTwitch配信のタイトルをまとめてバックグラウンドで取得
+        
+        Helix APIへの問い合わせは配信数によらず最大3回。APIで取得できなかった
+        配信（認証情報なし・失敗時）は個別の取得（スクレイピング）にまわす。
+        キャッシュ済みのタイトルはすぐに表示し、古いものだけを問い合わせる。
+        
+        Args:
+            stream_ids (list[str]): 配信IDのリスト
+            force (bool): キャッシュが新しくても取り直すか
+        """
+        stream_ids = [stream_id for stream_id in stream_ids if self.show_cached_title(stream_id, force)]
+        if not stream_ids:
+            return
+        
+        targets = {}
+        urls = {}
+        for stream_id in stream_ids:
+            settings = self.stream_manager.streams[stream_id]
+            targets[stream_id] = TwitchAPI.extract_username_from_url(settings.url)
+            urls[stream_id] = settings.url
+        
+        def fetch_batch():
+            """タイトル一括取得（ワーカースレッドで実行）"""
+            channels = {}
+            twitch_api = self.get_twitch_api()
+            if twitch_api.client_id and twitch_api.client_secret:
+                try:
+                    channels = twitch_api.get_channels([login for login in targets.values() if login])
+                except Exception as e:
+                    logger.warning(f"Twitch API batch fetch failed: {e}")
+            
+            for stream_id, login in targets.items():
+                new_title = channels.get(login.lower(), {}).get('title') if login else None
+                if new_title:
+                    self.store_stream_metadata(MetadataCache.make_key('twitch', urls[stream_id]),
+                                               title=new_title, description=None)
+                    self.root.after(0, lambda stream_id=stream_id, new_title=new_title:
+                                    self._update_title_callback(stream_id, new_title))
+                else:
+                    self.root.after(0, lambda stream_id=stream_id: self.fetch_title_async(stream_id, force=True))
+            if channels:
+                self.save_metadata_cache()
         
-        # バックグラウンドスレッドで実行
-        thread = threading.Thread(target=fetch_thread, daemon=True)
-        thread.start()
+        # 一括取得は1件のジョブとして実行プールで実行する
+        self.fetch_pool.submit('twitch:' + ','.join(stream_ids), TwitchAPI.HELIX_URL, fetch_batch)
     
     def _update_title_callback(self, stream_id, new_title):
         """タイトル更新のコールバック（メインスレッドで実行）
@@ -1520,32 +1425,37 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         webbrowser.open(twitter_url)
         logger.info(f"Opening tweet window for stream: {stream_id}")
     
+    @property
+    def obs(self):
+        """接続中のOBSSocket（未接続ならNone）"""
+        return self.obs_supervisor.obs
+    
+    def create_obs_socket(self):
+        """現在の設定でOBSに接続（監視スレッドから呼ばれる。失敗時は例外を送出）"""
+        if not (self.global_settings.obs_host and self.global_settings.obs_port):
+            raise ConnectionError("OBS host/port is not configured")
+        obs = OBSSocket(
+            self.global_settings.obs_host,
+            self.global_settings.obs_port,
+            self.global_settings.obs_passwd,
+            timeout=self.OBS_TIMEOUT
+        )
+        logger.info(f"OBS connected: {self.global_settings.obs_host}:{self.global_settings.obs_port}")
+        return obs
+    
     def setup_obs(self):
-        """OBS接続設定"""
-        try:
-            if self.obs:
-                try:
-                    self.obs.close()
-                except:
-                    pass
-            
-            self.obs = OBSSocket(
-                self.global_settings.obs_host,
-                self.global_settings.obs_port,
-                self.global_settings.obs_passwd
-            )
-            logger.info(f"OBS connected: {self.global_settings.obs_host}:{self.global_settings.obs_port}")
-        except ConnectionRefusedError as e:
-            logger.warning(f"OBS connection refused (OBS not running or WebSocket disabled): {e}")
-            self.obs = None
-            # ユーザーに通知（初回起動時のみ）
-            if not hasattr(self, '_obs_connection_warned'):
-                self._obs_connection_warned = True
-                # メッセージは表示せず、ログのみに記録（OBSは必須ではないため）
-        except Exception as e:
-            logger.warning(f"OBS connection failed: {e}")
-            self.obs = None
-            self.obs = None
+        """OBS接続設定を反映（接続は監視スレッドがバックグラウンドで行う）"""
+        self.obs_supervisor.start()
+        self.obs_supervisor.reconnect()
+    
+    def update_obs_status(self):
+        """OBSの接続状態をGUIに反映（定期実行）"""
+        state = self.obs_supervisor.state
+        if hasattr(self, 'obs_status_label') and getattr(self, '_obs_status_shown', None) != state:
+            self._obs_status_shown = state
+            colors = {'connected': 'green', 'connecting': 'orange', 'degraded': 'red'}
+            self.obs_status_label.config(text=self.strings["obs_status"][state], foreground=colors.get(state, 'gray'))
+        self._obs_status_job = self.root.after(self.OBS_STATUS_INTERVAL_MS, self.update_obs_status)
     
     def add_stream(self):
         """配信を追加"""
@@ -1617,10 +1527,10 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         
         # コメント受信開始
         def comment_callback(comment_data):
-            """コメント受信時のコールバック（メインスレッドで実行）"""
+            """コメント受信時のコールバック（受信スレッドで実行）"""
             comment_data['stream_id'] = stream_id
-            # GUI更新はメインスレッドで実行する必要があるため、root.after()を使用
-            self.root.after(0, lambda: self.process_comment(stream_id, comment_data))
+            # GUI更新はメインスレッドでまとめて行うため、キューに積むだけにする
+            self.comment_queue.put(stream_id, comment_data)
         
         success = self.stream_manager.start_stream(stream_id, comment_callback)
         
@@ -1699,8 +1609,9 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             self.strings["messages"]["confirm"], 
             self.strings["messages"]["delete_stream_confirm"].format(stream_id=stream_id)
         ):
-            # StreamManagerから削除
+            # StreamManagerから削除（実行中・実行待ちのタイトル取得は取り消す）
             self.stream_manager.remove_stream(stream_id)
+            self.fetch_pool.cancel(stream_id)
             
             # 選択中の配信がこれだった場合はクリア
             if self.selected_stream_id == stream_id:
@@ -1739,20 +1650,8 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         """手動でリクエストを追加"""
         content = self.manual_req_entry.get().strip()
         if content:
-            # 辞書形式でリクエストを追加
-            request_data = {
-                'content': content,
-                'author': '手動追加',
-                'platform': 'manual',
-                'stream_id': ''
-            }
-            self.common_requests.append(request_data)
-            self.update_request_display()
-            self.generate_xml()
+            self.request_engine.add(content, '手動追加', 'manual')
             self.manual_req_entry.delete(0, tk.END)
-            
-            # 自動保存
-            self.save_requests()
     
     def remove_selected_request(self):
         """選択されたリクエストを削除"""
@@ -1761,13 +1660,7 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             item = self.request_tree.item(selection[0])
             # 番号（1ベース）からインデックス（0ベース）に変換
             index = item['values'][0] - 1
-            if 0 <= index < len(self.common_requests):
-                self.common_requests.pop(index)
-                self.update_request_display()
-                self.generate_xml()
-                
-                # 自動保存
-                self.save_requests()
+            self.request_engine.remove_at(index)
     
     def move_request_up(self):
         """選択されたリクエストを上に移動"""
@@ -1776,18 +1669,11 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             item = self.request_tree.item(selection[0])
             # 番号（1ベース）からインデックス（0ベース）に変換
             index = item['values'][0] - 1
-            if index > 0:
-                self.common_requests[index], self.common_requests[index-1] = \
-                    self.common_requests[index-1], self.common_requests[index]
-                self.update_request_display()
-                self.generate_xml()
+            if self.request_engine.move(index, -1):
                 # 選択を維持（移動後の位置）
                 new_index = index - 1
                 if new_index < len(self.request_tree.get_children()):
                     self.request_tree.selection_set(self.request_tree.get_children()[new_index])
-                
-                # 自動保存
-                self.save_requests()
     
     def move_request_down(self):
         """選択されたリクエストを下に移動"""
@@ -1796,18 +1682,11 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             item = self.request_tree.item(selection[0])
             # 番号（1ベース）からインデックス（0ベース）に変換
             index = item['values'][0] - 1
-            if index < len(self.common_requests) - 1:
-                self.common_requests[index], self.common_requests[index+1] = \
-                    self.common_requests[index+1], self.common_requests[index]
-                self.update_request_display()
-                self.generate_xml()
+            if self.request_engine.move(index, 1):
                 # 選択を維持（移動後の位置）
                 new_index = index + 1
                 if new_index < len(self.request_tree.get_children()):
                     self.request_tree.selection_set(self.request_tree.get_children()[new_index])
-                
-                # 自動保存
-                self.save_requests()
     
     def clear_all_requests(self):
         """全リクエストをクリア"""
@@ -1815,12 +1694,7 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             self.strings["messages"]["confirm"], 
             self.strings["messages"]["clear_requests_confirm"]
         ):
-            self.common_requests.clear()
-            self.update_request_display()
-            self.generate_xml()
-            
-            # 自動保存
-            self.save_requests()
+            self.request_engine.clear()
             
     def clear_all_comments(self):
         """全コメントをクリア"""
@@ -1840,9 +1714,6 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
     
     def generate_xml(self):
         """リクエストリストからXMLを生成してOBSに送信"""
-        if not self.obs:
-            return
-        
         # XMLテキストを生成
         xml_content = self.global_settings.content_header + "\n"
         for i, req in enumerate(self.common_requests, start=1):
@@ -1861,11 +1732,17 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             line += f" {self.escape_for_xml(formatted_text)}"
             xml_content += line + "\n"
         
-        # OBSに送信
-        try:
-            self.obs.set_text_gdi_plus_properties('リクエストリスト', text=xml_content)
-        except Exception as e:
-            logger.error(f"Failed to update OBS: {e}")
+        # OBSに送信（ワーカースレッドが送るので待たない。連続した変更は最後の内容だけ送られる）
+        # 未接続の場合は接続時に最新の内容が送られる
+        future = self.obs_supervisor.change_text('リクエストリスト', xml_content)
+        if future is not None:
+            future.add_done_callback(self._log_obs_error)
+    
+    @staticmethod
+    def _log_obs_error(future):
+        """非同期のOBS要求が失敗していればログに記録（OBSのワーカースレッドで呼ばれる）"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Failed to update OBS: {future.exception()}")
     
     def escape_for_xml(self, text):
         """XMLエスケープ処理"""
@@ -1876,18 +1753,20 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         text = text.replace("'", '&apos;')
         return text
     
-    def generate_todo_xml(self, filename='todo.xml'):
+    def generate_todo_xml(self, filename='todo.xml', version_filename='todo_version.txt'):
         """リクエストリストをXML形式でファイルに出力（Ajax用）
         
+        内容が前回と同じなら書き込まない。変更時は一時ファイル経由で置き換え、
+        版番号をversion_filenameにも書き出す（オーバーレイは版番号が
+        変わったときだけXMLを取得・再描画する）。
+        
         Args:
             filename (str): 出力先ファイル名
+            version_filename (str): 版番号の出力先ファイル名
         """
         try:
-            # XML宣言とルート要素
-            xml_lines = ['<?xml version="1.0" encoding="utf-8"?>']
-            xml_lines.append('<TODOs>')
-            
             # 各リクエストをXML要素として追加
+            item_lines = []
             for index, req in enumerate(self.common_requests, start=1):
                 content = req.get('content', '')
                 author = req.get('author', '')
@@ -1898,24 +1777,56 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
                 author_escaped = self.escape_for_xml(author)
                 platform_escaped = self.escape_for_xml(platform)
                 
-                xml_lines.append('<item>')
-                xml_lines.append(f'    <idx>{index}</idx>')
-                xml_lines.append(f'    <title>{content_escaped}</title>')
-                xml_lines.append(f'    <name>{author_escaped}</name>')
-                xml_lines.append(f'    <platform>{platform_escaped}</platform>')
-                xml_lines.append('</item>')
+                item_lines.append('<item>')
+                item_lines.append(f'    <idx>{index}</idx>')
+                item_lines.append(f'    <title>{content_escaped}</title>')
+                item_lines.append(f'    <name>{author_escaped}</name>')
+                item_lines.append(f'    <platform>{platform_escaped}</platform>')
+                item_lines.append('</item>')
+            items = '\n'.join(item_lines)
+            
+            # 前回と同じ内容なら何もしない
+            if items == getattr(self, '_todo_xml_items', None) and os.path.exists(filename):
+                return
+            # 版番号は起動時刻から始める（再起動しても前回の番号と重ならないように）
+            self.todo_xml_version = getattr(self, 'todo_xml_version', int(time.time() * 1000)) + 1
             
+            # XML宣言とルート要素
+            xml_lines = ['<?xml version="1.0" encoding="utf-8"?>']
+            xml_lines.append(f'<TODOs version="{self.todo_xml_version}">')
+            if items:
+                xml_lines.append(items)
             xml_lines.append('</TODOs>')
             
-            # ファイルに書き込み
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(xml_lines))
+            # 一時ファイル経由で置き換え（ブラウザソースが書きかけを読まないように）
+            atomic_write_text(filename, '\n'.join(xml_lines), fsync=False)
+            atomic_write_text(version_filename, str(self.todo_xml_version), fsync=False)
+            self._todo_xml_items = items
             
-            logger.debug(f"TODO XML generated: {filename} ({len(self.common_requests)} items)")
+            logger.debug(f"TODO XML generated: {filename} ({len(self.common_requests)} items, version {self.todo_xml_version})")
             
         except Exception as e:
             logger.error(f"Failed to generate TODO XML: {e}")
     
+    def publish_todo_overlay(self):
+        """リクエストリストをオーバーレイ配信サーバの購読者へ送る（todo.xmlと同じ内容）"""
+        items = [{
+            'idx': index,
+            'title': req.get('content', ''),
+            'name': req.get('author', ''),
+            'platform': req.get('platform', ''),
+        } for index, req in enumerate(self.common_requests, start=1)]
+        self.overlay_server.publish('todo', 'todo', {'items': items})
+    
+    def start_overlay_server(self):
+        """設定に従ってオーバーレイ配信サーバを起動/停止（設定変更時にも呼ぶ）"""
+        port = self.global_settings.overlay_server_port
+        if self.overlay_server.is_running() and (not self.global_settings.overlay_server_enabled or self.overlay_server.port != port):
+            self.overlay_server.stop()
+        if self.global_settings.overlay_server_enabled:
+            self.overlay_server.port = port
+            self.overlay_server.start()
+    
     def setup_icon(self):
         """アプリケーションアイコンを設定"""
         # 実行ファイルのディレクトリを取得（ビルド環境対応）
@@ -1979,59 +1890,75 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
             all_urls.append(settings.url)
         self.global_settings.last_streams = all_urls
         
-        # 全配信を停止（各ストリームで最大3秒待機してスレッド終了を確認）
+        # 全配信を停止してイベントループを終了
         logger.info("Stopping all streams before closing...")
-        for stream_id in list(self.stream_manager.streams.keys()):
-            self.stream_manager.stop_stream(stream_id)
+        self.stream_manager.shutdown()
+        
+        # コメントキューの定期処理を停止
+        self.stop_comment_drain()
+        logger.info(f"Comment queue stats: {self.comment_queue.stats()}")
         
         # リクエストリストを保存
         self.save_requests()
         
         # 設定保存
-        self.global_settings.save()
+        self.save_global_settings()
+        
+        # 保留中の保存を書き込んでから終了
+        self.request_journal.close()
+        self.persistence.shutdown()
+        self.overlay_server.stop()
+        self.fetch_pool.shutdown()
+        self.root.after_cancel(self._obs_status_job)
+        self.obs_supervisor.stop()
+        http_client.close()
         
         # ウィンドウを閉じる
         logger.info("Application closing")
         self.root.destroy()
     
-    def save_requests(self, filename='requests.json'):
-        """リクエストリストをファイルに保存
+    def save_requests(self):
+        """リクエストリストのスナップショット保存を要求
         
-        Args:
-            filename (str): 保存先ファイル名
+        通常の変更は操作ログへの追記（on_request_saved）で保存される。
+        ここではログが溜まったときと終了時にまとめて書き直す。
+        ログの退避だけをここで行い、スナップショットの書き込みは別スレッドで行う。
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.common_requests, f, indent=2, ensure_ascii=False)
+            seq = self.request_journal.rotate()
+            data = {'seq': seq, 'requests': list(self.common_requests)}
+            self.persistence.save('requests', self.request_journal.snapshot_file, data,
+                                  after_write=lambda data: self.request_journal.remove_segments(data['seq']))
             logger.info(f"Requests saved: {len(self.common_requests)} items")
         except Exception as e:
             logger.error(f"Failed to save requests: {e}")
     
-    def load_requests(self, filename='requests.json'):
-        """リクエストリストをファイルから読み込み
-        
-        Args:
-            filename (str): 読み込み元ファイル名
-        """
-        if not os.path.exists(filename):
-            logger.info(f"Request file not found: {filename} (starting with empty list)")
+    def save_global_settings(self):
+        """グローバル設定の保存を要求（別スレッドでまとめて書き込む）"""
+        self.persistence.save('settings', 'global_settings.json', self.global_settings.snapshot())
+    
+    def load_requests(self):
+        """リクエストリストをスナップショットと操作ログから読み込み"""
+        if not os.path.exists(self.request_journal.snapshot_file) and not os.path.exists(self.request_journal.log_file):
+            logger.info(f"Request file not found: {self.request_journal.snapshot_file} (starting with empty list)")
             return
         
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.common_requests = json.load(f)
+            requests_data = self.request_journal.load()
+            # 変更通知で表示・XMLが更新される
+            self.request_engine.load(requests_data)
             logger.info(f"Requests loaded: {len(self.common_requests)} items")
             
-            # GUIが初期化されていれば表示を更新
-            if hasattr(self, 'request_tree'):
-                self.update_request_display()
+            # 再生した操作ログをスナップショットに取り込む
+            if self.request_journal.pending:
+                self.save_requests()
                 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse request file: {e}")
-            self.common_requests = []
+            self.request_engine.load([])
         except Exception as e:
             logger.error(f"Failed to load requests: {e}")
-            self.common_requests = []
+            self.request_engine.load([])
     
     def change_language(self, lang_code):
         """言語を変更
@@ -2041,7 +1968,7 @@ class MultiStreamCommentHelper(GUIComponents, CommentHandler):
         """
         if lang_code != self.global_settings.language:
             self.global_settings.language = lang_code
-            self.global_settings.save()
+            self.save_global_settings()
             
             # 言語ファイルを再ロード
             self.strings = load_language(lang_code)